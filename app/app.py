@@ -1,5 +1,13 @@
 import streamlit as st
 
+from utils.pre_carregamento import iniciar as iniciar_pre_carregamento
+
+# Mostra a página de desempenho (tempos por etapa dos últimos reruns do Dashboard)
+MOSTRAR_DESEMPENHO = True
+
+# Threads que pré-carregam os meses vizinhos ao selecionado no Dashboard (uma vez por processo)
+iniciar_pre_carregamento()
+
 # --- Sessão de estado para evitar recarregamento ---
 if 'pix_enviados' not in st.session_state:
     st.session_state.pix_enviados = None
@@ -12,6 +20,8 @@ pages = {
         st.Page("paginas/Dashboard.py", title="Dashboard"),
     ]
 }
+if MOSTRAR_DESEMPENHO:
+    pages["Debug"] = [st.Page("paginas/desempenho.py", title="Performance")]
 
 pg = st.navigation(pages)
-pg.run()
\ No newline at end of file
+pg.run()
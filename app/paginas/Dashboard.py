@@ -1,139 +1,233 @@
 import streamlit as st
 import streamlit as st
 import pandas as pd
-from utils.extrato_parse import (
-    parse_extrato_bancario,
-    parse_recibos_banrisul,
-    parse_pix_extrato_fitz,
-    debug_extrair_linhas_pdf,
-    parse_pix_extrato_pdfplumber,
-    moeda_para_float
+from utils.alteracoes import ler_tabela, registrar
+from utils.agregados import (
+    _assinatura_categorias,
+    aplicar_categorias_boletos,
+    aplicar_categorias_pix,
+    carregar_agregados,
+    filtrar_categoria,
+    forma_pagamento,
+    garantir_agregados,
+    resumo,
+    total
 )
+from utils.armazenamento import carregar, meses_disponiveis, rotulo_mes
+from utils.conciliacao import conciliar_base
+from utils.instrumentacao import etapa, finalizar_execucao, iniciar_execucao, registrar_falha_cache
+from utils.manifesto import falhas, sincronizar, versao_dados
+from utils.moeda import centavos_para_reais
+from utils.paginacao import consultar, janela, montar_indice_tabela
+from utils.pre_carregamento import ERRO, PENDENTE, PRONTO, agendar, situacao
 
 st.set_page_config(layout="wide")
 
-# === Dicionário de meses e caminhos ===
-meses = {
-    'Agosto 2024': ["app/data/extratos/agosto24.pdf", "app/data/boletos/agosto24.pdf", "app/data/pix/agosto24.csv"],
-    'Setembro 2024': ["app/data/extratos/setembro24.pdf", "app/data/boletos/setembro24.pdf", "app/data/pix/setembro24.csv"],
-    'Outubro 2024': ["app/data/extratos/outubro24.pdf", "app/data/boletos/outubro24.pdf", "app/data/pix/outubro24.csv"],
-    'Novembro 2024': ["app/data/extratos/novembro24.pdf", "app/data/boletos/novembro24.pdf", "app/data/pix/novembro24.csv"],
-    'Dezembro 2024': ["app/data/extratos/dezembro24.pdf", "app/data/boletos/dezembro24.pdf", "app/data/pix/dezembro24.csv"],
-    'Janeiro 2025': ["app/data/extratos/janeiro25.pdf", "app/data/boletos/janeiro25.pdf", "app/data/pix/janeiro25.csv"],
-    'Fevereiro 2025': ["app/data/extratos/fevereiro25.pdf", "app/data/boletos/fevereiro25.pdf", "app/data/pix/fevereiro25.csv"],
-    'Marco 2025': ["app/data/extratos/marco25.pdf", "app/data/boletos/marco25.pdf", "app/data/pix/marco25.csv"],
-    'Abril 2025': ["app/data/extratos/abril25.pdf", "app/data/boletos/abril25.pdf", "app/data/pix/abril25.csv"]
-}
-with open('app/data/configuracoes/categorias.txt', 'r') as file:
-    categorias = file.readlines()
-    categorias = [categoria.strip() for categoria in categorias if categoria.strip() != '']
-# === Sidebar: seleção de mês ===
-with st.sidebar:
-    meses_opcoes = ["Todos"] + list(meses.keys())
-    mes = st.selectbox('Selecione um mês', meses_opcoes)
-
-    categorias = ["Todas"]+categorias
-    categorias_selecionada = st.selectbox('Selecione uma categoria', categorias)
+# Tempos de cada etapa deste rerun, exibidos na página de desempenho
+iniciar_execucao("Dashboard")
 
+# Processos usados no parse paralelo da importação (None = quantidade de CPUs)
+MAX_WORKERS = None
 
+ABAS = ['Extrato', 'Boletos', 'Pix', 'Conciliação', 'Dívidas']
 
+# Linhas por página nas tabelas paginadas
+TAMANHOS_PAGINA = [50, 100, 500]
 
 
-st.title(f"📄 Visualização - {mes}")
+# === Carregamento sob demanda ===
+# Cada aba lê só a fonte que exibe. Os loaders ficam em cache (st.cache_data) pela
+# combinação de meses, versão dos arquivos importados (hash do manifesto) e, quando há
+# categorias, assinatura dos CSVs de categorias: trocar de aba ou de categoria reaproveita
+# os DataFrames já lidos, e importar um arquivo ou editar categorias gera uma chave nova.
+# O corpo dos loaders só roda quando o valor não está em cache, o que conta uma falha.
+# A base guarda o Valor em centavos; os loaders entregam em reais, prontos para exibição.
 
-# === Carrega dados conforme mês ===
-if mes == "Todos":
-    dfs, dfs_pix, dfs_boletos = [], [], []
-    for caminho in meses.values():
-        try:
-            dfs.append(parse_extrato_bancario(caminho[0]))
-            dfs_boletos.append(parse_recibos_banrisul(caminho[1]))
-            dfs_pix.append(pd.read_csv(caminho[2]))  # ✅ agora sim
-        except Exception as e:
-            st.warning(f"Erro ao processar {caminho}: {e}")
-
-    df = pd.concat(dfs, ignore_index=True)
-    df_boletos = pd.concat(dfs_boletos, ignore_index=True)
-    df_pix = pd.concat(dfs_pix, ignore_index=True)  # ✅ agora funciona
-else:
-    caminho_pdf = meses[mes]
-    df = parse_extrato_bancario(caminho_pdf[0])
-    df_boletos = parse_recibos_banrisul(caminho_pdf[1])
-    df_pix = pd.read_csv(caminho_pdf[2])
+@st.cache_data(show_spinner=False, max_entries=32)
+def carregar_extrato(meses: tuple, versao: str) -> pd.DataFrame:
+    registrar_falha_cache()
+    df = carregar("extrato", meses and list(meses), ["Data", "Descricao", "Documento", "Valor"])
+    df['Descricao'] = df['Descricao'].apply(forma_pagamento)
+    df['Valor'] = centavos_para_reais(df['Valor'])
+    return df
 
-def remove_prefix(text):
-    if text.startswith('de'):
-        return text.replace('de', '').strip().title()
-    if text.startswith('para'):
-        return text.replace('para', '').strip().title()
-    return text
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def carregar_boletos(meses: tuple, versao: str, versao_categorias: str) -> pd.DataFrame:
+    registrar_falha_cache()
+    df_boletos = aplicar_categorias_boletos(carregar("boleto", meses and list(meses)))
+    df_boletos['Valor'] = centavos_para_reais(df_boletos['Valor'])
+    return df_boletos
 
-# === Agrupamento e totais de extrato ===
 
-def forma_pagamento(descricao):
-    if descricao.upper().startswith('PIX'):
-        return 'Pix'
+@st.cache_data(show_spinner=False, max_entries=32)
+def carregar_pix(meses: tuple, versao: str, versao_categorias: str) -> pd.DataFrame:
+    registrar_falha_cache()
+    df_pix = aplicar_categorias_pix(carregar("pix", meses and list(meses)))
+    df_pix["Operação"] = df_pix["Operação"].apply(lambda x: x.replace('Pix', '').strip())
+    df_pix["Valor"] = centavos_para_reais(df_pix["Valor"])
+    return df_pix.drop(columns='CPF/CNPJ')
 
-    if descricao.upper().startswith('PG'):
-        return 'Boleto'
 
-    return descricao.title()
+@st.cache_data(show_spinner=False, max_entries=32)
+def carregar_cubo(meses: tuple, versao: str, versao_categorias: str) -> pd.DataFrame:
+    registrar_falha_cache()
+    return carregar_agregados(meses and list(meses))
 
 
-categorias_pix = pd.read_csv('app/data/configuracoes/categorias_pix.csv')
-categorias_pix = categorias_pix[['Pagador/Recebedor', 'Categoria']]
-df_pix['Pagador/Recebedor'] = df_pix['Pagador/Recebedor'].apply(remove_prefix)
-df_pix = df_pix.merge(categorias_pix, on='Pagador/Recebedor', how='left')
+@st.cache_data(show_spinner=False, max_entries=8)
+def carregar_conciliacao(versao: str) -> dict:
+    # Concilia a base inteira: um lançamento do fim do mês pode ter o detalhe no mês anterior
+    registrar_falha_cache()
+    resultado = conciliar_base()
+    for df in resultado.values():
+        for coluna in ['Valor', 'Valor Detalhe']:
+            if coluna in df.columns:
+                df[coluna] = centavos_para_reais(df[coluna])
+    return resultado
 
-categorias_boletos = pd.read_csv('app/data/configuracoes/categorias_boletos.csv')
-categorias_boletos = categorias_boletos[['Complemento', 'Categoria']]
-df_boletos = df_boletos.merge(categorias_boletos, on='Complemento', how='left')
 
-if categorias_selecionada != 'Todas':
-    df_pix = df_pix[df_pix['Categoria'] == categorias_selecionada]
-    df_boletos = df_boletos[df_boletos['Categoria'] == categorias_selecionada]
+def medir_carga(nome: str, loader, *args) -> pd.DataFrame:
+    with etapa(nome, cache=True) as registro:
+        df = loader(*args)
+        registro["linhas"] = len(df)
+    return df
 
-df_pix["Valor"] = df_pix["Valor"].apply(moeda_para_float)
-df_pix["Operação"] = df_pix["Operação"].apply(lambda x: x.replace('Pix', '').strip())
-df_pix = df_pix.drop(columns='CPF/CNPJ')
 
+meses = meses_disponiveis()
+# === Sidebar: seleção de mês ===
+with st.sidebar:
+    meses_opcoes = ["Todos"] + meses
+    mes = st.selectbox('Selecione um mês', meses_opcoes,
+                       format_func=lambda m: m if m == "Todos" else rotulo_mes(m))
 
-pix_env = df_pix[df_pix['Operação'] == 'Enviado']
-pix_rec = df_pix[df_pix['Operação'] == 'Recebido']
-df['Descricao'] = df['Descricao'].apply(forma_pagamento)
-
-entradas = df[df['Valor'] > 0]
-entradas = entradas.groupby('Descricao')['Valor'].sum().reset_index()
-
-saidas = df[df['Valor'] < 0]
-saidas = saidas.groupby('Descricao')['Valor'].sum().reset_index()
-
-total_entradas = entradas['Valor'].sum()
-total_saidas = saidas['Valor'].sum()
-tab1, tab2, tab3, tab4 = st.tabs(['Extrato', 'Boletos', 'Pix', 'Dívidas'])
-
+    with open('app/data/configuracoes/categorias.txt', 'r') as file:
+        categorias = file.readlines()
+        categorias = [categoria.strip() for categoria in categorias if categoria.strip() != '']
+    categorias = ["Todas"]+categorias
+    categorias_selecionada = st.selectbox('Selecione uma categoria', categorias)
 
 
-pagos = df_boletos[df_boletos['Situação'] == 'EFETUADA']
 
 
 
-# === Cards com totais ===
+st.title(f"📄 Visualização - {mes if mes == 'Todos' else rotulo_mes(mes)}")
+
+# === Aba selecionada: só ela é executada (st.tabs executaria todas a cada rerun) ===
+aba = st.radio('Aba', ABAS, horizontal=True, key='aba', label_visibility='collapsed')
+
+# === Base Parquet: importa apenas arquivos novos ou modificados em app/data ===
+# Roda depois do primeiro paint (seleção de mês, título e abas já estão na tela) e antes
+# do conteúdo da aba, que lê a base. Se a lista de meses mudou, a página roda de novo
+# para que o seletor de mês a mostre.
+with etapa('sincronizar'), st.spinner('Verificando arquivos novos...'):
+    relatorio = sincronizar(max_workers=MAX_WORKERS)
+if not relatorio.empty and meses_disponiveis() != meses:
+    # Os avisos desta importação são exibidos na execução seguinte
+    st.session_state['relatorio_sincronizacao'] = relatorio
+    st.rerun()
+if 'relatorio_sincronizacao' in st.session_state:
+    relatorio = pd.concat([st.session_state.pop('relatorio_sincronizacao'), relatorio], ignore_index=True)
+# Arquivos que falharam continuam avisados até serem corrigidos (só então são tentados de novo)
+for caminho, erro in falhas().items():
+    st.warning(f"Erro ao processar {caminho}: {erro}")
+for _, linha in relatorio[(relatorio['Situação'] != 'erro') & (relatorio['Duplicadas'] > 0)].iterrows():
+    st.info(f"{linha['Arquivo']}: {linha['Duplicadas']} transação(ões) já importada(s) de outro arquivo foram ignoradas.")
+
+# Uma vez por rerun: o cubo da aba e o dos pré-carregamentos ficam atualizados com as
+# categorias atuais
+with etapa('garantir_agregados'):
+    garantir_agregados()
+
+meses_carregados = None if mes == "Todos" else (mes,)
+versao_categorias = _assinatura_categorias()
+
+
+def cubo_filtrado() -> pd.DataFrame:
+    fontes = ["extrato", "boleto", "pix"]
+    cubo = medir_carga('carregar_cubo', carregar_cubo, meses_carregados,
+                       versao_dados(fontes, meses_carregados), versao_categorias)
+    if categorias_selecionada != 'Todas':
+        with etapa('filtrar_categoria'):
+            cubo = filtrar_categoria(cubo, categorias_selecionada)
+    return cubo
+
+
+def filtrar(df: pd.DataFrame) -> pd.DataFrame:
+    if categorias_selecionada != 'Todas':
+        with etapa('filtrar_categoria'):
+            return df[df['Categoria'] == categorias_selecionada]
+    return df
+
+
+# === Tabelas paginadas ===
+# As tabelas longas mandam ao navegador só a página visível; busca, ordenação e filtro de
+# categoria são feitos no servidor sobre um índice (utils.paginacao). O índice fica em
+# cache pela mesma versão usada no loader da tabela, e não depende da categoria selecionada.
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def indice_tabela(nome: str, versao: tuple, _df: pd.DataFrame) -> dict:
+    registrar_falha_cache()
+    return montar_indice_tabela(_df)
+
+
+def tabela_paginada(nome: str, df: pd.DataFrame, versao: tuple, column_config: dict = None,
+                    filtros: dict = None, container=st):
+    with etapa('indice_tabela', cache=True):
+        indice = indice_tabela(nome, versao, df)
+
+    c1, c2, c3, c4 = container.columns([3, 2, 1, 1], vertical_alignment='bottom')
+    busca = c1.text_input('Buscar', key=f'{nome}_busca', placeholder='Buscar em todas as colunas')
+    ordenar_por = c2.selectbox('Ordenar por', [None] + list(indice['df'].columns), key=f'{nome}_ordenar',
+                               format_func=lambda c: 'Ordem original' if c is None else c)
+    decrescente = c3.checkbox('Decrescente', key=f'{nome}_decrescente')
+    tamanho = c4.selectbox('Linhas', TAMANHOS_PAGINA, key=f'{nome}_tamanho')
+
+    with etapa('consultar_tabela') as registro:
+        posicoes = consultar(indice, busca, filtros, ordenar_por, decrescente)
+        registro['linhas'] = len(posicoes)
+    paginas = max(1, -(-len(posicoes) // tamanho))
+
+    # Nova busca, ordem ou filtro volta para a primeira página
+    consulta = (versao, busca, str(filtros), ordenar_por, decrescente, tamanho)
+    chave_pagina = f'{nome}_pagina'
+    if st.session_state.get(f'{nome}_consulta') != consulta:
+        st.session_state[f'{nome}_consulta'] = consulta
+        st.session_state[chave_pagina] = 1
+    pagina = min(st.session_state.get(chave_pagina, 1), paginas)
+    st.session_state[chave_pagina] = pagina
+
+    inicio = (pagina - 1) * tamanho
+    container.dataframe(janela(indice, posicoes, inicio, tamanho), hide_index=True,
+                        use_container_width=True, column_config=column_config)
+    c1, c2 = container.columns([3, 1], vertical_alignment='center')
+    c1.caption(f'Linhas {min(inicio + 1, len(posicoes))}–{min(inicio + tamanho, len(posicoes))} '
+               f'de {len(posicoes)} ({len(indice["df"])} no total)')
+    c2.number_input('Página', min_value=1, max_value=paginas, key=chave_pagina,
+                    label_visibility='collapsed')
 
-if 'pix_enviados' not in st.session_state:
-    st.session_state.pix_enviados = pix_env
 
-if 'boletos_pagos' not in st.session_state:
-    st.session_state.boletos_pagos = pagos
 # === Exibição das tabelas ===
 config = {
     "Valor": st.column_config.NumberColumn(
         "Valor",
         format="R$ %.2f"
+    ),
+    "Data": st.column_config.DateColumn(
+        "Data",
+        format="DD/MM/YYYY"
     )
 }
-with tab1:
+if aba == 'Extrato':
+    versao = (meses_carregados, versao_dados(["extrato"], meses_carregados))
+    df = medir_carga('carregar_extrato', carregar_extrato, *versao)
+    cubo = cubo_filtrado()
+    entradas = resumo(cubo, 'entradas')
+    saidas = resumo(cubo, 'saidas')
+
+    total_entradas = total(cubo, 'extrato', 'Entrada')
+    total_saidas = total(cubo, 'extrato', 'Saída')
+
     col1, col2 = st.columns(2)
     with col1:
         st.markdown(f"""
@@ -152,29 +246,54 @@ with tab1:
 
     col1, col2, col3 = st.columns([2, 1, 1])
     col1.subheader("Extrato")
-    col1.data_editor(df, hide_index=True, use_container_width=True, key='df', column_config=config)
+    tabela_paginada('extrato', df, versao, column_config=config, container=col1)
     col2.subheader("Entradas")
     col2.data_editor(entradas, hide_index=True, use_container_width=True, key='entradas', column_config=config)
     col3.subheader("Saídas")
     col3.data_editor(saidas, hide_index=True, use_container_width=True, key='saidas', column_config=config)
-with tab2:
+elif aba == 'Boletos':
+    versao = (meses_carregados, versao_dados(["boleto"], meses_carregados), versao_categorias)
+    df_boletos_todos = medir_carga('carregar_boletos', carregar_boletos, *versao)
+    df_boletos = filtrar(df_boletos_todos)
+    cubo = cubo_filtrado()
+
+    pagos = df_boletos[df_boletos['Situação'] == 'EFETUADA']
+    total_pagos = total(cubo, 'boleto', 'EFETUADA')
+    pagos_por_complemento = resumo(cubo, 'boletos_pagos')
+
+    if 'boletos_pagos' not in st.session_state:
+        st.session_state.boletos_pagos = pagos
+
     col1, col2 = st.columns(2)
     with col1:
 
         st.markdown(f"""
         <div style=\"background-color:#f2dede;padding:20px;border-radius:10px;text-align:center;\">  
             <h3 style=\"color:#a94442;\">💰 Total de Boletos Pagos</h3>  
-            <h2 style=\"margin:0;color:#a94442;\">R$ {pagos['Valor'].sum():,.2f}</h2>  
+            <h2 style=\"margin:0;color:#a94442;\">R$ {total_pagos:,.2f}</h2>  
         </div>
         """, unsafe_allow_html=True)
 
     with col2:
-        st.data_editor(pagos.groupby('Complemento')['Valor'].sum().reset_index(), height=200, hide_index=True, column_config=config)
+        st.data_editor(pagos_por_complemento, height=200, hide_index=True, column_config=config)
 
     # === Outras tabelas ===
     st.subheader("📄 Boletos / Recibos Banrisul")
-    st.dataframe(df_boletos, use_container_width=True)
-with tab3:
+    tabela_paginada('boletos', df_boletos_todos, versao, column_config=config,
+                    filtros=None if categorias_selecionada == 'Todas' else {'Categoria': categorias_selecionada})
+elif aba == 'Pix':
+    versao = (meses_carregados, versao_dados(["pix"], meses_carregados), versao_categorias)
+    df_pix_todos = medir_carga('carregar_pix', carregar_pix, *versao)
+    df_pix = filtrar(df_pix_todos)
+    cubo = cubo_filtrado()
+
+    pix_env = df_pix[df_pix['Operação'] == 'Enviado']
+    total_pix_rec = total(cubo, 'pix', 'Recebido')
+    total_pix_env = total(cubo, 'pix', 'Enviado')
+    pix_env_por_pessoa = resumo(cubo, 'pix_enviados')
+
+    if 'pix_enviados' not in st.session_state:
+        st.session_state.pix_enviados = pix_env
 
     col1, col2, col3 = st.columns([1.2, 1.2, 2])
     with col1:
@@ -182,7 +301,7 @@ with tab3:
         st.markdown(f"""
             <div style=\"background-color:#dff0d8;padding:20px;border-radius:10px;text-align:center;\">  
                 <h3 style=\"color:#3c763d;\">💰Recebidos</h3>  
-                <h2 style=\"margin:0;color:#3c763d;\">R$ {pix_rec['Valor'].sum():,.2f}</h2>  
+                <h2 style=\"margin:0;color:#3c763d;\">R$ {total_pix_rec:,.2f}</h2>  
             </div>
             """, unsafe_allow_html=True)
 
@@ -190,30 +309,106 @@ with tab3:
             st.markdown(f"""
             <div style=\"background-color:#f2dede;padding:20px;border-radius:10px;text-align:center;\">  
                 <h3 style=\"color:#a94442;\">💸 Enviados</h3>  
-                <h2 style=\"margin:0;color:#a94442;\">R$ {pix_env['Valor'].sum():,.2f}</h2>  
+                <h2 style=\"margin:0;color:#a94442;\">R$ {total_pix_env:,.2f}</h2>  
             </div>
             """, unsafe_allow_html=True)
 
         with col3:
             st.subheader("🔁 PIX Enviados")
-            st.data_editor(pix_env.groupby('Pagador/Recebedor')['Valor'].sum().reset_index(), height=200, hide_index=True, column_config=config)
+            st.data_editor(pix_env_por_pessoa, height=200, hide_index=True, column_config=config)
 
     st.subheader("🔁 PIX Extrato")
-    st.data_editor(df_pix,height=300, hide_index=True,
-                       column_config=config)
-
-
-
-
-
-with tab4:
+    tabela_paginada('pix', df_pix_todos, versao, column_config=config,
+                    filtros=None if categorias_selecionada == 'Todas' else {'Categoria': categorias_selecionada})
+elif aba == 'Conciliação':
+    versao = versao_dados(["extrato", "boleto", "pix"])
+    with etapa('carregar_conciliacao', cache=True) as registro:
+        conciliacao = carregar_conciliacao(versao)
+        registro['linhas'] = len(conciliacao['conciliados'])
+    if mes != 'Todos':
+        conciliacao = {nome: df[df['Data'].dt.strftime('%Y-%m') == mes] for nome, df in conciliacao.items()}
+
+    config_conciliacao = {
+        **config,
+        "Valor Detalhe": st.column_config.NumberColumn("Valor Detalhe", format="R$ %.2f"),
+        "Data Detalhe": st.column_config.DateColumn("Data Detalhe", format="DD/MM/YYYY"),
+    }
+    ambiguos = conciliacao['ambiguos'][['Data', 'Descricao', 'Documento']].drop_duplicates()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric('✅ Conciliados', len(conciliacao['conciliados']))
+    col2.metric('⚠️ Ambíguos', len(ambiguos))
+    col3.metric('❌ Sem par', len(conciliacao['sem_par']))
+
+    st.subheader("❌ Sem par")
+    st.caption("Lançamentos do extrato sem Pix/boleto correspondente e Pix/boletos que não aparecem no extrato.")
+    st.dataframe(conciliacao['sem_par'], hide_index=True, use_container_width=True, column_config=config_conciliacao)
+
+    st.subheader("⚠️ Ambíguos")
+    st.caption("Lançamentos com mais de um candidato igualmente provável, um candidato por linha.")
+    st.dataframe(conciliacao['ambiguos'], hide_index=True, use_container_width=True, column_config=config_conciliacao)
+
+    st.subheader("✅ Conciliados")
+    tabela_paginada('conciliados', conciliacao['conciliados'], (versao, mes), column_config=config_conciliacao)
+else:
     caminho = 'app/data/configuracoes/dividas.csv'
-    df_dividas = pd.read_csv(caminho)
+    with etapa('carregar_dividas') as registro:
+        df_dividas = ler_tabela(caminho)
+        registro['linhas'] = len(df_dividas)
     st.write(f'# Total de Dividas: R$ :red[{df_dividas['Valor'].sum():,.2f}]')
     df_dividas = st.data_editor(df_dividas, use_container_width=True,num_rows='dynamic', key='df_dividas', column_config=config)
     if st.button('Salvar'):
-        df_dividas.to_csv(caminho, index=False)
+        # Grava só as edições (células, linhas novas e removidas) no log de alterações;
+        # o rerun relê a tabela, sem tocar nos dados importados
+        edicoes = st.session_state['df_dividas']
+        if edicoes['edited_rows'] or edicoes['added_rows'] or edicoes['deleted_rows']:
+            registrar(caminho, {'tipo': 'editor', 'editadas': edicoes['edited_rows'],
+                                'adicionadas': edicoes['added_rows'], 'removidas': edicoes['deleted_rows']})
         st.success('Salvo com sucesso!')
         st.rerun()
 
 
+# === Pré-carregamento: o mês atual (outras abas), os vizinhos e 'Todos' ===
+# As chamadas são as mesmas que as abas fazem; prontas, elas viram acertos de cache.
+def chamadas_loaders(alvo) -> list:
+    fontes = ["extrato", "boleto", "pix"]
+    chamadas = [
+        (carregar_extrato, alvo, versao_dados(["extrato"], alvo)),
+        (carregar_boletos, alvo, versao_dados(["boleto"], alvo), versao_categorias),
+        (carregar_pix, alvo, versao_dados(["pix"], alvo), versao_categorias),
+        (carregar_cubo, alvo, versao_dados(fontes, alvo), versao_categorias),
+    ]
+    if alvo is None:
+        chamadas.append((carregar_conciliacao, versao_dados(fontes)))
+    return chamadas
+
+
+def exibir_pre_carregamento(alvos: list):
+    icones = {PRONTO: '✔', PENDENTE: '⏳', ERRO: '✖'}
+    linhas = []
+    for alvo, chamadas in alvos:
+        estados = {situacao(*chamada) for chamada in chamadas}
+        if None in estados:
+            continue
+        estado = ERRO if ERRO in estados else PENDENTE if PENDENTE in estados else PRONTO
+        linhas.append(f"{icones[estado]} {'Todos' if alvo is None else rotulo_mes(alvo[0])}")
+    if linhas:
+        st.caption('Pré-carregamento: ' + ' · '.join(linhas))
+
+
+with etapa('pre_carregamento'):
+    i = meses_opcoes.index(mes)
+    vizinhos = meses_opcoes[max(i - 1, 0):i] + meses_opcoes[i + 1:i + 2]
+    alvos = list(dict.fromkeys([mes] + vizinhos + ['Todos']))
+    alvos = [(None if m == 'Todos' else (m,)) for m in alvos]
+    alvos = [(alvo, chamadas_loaders(alvo)) for alvo in alvos]
+    for _, chamadas in alvos:
+        for chamada in chamadas:
+            agendar(*chamada)
+    pendente = any(situacao(*chamada) == PENDENTE for _, chamadas in alvos for chamada in chamadas)
+
+# Enquanto houver tarefas em andamento, a situação é atualizada sem rerun da página
+with st.sidebar:
+    st.fragment(exibir_pre_carregamento, run_every=2 if pendente else None)(alvos)
+
+finalizar_execucao()
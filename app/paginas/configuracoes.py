@@ -1,17 +1,16 @@
 import streamlit as st
 import pandas as pd
 
+from utils.alteracoes import anexar_linha
+from utils.categorias import salvar_categorias
+
 def carregar_categorias(caminho='app/data/configuracoes/categorias.txt'):
     with open(caminho, 'r') as file:
         categorias = [linha.strip() for linha in file if linha.strip() != '']
     return categorias
 
 def salvar_categoria(nova_categoria, caminho='app/data/configuracoes/categorias.txt'):
-    with open(caminho, 'a') as file:
-        file.write(f'\n{nova_categoria}')
-
-def salvar_dataframe(df, caminho):
-    df.to_csv(caminho, index=False)
+    anexar_linha(caminho, nova_categoria)
 
 def main():
     st.title('Configurações')
@@ -54,9 +53,10 @@ def main():
         },
         hide_index=True,
     )
+    # Só os nomes com a categoria alterada vão para o log de alterações do mapeamento
     if c1.button('Salvar', key='pix'):
-        salvar_dataframe(df_pix_edit, 'app/data/configuracoes/categorias_pix.csv')
-        c1.success('Salvo com sucesso')
+        alterados = salvar_categorias('pix', df_pix, df_pix_edit)
+        c1.success(f'Salvo com sucesso ({alterados} alterado(s))')
 
     # Editor Categorias Boletos
     c2.write('### Categorias Boletos')
@@ -73,8 +73,8 @@ def main():
         hide_index=True,
     )
     if c2.button('Salvar', key='boletos'):
-        salvar_dataframe(df_boletos_edit, 'app/data/configuracoes/categorias_boletos.csv')
-        c2.success('Salvo com sucesso')
+        alterados = salvar_categorias('boleto', df_boletos, df_boletos_edit)
+        c2.success(f'Salvo com sucesso ({alterados} alterado(s))')
 
 
 main()
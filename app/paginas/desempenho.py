@@ -0,0 +1,82 @@
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentacao import LIMITE_EXECUCOES, execucoes_recentes, ler_log
+
+# Tempo do rerun que não caiu em nenhuma etapa: montagem dos widgets e o restante do script
+ETAPA_RESTANTE = 'renderização/outros'
+
+
+def tabela_etapas(execucoes: list) -> pd.DataFrame:
+    """
+    Uma linha por (execução, etapa), com a etapa ETAPA_RESTANTE completando o total.
+    As execuções são numeradas em ordem, já que vários reruns cabem no mesmo segundo.
+    """
+    linhas = []
+    for i, execucao in enumerate(execucoes, start=1):
+        rotulo = f"{i:02d} · {execucao['inicio'][11:]}"
+        medido = 0.0
+        for nome, dados in execucao['etapas'].items():
+            medido += dados['segundos']
+            linhas.append([rotulo, nome, dados['segundos'], dados['chamadas'],
+                           dados['linhas'], dados['acertos'], dados['falhas']])
+        linhas.append([rotulo, ETAPA_RESTANTE, max(execucao['total_s'] - medido, 0.0), 1, 0, 0, 0])
+    return pd.DataFrame(linhas, columns=['Execução', 'Etapa', 'Segundos', 'Chamadas', 'Linhas', 'Acertos', 'Falhas'])
+
+
+def resumo_etapas(etapas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tempo médio/máximo, linhas e taxa de acerto de cache de cada etapa.
+    """
+    resumo = etapas.groupby('Etapa').agg(
+        Execuções=('Execução', 'nunique'),
+        Média=('Segundos', 'mean'),
+        Máximo=('Segundos', 'max'),
+        Linhas=('Linhas', 'mean'),
+        Acertos=('Acertos', 'sum'),
+        Falhas=('Falhas', 'sum'),
+    )
+    consultas = resumo['Acertos'] + resumo['Falhas']
+    resumo['Acerto de cache'] = (100 * resumo['Acertos'] / consultas).where(consultas > 0)
+    return resumo.sort_values('Média', ascending=False).reset_index()
+
+
+st.title('⏱️ Desempenho do Dashboard')
+
+with st.sidebar:
+    n = st.slider('Últimas execuções', 1, LIMITE_EXECUCOES, 20)
+
+# Sem execuções neste processo (ex.: app recém-iniciado), usa o log em disco
+execucoes = execucoes_recentes(n, 'Dashboard')
+if not execucoes:
+    execucoes = [e for e in ler_log(LIMITE_EXECUCOES) if e['nome'] == 'Dashboard'][-n:]
+if not execucoes:
+    st.info('Nenhuma execução registrada ainda. Abra o Dashboard para medir.')
+    st.stop()
+
+etapas = tabela_etapas(execucoes)
+totais = pd.Series([e['total_s'] for e in execucoes])
+
+col1, col2, col3 = st.columns(3)
+col1.metric('Último rerun', f"{totais.iloc[-1]:.3f} s")
+col2.metric('Mediana', f"{totais.median():.3f} s")
+col3.metric('Pior', f"{totais.max():.3f} s")
+
+st.subheader('Tempo por etapa em cada rerun')
+st.bar_chart(etapas, x='Execução', y='Segundos', color='Etapa')
+
+st.subheader('Resumo por etapa')
+st.dataframe(
+    resumo_etapas(etapas),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        'Média': st.column_config.NumberColumn('Média (s)', format='%.4f'),
+        'Máximo': st.column_config.NumberColumn('Máximo (s)', format='%.4f'),
+        'Linhas': st.column_config.NumberColumn('Linhas (média)', format='%.0f'),
+        'Acerto de cache': st.column_config.ProgressColumn('Acerto de cache', min_value=0, max_value=100, format='%.0f%%'),
+    },
+)
+
+with st.expander('Execuções'):
+    st.dataframe(etapas, hide_index=True, use_container_width=True)
@@ -0,0 +1,344 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+from utils.alteracoes import caminho_log, hash_snapshot, ler_alteracoes
+from utils.armazenamento import (
+    DIRETORIO_BASE,
+    VERSAO_ESQUEMA,
+    carregar,
+    gravar_fragmento,
+    meses_disponiveis,
+    remover_fragmento,
+)
+from utils.categorias import (
+    CAMINHO_CATEGORIAS_BOLETOS,
+    CAMINHO_CATEGORIAS_PIX,
+    CAMINHO_REGRAS,
+    caminho_mapeamento,
+    carregar_indice,
+    categorizar,
+    coluna_nome,
+    limpar_prefixo,
+    normalizar_chave,
+)
+from utils.moeda import centavos_para_reais
+
+# Cubo de agregados: Mes x Fonte x Tipo x Categoria x Contraparte -> Valor (soma, em centavos), Quantidade
+FONTE_AGREGADOS = "agregados"
+COLUNAS_AGREGADOS = ["Fonte", "Tipo", "Categoria", "Contraparte", "Valor", "Quantidade"]
+
+# Uma atualização do cubo por vez no processo (sessões do Streamlit são threads): a
+# verificação da assinatura e a reconstrução em `garantir_agregados` acontecem juntas, e
+# a importação (`atualizar_agregados`) não grava o cubo no meio delas. Reentrante porque
+# `garantir_agregados` chama `atualizar_agregados`.
+_trava_agregados = threading.RLock()
+
+
+def forma_pagamento(descricao):
+    if descricao.upper().startswith('PIX'):
+        return 'Pix'
+
+    if descricao.upper().startswith('PG'):
+        return 'Boleto'
+
+    return descricao.title()
+
+
+def aplicar_categorias_pix(df_pix: pd.DataFrame, indice: dict = None) -> pd.DataFrame:
+    """
+    Limpa o prefixo 'de'/'para' do Pagador/Recebedor e atribui a categoria de cada Pix.
+
+    Args:
+        df_pix (pd.DataFrame): Pix da base.
+        indice (dict): Índice de `categorias.montar_indice`. Padrão: o do CSV de categorias de Pix.
+    """
+    indice = indice or carregar_indice('pix')
+    df_pix = df_pix.copy()
+    df_pix['Pagador/Recebedor'] = limpar_prefixo(df_pix['Pagador/Recebedor'])
+    documentos = df_pix['CPF/CNPJ'] if 'CPF/CNPJ' in df_pix.columns else None
+    df_pix['Categoria'] = categorizar(indice, df_pix['Pagador/Recebedor'], documentos)
+    return df_pix
+
+
+def aplicar_categorias_boletos(df_boletos: pd.DataFrame, indice: dict = None) -> pd.DataFrame:
+    indice = indice or carregar_indice('boleto')
+    df_boletos = df_boletos.copy()
+    df_boletos['Categoria'] = categorizar(indice, df_boletos['Complemento'])
+    return df_boletos
+
+
+def _carregar_mes(fonte: str, mes: str, colunas: list, diretorio: str) -> pd.DataFrame:
+    try:
+        return carregar(fonte, [mes], colunas, diretorio)
+    except FileNotFoundError:
+        return pd.DataFrame(columns=colunas)
+
+
+def _agrupar(df: pd.DataFrame, fonte: str) -> pd.DataFrame:
+    df = df.assign(Fonte=fonte)
+    agregado = (
+        df.groupby(["Fonte", "Tipo", "Categoria", "Contraparte"], dropna=False, observed=True)["Valor"]
+        .agg(Valor="sum", Quantidade="count")
+        .reset_index()
+    )
+    return agregado[COLUNAS_AGREGADOS]
+
+
+def agregar_mes(mes: str, indice_pix: dict = None, indice_boletos: dict = None,
+                diretorio: str = DIRETORIO_BASE) -> pd.DataFrame:
+    """
+    Calcula as linhas do cubo de um mês a partir da base Parquet.
+
+    - extrato: Tipo 'Entrada'/'Saída' pelo sinal do valor, Contraparte = forma de pagamento.
+    - boleto: Tipo = Situação, Contraparte = Complemento, com a categoria do boleto.
+    - pix: Tipo 'Enviado'/'Recebido', Contraparte = Pagador/Recebedor, com a categoria do Pix.
+    """
+    extrato = _carregar_mes("extrato", mes, ["Descricao", "Valor"], diretorio)
+    extrato = extrato[extrato["Valor"] != 0]
+    extrato = pd.DataFrame({
+        "Tipo": extrato["Valor"].gt(0).map({True: "Entrada", False: "Saída"}),
+        "Categoria": None,
+        "Contraparte": extrato["Descricao"].apply(forma_pagamento),
+        "Valor": extrato["Valor"],
+    })
+
+    boletos = _carregar_mes("boleto", mes, ["Situação", "Complemento", "Valor"], diretorio)
+    boletos = aplicar_categorias_boletos(boletos, indice_boletos)
+    boletos = pd.DataFrame({
+        "Tipo": boletos["Situação"].astype(str),
+        "Categoria": boletos["Categoria"],
+        "Contraparte": boletos["Complemento"],
+        "Valor": boletos["Valor"],
+    })
+
+    pix = _carregar_mes("pix", mes, ["Operação", "Pagador/Recebedor", "CPF/CNPJ", "Valor"], diretorio)
+    pix = aplicar_categorias_pix(pix, indice_pix)
+    pix = pd.DataFrame({
+        "Tipo": pix["Operação"].astype(str).str.replace('Pix', '').str.strip(),
+        "Categoria": pix["Categoria"],
+        "Contraparte": pix["Pagador/Recebedor"],
+        "Valor": pix["Valor"],
+    })
+
+    partes = [_agrupar(df, fonte) for fonte, df in [("extrato", extrato), ("boleto", boletos), ("pix", pix)] if not df.empty]
+    cubo = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_AGREGADOS)
+    # Tipos fixos para que meses sem categoria não gravem colunas de tipo nulo no Parquet
+    return cubo.astype({
+        "Fonte": "string", "Tipo": "string", "Categoria": "string", "Contraparte": "string",
+        "Valor": "int64", "Quantidade": "int64",
+    })
+
+
+def _assinatura_categorias(caminhos=(CAMINHO_CATEGORIAS_PIX, CAMINHO_CATEGORIAS_BOLETOS, CAMINHO_REGRAS)) -> str:
+    h = hashlib.sha256()
+    # Os mapeamentos valem com as alterações pendentes no log (ver utils.alteracoes)
+    for caminho in list(caminhos) + [caminho_log(c) for c in caminhos]:
+        if os.path.exists(caminho):
+            with open(caminho, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def _caminho_assinatura(diretorio: str) -> str:
+    # Prefixo "_" para que o pyarrow não trate o arquivo como parte do dataset
+    return os.path.join(diretorio, FONTE_AGREGADOS, "_assinatura.json")
+
+
+def atualizar_agregados(meses: list = None, diretorio: str = DIRETORIO_BASE):
+    """
+    Recalcula o cubo dos meses informados (None = todos os meses da base).
+
+    Chamado na importação apenas para os meses que receberam ou perderam arquivos.
+    """
+    with _trava_agregados:
+        _atualizar_agregados(meses, diretorio)
+
+
+def _atualizar_agregados(meses: list, diretorio: str):
+    todos = sorted(set(meses_disponiveis("extrato", diretorio))
+                   | set(meses_disponiveis("boleto", diretorio))
+                   | set(meses_disponiveis("pix", diretorio)))
+    meses = todos if meses is None else meses
+
+    indice_pix = carregar_indice('pix')
+    indice_boletos = carregar_indice('boleto')
+
+    for mes in meses:
+        if mes not in todos:
+            remover_fragmento(FONTE_AGREGADOS, mes, "dados", diretorio)
+            continue
+        gravar_fragmento(FONTE_AGREGADOS, mes, "dados",
+                         agregar_mes(mes, indice_pix, indice_boletos, diretorio), diretorio)
+
+    os.makedirs(os.path.join(diretorio, FONTE_AGREGADOS), exist_ok=True)
+    # Temporário + os.replace: quem lê a assinatura ao mesmo tempo nunca vê o arquivo pela metade
+    caminho = _caminho_assinatura(diretorio)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({
+            "categorias": _assinatura_categorias(),
+            "esquema": VERSAO_ESQUEMA,
+            "regras": hash_snapshot(CAMINHO_REGRAS),
+            # Posição no log de alterações de cada mapeamento quando o cubo foi calculado
+            "mapeamentos": {
+                fonte: {"base": hash_snapshot(caminho_mapeamento(fonte)),
+                        "alteracoes": len(ler_alteracoes(caminho_mapeamento(fonte)))}
+                for fonte in ("pix", "boleto")
+            },
+        }, f)
+    os.replace(temporario, caminho)
+
+
+def _meses_afetados(assinatura: dict, diretorio: str):
+    """
+    Meses do cubo com algum nome cuja categoria mudou desde a assinatura, quando a mudança
+    está toda no log de alterações dos mapeamentos (só acréscimos depois da posição
+    registrada). None quando é preciso recalcular tudo (regras ou snapshots mudaram).
+    """
+    if assinatura.get("esquema") != VERSAO_ESQUEMA or assinatura.get("regras") != hash_snapshot(CAMINHO_REGRAS):
+        return None
+
+    alterados = []
+    for fonte in ("pix", "boleto"):
+        caminho = caminho_mapeamento(fonte)
+        anterior = assinatura.get("mapeamentos", {}).get(fonte)
+        alteracoes = ler_alteracoes(caminho)
+        if anterior is None or anterior["base"] != hash_snapshot(caminho) or anterior["alteracoes"] > len(alteracoes):
+            return None
+        coluna = coluna_nome(fonte)
+        nomes = [linha[coluna] for a in alteracoes[anterior["alteracoes"]:] for linha in a["linhas"]]
+        alterados.append((fonte, set(normalizar_chave(pd.Series(nomes, dtype=object)))))
+
+    cubo = carregar_agregados(diretorio=diretorio)
+    afetados = pd.Series(False, index=cubo.index)
+    for fonte, nomes in alterados:
+        afetados |= (cubo["Fonte"] == fonte) & normalizar_chave(cubo["Contraparte"]).isin(nomes)
+    return sorted(cubo.loc[afetados, "Mes"].unique())
+
+
+def garantir_agregados(diretorio: str = DIRETORIO_BASE) -> bool:
+    """
+    Atualiza o cubo se ele não existir, se os CSVs de categorias (ou as regras de fallback)
+    mudaram desde a última construção ou se foi gravado com outra VERSAO_ESQUEMA.
+
+    Alterações de categoria feitas pelo log de alterações recalculam só os meses em que os
+    nomes alterados aparecem; as demais mudanças reconstroem o cubo inteiro.
+
+    Returns:
+        bool: True se o cubo foi atualizado.
+    """
+    with _trava_agregados:
+        caminho = _caminho_assinatura(diretorio)
+        meses = None
+        if os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                assinatura = json.load(f)
+            if (assinatura.get("categorias") == _assinatura_categorias()
+                    and assinatura.get("esquema") == VERSAO_ESQUEMA):
+                return False
+            meses = _meses_afetados(assinatura, diretorio)
+        _atualizar_agregados(meses, diretorio)
+        return True
+
+
+def carregar_agregados(meses: list = None, diretorio: str = DIRETORIO_BASE) -> pd.DataFrame:
+    """
+    Lê o cubo de agregados dos meses pedidos (None = todos).
+    """
+    # Sem nenhuma partição (base vazia) o pyarrow lê um dataset sem colunas
+    if not meses_disponiveis(FONTE_AGREGADOS, diretorio):
+        return pd.DataFrame(columns=["Mes"] + COLUNAS_AGREGADOS)
+    return carregar(FONTE_AGREGADOS, meses, diretorio=diretorio)
+
+
+def totais_por(cubo: pd.DataFrame, fonte: str, tipo: str, coluna: str, por_mes: bool = False) -> pd.DataFrame:
+    """
+    Soma os valores do cubo de uma fonte/tipo agrupando pela Contraparte, devolvendo a
+    Contraparte com o nome de coluna usado nas tabelas do dashboard e o Valor em reais.
+    Com por_mes=True, agrupa também pelo Mes.
+    """
+    linhas = cubo[(cubo["Fonte"] == fonte) & (cubo["Tipo"] == tipo)]
+    chaves = ["Mes", "Contraparte"] if por_mes else "Contraparte"
+    totais = (
+        linhas.groupby(chaves, observed=True)["Valor"].sum()
+        .reset_index()
+        .rename(columns={"Contraparte": coluna})
+    )
+    totais["Valor"] = centavos_para_reais(totais["Valor"])
+    return totais
+
+
+def total(cubo: pd.DataFrame, fonte: str, tipo: str) -> float:
+    """
+    Soma exata (em centavos) dos valores de uma fonte/tipo, devolvida em reais.
+    """
+    linhas = cubo[(cubo["Fonte"] == fonte) & (cubo["Tipo"] == tipo)]
+    return int(linhas["Valor"].sum()) / 100
+
+
+# === Resumos ===
+# Tabelas de totais do dashboard, calculadas a partir do cubo. As mesmas tabelas são
+# gravadas em arquivo pelo processamento em lote (utils.lote).
+
+# Nome -> (fonte, tipo, nome da coluna da Contraparte)
+RESUMOS = {
+    "entradas": ("extrato", "Entrada", "Descricao"),
+    "saidas": ("extrato", "Saída", "Descricao"),
+    "boletos_pagos": ("boleto", "EFETUADA", "Complemento"),
+    "pix_enviados": ("pix", "Enviado", "Pagador/Recebedor"),
+    "pix_recebidos": ("pix", "Recebido", "Pagador/Recebedor"),
+}
+
+
+def resumo(cubo: pd.DataFrame, nome: str, por_mes: bool = False) -> pd.DataFrame:
+    """
+    Uma das tabelas de RESUMOS (ex.: 'entradas' por forma de pagamento), com o Valor em reais.
+    """
+    return totais_por(cubo, *RESUMOS[nome], por_mes=por_mes)
+
+
+def totais_mensais(cubo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total e quantidade de lançamentos por mês, fonte e tipo, com o Valor em reais.
+    """
+    totais = cubo.groupby(["Mes", "Fonte", "Tipo"], observed=True)[["Valor", "Quantidade"]].sum().reset_index()
+    totais["Valor"] = centavos_para_reais(totais["Valor"])
+    return totais
+
+
+def totais_por_categoria(cubo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total e quantidade de boletos e Pix por mês, fonte, tipo e categoria, com o Valor em
+    reais. Lançamentos sem categoria ficam com a Categoria vazia.
+    """
+    linhas = cubo[cubo["Fonte"].isin(["boleto", "pix"])]
+    totais = (
+        linhas.groupby(["Mes", "Fonte", "Tipo", "Categoria"], observed=True, dropna=False)[["Valor", "Quantidade"]]
+        .sum().reset_index()
+    )
+    totais["Valor"] = centavos_para_reais(totais["Valor"])
+    return totais
+
+
+def resumir(cubo: pd.DataFrame, por_mes: bool = False) -> dict:
+    """
+    Todas as tabelas de resumo do período do cubo: as de RESUMOS (por mês com por_mes=True),
+    'mensal' (`totais_mensais`) e 'categorias' (`totais_por_categoria`).
+    """
+    tabelas = {nome: resumo(cubo, nome, por_mes) for nome in RESUMOS}
+    tabelas["mensal"] = totais_mensais(cubo)
+    tabelas["categorias"] = totais_por_categoria(cubo)
+    return tabelas
+
+
+def filtrar_categoria(cubo: pd.DataFrame, categoria: str) -> pd.DataFrame:
+    """
+    Mantém no cubo apenas os boletos e Pix da categoria. As linhas do extrato não têm
+    categoria e são mantidas.
+    """
+    da_categoria = cubo["Categoria"].eq(categoria).fillna(False).astype(bool)
+    return cubo[(cubo["Fonte"] == "extrato") | da_categoria]
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+
+# === Log de alterações das tabelas de configuração ===
+# Cada tabela (ex.: categorias_pix.csv) é um snapshot em CSV mais um log só de acréscimos
+# com as alterações feitas depois dele (categorias_pix.alteracoes.jsonl), uma por linha em
+# JSON. Salvar uma edição grava só as linhas alteradas; a tabela atual é o snapshot com o
+# log aplicado em ordem. Quando o log cresce, ele é compactado em um snapshot novo.
+#
+# A primeira linha do log traz o hash do snapshot sobre o qual ele foi escrito. Se o
+# snapshot mudar (compactação interrompida antes de zerar o log, ou CSV editado à mão),
+# o log antigo é ignorado em vez de ser aplicado duas vezes.
+#
+# Salvar não relê a tabela: o estado do log (quantas alterações tem e o mtime/tamanho do
+# snapshot e do log quando foi escrito) fica em categorias_pix.alteracoes.estado.json. Se
+# o snapshot ou o log mudaram por fora (escrita interrompida, edição à mão), o estado é
+# refeito lendo o log, como antes.
+#
+# Tipos de alteração:
+#   {"tipo": "categorias", "chave": coluna, "linhas": [{coluna: nome, "Categoria": ...}]}
+#       define a categoria de cada nome (comparado com `categorias.normalizar_chave`);
+#   {"tipo": "editor", "editadas": {...}, "adicionadas": [...], "removidas": [...]}
+#       edições de um st.data_editor, por posição, aplicadas como o Streamlit as aplica.
+
+# Alterações acumuladas no log antes de compactar
+LIMITE_ALTERACOES = 100
+
+
+def caminho_log(caminho: str) -> str:
+    return os.path.splitext(caminho)[0] + ".alteracoes.jsonl"
+
+
+def caminho_estado(caminho: str) -> str:
+    return os.path.splitext(caminho)[0] + ".alteracoes.estado.json"
+
+
+def hash_snapshot(caminho: str) -> str:
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def anexar_linha(caminho: str, texto: str):
+    """
+    Acrescenta uma linha ao arquivo com uma única escrita em modo append, seguida de fsync.
+    Se uma escrita anterior foi interrompida no meio, a linha incompleta é isolada por uma
+    quebra de linha (e ignorada na leitura) em vez de se juntar à nova.
+    """
+    if not texto.endswith("\n"):
+        texto += "\n"
+    fd = os.open(caminho, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        tamanho = os.fstat(fd).st_size
+        if tamanho and os.pread(fd, 1, tamanho - 1) != b"\n":
+            texto = "\n" + texto
+        os.write(fd, texto.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _substituir(caminho: str, escrever):
+    # Escreve em um temporário e troca de uma vez (os.replace é atômico)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    escrever(temporario)
+    os.replace(temporario, caminho)
+
+
+def _json(dados: dict) -> str:
+    return json.dumps(dados, ensure_ascii=False, default=str) + "\n"
+
+
+def _novo_log(caminho: str, alteracoes: list):
+    # Cabeçalho com o hash do snapshot atual, seguido das alterações
+    texto = _json({"base": hash_snapshot(caminho)}) + "".join(_json(a) for a in alteracoes)
+
+    def escrever(destino):
+        with open(destino, "w", encoding="utf-8") as f:
+            f.write(texto)
+    _substituir(caminho_log(caminho), escrever)
+    _salvar_estado(caminho, len(alteracoes))
+
+
+def _versao_arquivo(caminho: str):
+    if not os.path.exists(caminho):
+        return None
+    info = os.stat(caminho)
+    return [info.st_mtime_ns, info.st_size]
+
+
+def _salvar_estado(caminho: str, alteracoes: int):
+    estado = {"alteracoes": alteracoes, "snapshot": _versao_arquivo(caminho),
+              "log": _versao_arquivo(caminho_log(caminho))}
+
+    def escrever(destino):
+        with open(destino, "w", encoding="utf-8") as f:
+            json.dump(estado, f)
+    _substituir(caminho_estado(caminho), escrever)
+
+
+def _alteracoes_no_log(caminho: str):
+    """
+    Quantidade de alterações no log escrito sobre o snapshot atual, ou None se não há log
+    em dia. Vem do arquivo de estado (só dois stat); se ele não confere com o snapshot e o
+    log atuais, o log é lido e o snapshot, verificado pelo hash.
+    """
+    try:
+        with open(caminho_estado(caminho), "r", encoding="utf-8") as f:
+            estado = json.load(f)
+        if estado["snapshot"] == _versao_arquivo(caminho) and estado["log"] == _versao_arquivo(caminho_log(caminho)):
+            return estado["alteracoes"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return len(ler_alteracoes(caminho)) if _log_em_dia(caminho) else None
+
+
+def ler_alteracoes(caminho: str) -> list:
+    """
+    Alterações registradas sobre o snapshot atual de `caminho`, em ordem. Linhas
+    incompletas (escrita interrompida) são ignoradas.
+    """
+    log = caminho_log(caminho)
+    if not os.path.exists(log):
+        return []
+    with open(log, "r", encoding="utf-8") as f:
+        linhas = f.read().split("\n")
+
+    alteracoes = []
+    for linha in linhas:
+        try:
+            alteracoes.append(json.loads(linha))
+        except json.JSONDecodeError:
+            continue
+    if not alteracoes or alteracoes[0].get("base") != hash_snapshot(caminho):
+        return []
+    return alteracoes[1:]
+
+
+def aplicar(df: pd.DataFrame, alteracao: dict) -> pd.DataFrame:
+    """
+    Aplica uma alteração do log à tabela e devolve a tabela nova.
+    """
+    if alteracao["tipo"] == "categorias":
+        from utils.categorias import normalizar_chave
+
+        coluna = alteracao["chave"]
+        df = df.copy()
+        if coluna not in df.columns:
+            df[coluna] = pd.Series(dtype=object)
+        chaves = normalizar_chave(df[coluna])
+        novas = []
+        for linha in alteracao["linhas"]:
+            chave = normalizar_chave(pd.Series([linha[coluna]])).iloc[0]
+            existentes = chaves == chave
+            if existentes.any():
+                df.loc[existentes, "Categoria"] = linha["Categoria"]
+            else:
+                novas.append(linha)
+        return pd.concat([df, pd.DataFrame(novas)], ignore_index=True) if novas else df
+
+    if alteracao["tipo"] == "editor":
+        df = df.reset_index(drop=True)
+        for posicao, valores in alteracao.get("editadas", {}).items():
+            for coluna, valor in valores.items():
+                df.loc[int(posicao), coluna] = valor
+        df = df.drop(index=[int(p) for p in alteracao.get("removidas", [])])
+        adicionadas = pd.DataFrame(alteracao.get("adicionadas", []), columns=df.columns)
+        return pd.concat([df, adicionadas], ignore_index=True) if len(adicionadas) else df.reset_index(drop=True)
+
+    raise ValueError(f"Tipo de alteração desconhecido: {alteracao['tipo']}")
+
+
+def ler_tabela(caminho: str) -> pd.DataFrame:
+    """
+    Tabela atual: o snapshot CSV com as alterações do log aplicadas.
+    """
+    df = pd.read_csv(caminho)
+    for alteracao in ler_alteracoes(caminho):
+        df = aplicar(df, alteracao)
+    return df
+
+
+def registrar(caminho: str, alteracao: dict):
+    """
+    Acrescenta uma alteração ao log da tabela. O custo é o da alteração, não o da tabela
+    nem o do log: o snapshot não é lido e o log só recebe a linha nova. Passando de
+    LIMITE_ALTERACOES, o log é compactado.
+    """
+    alteracoes = _alteracoes_no_log(caminho)
+    if alteracoes is None:
+        # Sem log escrito sobre o snapshot atual: começa um novo
+        _novo_log(caminho, [alteracao])
+        alteracoes = 1
+    else:
+        anexar_linha(caminho_log(caminho), _json(alteracao))
+        alteracoes += 1
+        _salvar_estado(caminho, alteracoes)
+
+    if alteracoes >= LIMITE_ALTERACOES:
+        compactar(caminho)
+
+
+def _log_em_dia(caminho: str) -> bool:
+    # Log escrito sobre o snapshot atual (ainda que sem alterações, logo depois de compactar)
+    log = caminho_log(caminho)
+    if not os.path.exists(log):
+        return False
+    with open(log, "r", encoding="utf-8") as f:
+        try:
+            return json.loads(f.readline()).get("base") == hash_snapshot(caminho)
+        except json.JSONDecodeError:
+            return False
+
+
+def compactar(caminho: str):
+    """
+    Grava a tabela atual como snapshot novo e recomeça o log sobre ele.
+    """
+    df = ler_tabela(caminho)
+    _substituir(caminho, lambda destino: df.to_csv(destino, index=False))
+    _novo_log(caminho, [])
@@ -0,0 +1,367 @@
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from utils import duplicatas
+from utils.ingestao import FONTES, parse_arquivos
+from utils.moeda import para_centavos, reais_para_centavos
+
+# Base normalizada: um dataset Parquet por fonte, particionado por mês (Mes=AAAA-MM)
+DIRETORIO_BASE = "app/data/parquet"
+
+# Versão do formato dos fragmentos, registrada no manifesto para cada arquivo importado.
+# Arquivos importados com outra versão são importados de novo na próxima sincronização.
+#   2: Valor em centavos (int64)
+#   3: linhas já importadas de outro arquivo são descartadas (utils.duplicatas)
+#   4: nome do fragmento inclui o hash do caminho do arquivo de origem (ver `nome_fragmento`)
+VERSAO_ESQUEMA = 4
+
+NOMES_MESES = [
+    "Janeiro", "Fevereiro", "Marco", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+]
+
+
+def rotulo_mes(mes: str) -> str:
+    """
+    Converte 'AAAA-MM' no rótulo exibido no dashboard (ex.: '2025-04' -> 'Abril 2025').
+    """
+    ano, numero = mes.split("-")
+    return f"{NOMES_MESES[int(numero) - 1]} {ano}"
+
+
+def _limpar_espacos(serie: pd.Series) -> pd.Series:
+    return serie.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def tipar_extrato(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica os tipos da base ao resultado de `parse_extrato_bancario`.
+    """
+    return pd.DataFrame({
+        "Data": pd.to_datetime(df["Data"]),
+        "Descricao": df["Descricao"].astype(str),
+        "Documento": df["Documento"].astype(str),
+        "Valor": df["Valor"].astype("int64"),
+    })
+
+
+def tipar_boleto(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica os tipos da base ao resultado de `parse_recibos_banrisul`.
+    """
+    return pd.DataFrame({
+        "Data": pd.to_datetime(df["Data"], format="%d/%m/%Y"),
+        "NSU": df["NSU"].astype(str),
+        "Situação": df["Situação"].astype("category"),
+        "Valor": df["Valor"].astype("int64"),
+        "Operação": df["Operação"].astype("category"),
+        "Conta": df["Conta"].astype(str),
+        "Complemento": df["Complemento"],
+    })
+
+
+def tipar_pix(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica os tipos da base ao CSV de Pix (gerado por `teste2.get_csv`).
+
+    Operação e Situação têm as quebras de linha removidas e viram categóricas; o valor
+    'R$ 1.234,56' é convertido para centavos. Pagador/Recebedor e CPF/CNPJ são mantidos como
+    no CSV, pois são a chave do mapeamento de categorias.
+
+    O Parquet do `conversor_pix` já vem tipado e passa sem alterações (os gerados antes dos
+    centavos, com o Valor em reais, são convertidos).
+    """
+    if pd.api.types.is_integer_dtype(df["Valor"]):
+        valor = df["Valor"].astype("int64")
+    elif pd.api.types.is_numeric_dtype(df["Valor"]):
+        valor = reais_para_centavos(df["Valor"])
+    else:
+        valor = para_centavos(df["Valor"]).astype("int64")
+
+    return pd.DataFrame({
+        "Operação": _limpar_espacos(df["Operação"]).astype("category"),
+        "Situação": _limpar_espacos(df["Situação"]).astype("category"),
+        "Pagador/Recebedor": df["Pagador/Recebedor"],
+        "CPF/CNPJ": df["CPF/CNPJ"],
+        "Data": pd.to_datetime(df["Data"], format="%d/%m/%Y"),
+        "Valor": valor,
+    })
+
+
+TIPAGEM_POR_FONTE = {
+    "extrato": tipar_extrato,
+    "boleto": tipar_boleto,
+    "pix": tipar_pix,
+}
+
+# === Esquema compacto dos DataFrames carregados ===
+# Textos com poucos valores distintos (descrições, situações, nomes e documentos que se
+# repetem todo mês) viram categóricos; identificadores únicos viram strings do Arrow.
+# Valor fica em centavos (int64, ver utils.moeda): somas exatas e 8 bytes por linha.
+
+ESQUEMAS = {
+    "extrato": {
+        "Data": "datetime64[ns]", "Descricao": "category", "Documento": "string[pyarrow]",
+        "Valor": "int64",
+    },
+    "boleto": {
+        "Data": "datetime64[ns]", "NSU": "string[pyarrow]", "Situação": "category",
+        "Valor": "int64", "Operação": "category", "Conta": "category", "Complemento": "category",
+    },
+    "pix": {
+        "Operação": "category", "Situação": "category", "Pagador/Recebedor": "category",
+        "CPF/CNPJ": "category", "Data": "datetime64[ns]", "Valor": "int64",
+    },
+    "agregados": {
+        "Fonte": "category", "Tipo": "category", "Categoria": "category", "Contraparte": "category",
+        "Valor": "int64", "Quantidade": "int32",
+    },
+}
+
+
+def compactar(df: pd.DataFrame, fonte: str) -> pd.DataFrame:
+    """
+    Aplica ESQUEMAS[fonte] às colunas presentes em `df` (a coluna 'Mes' vira categórica).
+    Colunas que já estão no tipo do esquema não são convertidas de novo.
+    """
+    esquema = {**ESQUEMAS.get(fonte, {}), "Mes": "category"}
+    tipos = {coluna: tipo for coluna, tipo in esquema.items()
+             if coluna in df.columns and df[coluna].dtype != tipo}
+    return df.astype(tipos) if tipos else df
+
+
+def memoria_mb(df: pd.DataFrame) -> float:
+    """
+    Memória ocupada pelo DataFrame, contando o conteúdo das strings.
+    """
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def nome_fragmento(caminho: str) -> str:
+    """
+    Nome do fragmento Parquet que guarda as linhas de um arquivo de origem: o nome do
+    arquivo sem extensão e um hash curto do caminho, para que arquivos de mesmo nome em
+    pastas diferentes (ex.: contaA/extratos/abril25.pdf e contaB/extratos/abril25.pdf no
+    utils.lote) não gravem no mesmo fragmento.
+    """
+    resumo = hashlib.sha1(os.path.normpath(caminho).encode("utf-8")).hexdigest()[:10]
+    return f"{os.path.splitext(os.path.basename(caminho))[0]}-{resumo}"
+
+
+def gravar_fragmento(fonte: str, mes: str, nome: str, df: pd.DataFrame,
+                     diretorio: str = DIRETORIO_BASE):
+    """
+    Grava (ou substitui) as linhas de um arquivo de origem na partição do mês.
+
+    Cada arquivo de origem vira um fragmento próprio dentro de Mes=AAAA-MM, de modo que
+    importar um arquivo novo apenas acrescenta um fragmento, sem regravar o mês.
+    """
+    particao = os.path.join(diretorio, fonte, f"Mes={mes}")
+    os.makedirs(particao, exist_ok=True)
+
+    arquivo = os.path.join(particao, f"{nome}.parquet")
+    # Arquivos iniciados por '.' são ignorados pelo pyarrow ao ler o dataset. O temporário
+    # leva também a thread: as sessões do Streamlit são threads do mesmo processo.
+    temporario = os.path.join(particao, f".{nome}.parquet.{os.getpid()}.{threading.get_ident()}.tmp")
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, arquivo)
+
+
+def remover_fragmento(fonte: str, mes: str, nome: str, diretorio: str = DIRETORIO_BASE):
+    """
+    Remove o fragmento de um arquivo de origem. A partição do mês é apagada quando fica vazia.
+    """
+    particao = os.path.join(diretorio, fonte, f"Mes={mes}")
+    arquivo = os.path.join(particao, f"{nome}.parquet")
+    if os.path.exists(arquivo):
+        os.remove(arquivo)
+    if os.path.isdir(particao) and not any(n.endswith(".parquet") for n in os.listdir(particao)):
+        shutil.rmtree(particao, ignore_errors=True)
+
+
+COLUNAS_IMPORTACAO = ["Mês", "Fonte", "Arquivo", "Erro", "Linhas", "Duplicadas", "Duplicadas de"]
+
+
+def importar_arquivos(tarefas: list, diretorio: str = DIRETORIO_BASE,
+                      max_workers: int = None) -> pd.DataFrame:
+    """
+    Faz o parse de arquivos avulsos e grava um fragmento para cada um.
+
+    As linhas que já foram importadas de outro arquivo (mesma impressão digital no índice
+    de `utils.duplicatas`) não entram no fragmento. Se todas as linhas são duplicadas, o
+    arquivo não ganha fragmento.
+
+    Args:
+        tarefas (list): Tuplas (mes, fonte, caminho). Com arquivos repetindo as mesmas
+            linhas, fica com elas o que vem antes na lista.
+        diretorio (str): Raiz da base Parquet.
+        max_workers (int): Processos usados no parse (ver `parse_arquivos`).
+
+    Returns:
+        pd.DataFrame: Uma linha por tarefa, com as colunas de COLUNAS_IMPORTACAO: 'Erro'
+        quando o arquivo falhou, 'Linhas' gravadas, 'Duplicadas' descartadas e os arquivos
+        que já tinham essas linhas ('Duplicadas de').
+    """
+    resultados = {caminho: [mes, fonte, caminho, None, 0, 0, []] for mes, fonte, caminho in tarefas}
+    tipados = {fonte: [] for fonte in FONTES}
+    for mes, fonte, caminho, df, erro in parse_arquivos(tarefas, max_workers):
+        if erro is None:
+            try:
+                tipados[fonte].append((mes, caminho, TIPAGEM_POR_FONTE[fonte](df)))
+                continue
+            except Exception as e:
+                erro = str(e)
+        resultados[caminho][3] = erro
+
+    for fonte, arquivos in tipados.items():
+        if not arquivos:
+            continue
+        indice = duplicatas.carregar_indice(fonte, diretorio)
+        registros = duplicatas.registrar(indice, [(c, duplicatas.impressoes(df, fonte)) for _, c, df in arquivos])
+
+        falhas = []
+        for (mes, caminho, df), (novas, originais) in zip(arquivos, registros):
+            nome = nome_fragmento(caminho)
+            try:
+                if len(df) and not novas.any():
+                    remover_fragmento(fonte, mes, nome, diretorio)
+                else:
+                    gravar_fragmento(fonte, mes, nome, df[novas].reset_index(drop=True), diretorio)
+            except Exception as e:
+                resultados[caminho][3] = str(e)
+                falhas.append(caminho)
+                continue
+            resultados[caminho][4:] = [int(novas.sum()), int((~novas).sum()), originais]
+
+        # Arquivo que não foi gravado não fica no índice
+        duplicatas.esquecer(indice, falhas)
+        duplicatas.salvar_indice(indice, fonte, diretorio)
+
+    return pd.DataFrame(list(resultados.values()), columns=COLUNAS_IMPORTACAO)
+
+
+def meses_disponiveis(fonte: str = "extrato", diretorio: str = DIRETORIO_BASE) -> list:
+    """
+    Lista os meses ('AAAA-MM') gravados no dataset da fonte, em ordem cronológica.
+    """
+    raiz = os.path.join(diretorio, fonte)
+    if not os.path.isdir(raiz):
+        return []
+    meses = [
+        nome[len("Mes="):]
+        for nome in os.listdir(raiz)
+        if re.fullmatch(r"Mes=\d{4}-\d{2}", nome)
+    ]
+    return sorted(meses)
+
+
+def carregar(fonte: str, meses: list = None, colunas: list = None,
+             diretorio: str = DIRETORIO_BASE, compacto: bool = True) -> pd.DataFrame:
+    """
+    Lê o dataset de uma fonte.
+
+    Apenas as partições dos meses pedidos e as colunas pedidas são lidas do disco
+    (filtro de partição e projeção de colunas feitos pelo pyarrow).
+
+    Args:
+        fonte (str): 'extrato', 'boleto' ou 'pix'.
+        meses (list): Meses 'AAAA-MM' a ler. None lê todos.
+        colunas (list): Colunas a ler. None lê todas, incluindo 'Mes'.
+        diretorio (str): Raiz da base Parquet.
+        compacto (bool): Aplica o esquema compacto (ver `compactar`).
+
+    Returns:
+        pd.DataFrame: Dados ordenados por mês, com índice novo.
+    """
+    raiz = os.path.join(diretorio, fonte)
+    if not os.path.isdir(raiz):
+        raise FileNotFoundError(f"Base '{fonte}' não encontrada em {raiz}. Rode a importação primeiro.")
+
+    dataset = ds.dataset(raiz, format="parquet", partitioning="hive")
+    filtro = ds.field("Mes").isin(meses) if meses is not None else None
+    tabela = dataset.to_table(columns=colunas, filter=filtro)
+
+    df = tabela.to_pandas()
+    if "Mes" in df.columns:
+        df["Mes"] = df["Mes"].astype(str)
+        df = df.sort_values("Mes", kind="stable")
+    df = df.reset_index(drop=True)
+    return compactar(df, fonte) if compacto else df
+
+
+def relatorio_memoria(diretorio: str = DIRETORIO_BASE) -> pd.DataFrame:
+    """
+    Memória de cada fonte carregada inteira ('Todos'), sem e com o esquema compacto.
+    """
+    linhas = []
+    for fonte in list(FONTES) + ["agregados"]:
+        try:
+            antes = carregar(fonte, diretorio=diretorio, compacto=False)
+        except FileNotFoundError:
+            continue
+        depois = compactar(antes, fonte)
+        linhas.append([fonte, len(antes), memoria_mb(antes), memoria_mb(depois)])
+    relatorio = pd.DataFrame(linhas, columns=["Fonte", "Linhas", "Antes (MB)", "Depois (MB)"])
+    relatorio["Redução"] = 1 - relatorio["Depois (MB)"] / relatorio["Antes (MB)"]
+    return relatorio
+
+
+def main():
+    # Uso, a partir da raiz do repositório:
+    #   PYTHONPATH=app python -m utils.armazenamento importar
+    #   PYTHONPATH=app python -m utils.armazenamento importar --mes 2025-05 --extrato ... --boleto ... --pix ...
+    #   PYTHONPATH=app python -m utils.armazenamento memoria
+    parser = argparse.ArgumentParser(description="Importa extratos, boletos e pix para a base Parquet.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    importar = sub.add_parser("importar", help="Importa os arquivos novos de app/data (com --mes, copia antes os arquivos do mês para lá)")
+    importar.add_argument("--mes", help="Mês no formato AAAA-MM")
+    importar.add_argument("--extrato", help="PDF do extrato do mês")
+    importar.add_argument("--boleto", help="PDF de recibos/boletos do mês")
+    importar.add_argument("--pix", help="CSV ou Parquet de Pix do mês")
+    importar.add_argument("--workers", type=int, default=None, help="Processos usados no parse")
+    importar.add_argument("--diretorio", default=DIRETORIO_BASE)
+
+    memoria = sub.add_parser("memoria", help="Mostra a memória das fontes carregadas, sem e com o esquema compacto")
+    memoria.add_argument("--diretorio", default=DIRETORIO_BASE)
+
+    args = parser.parse_args()
+
+    if args.comando == "memoria":
+        relatorio = relatorio_memoria(args.diretorio)
+        for _, linha in relatorio.iterrows():
+            print(f"{linha['Fonte']:<10} {linha['Linhas']:>7} linhas  {linha['Antes (MB)']:>8.3f} MB -> "
+                  f"{linha['Depois (MB)']:>8.3f} MB  (-{linha['Redução']:.0%})")
+        return
+
+    from utils.manifesto import destino_na_origem, imprimir_relatorio, sincronizar
+
+    if args.mes:
+        # Os arquivos do mês vão para as pastas de app/data e entram pela sincronização, como
+        # os do Dashboard: o manifesto e o cubo de agregados ficam atualizados
+        arquivos = [(fonte, caminho) for fonte, caminho in zip(FONTES, [args.extrato, args.boleto, args.pix]) if caminho]
+        if not arquivos:
+            parser.error("--mes exige ao menos um de --extrato, --boleto ou --pix")
+        try:
+            copias = [(caminho, destino_na_origem(fonte, caminho, args.mes)) for fonte, caminho in arquivos]
+        except ValueError as e:
+            parser.error(str(e))
+        for caminho, destino in copias:
+            if destino != caminho:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                shutil.copy2(caminho, destino)
+                print(f"✔ {caminho} copiado para {destino}")
+
+    # Importa de forma incremental o que mudou em app/data
+    imprimir_relatorio(sincronizar(diretorio=args.diretorio, max_workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+import argparse
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from utils import extracao, extrato_parse
+from utils.instrumentacao import etapa, finalizar_execucao, iniciar_execucao
+
+try:
+    import resource
+except ImportError:  # Windows: sem pico de RSS
+    resource = None
+
+# Parser -> (diretório das amostras, extensão)
+AMOSTRAS_POR_PARSER = {
+    "parse_extrato_bancario": ("app/data/extratos", ".pdf"),
+    "parse_recibos_banrisul": ("app/data/boletos", ".pdf"),
+    "parse_pix_extrato_fitz": ("app/data/pix", ".pdf"),
+    "parse_pix_extrato_pdfplumber": ("app/data/pix", ".pdf"),
+    "extrair_tabela_pix": ("app/data/pix", ".pdf"),
+}
+
+DIRETORIO_RESULTADOS = "app/data/benchmark"
+
+FASES = ["extracao", "regex", "dataframe", "outros"]
+
+
+# === Medição por fase ===
+# As fases vêm das etapas de utils.instrumentacao, já marcadas nos parsers. O tempo de
+# cada fase é exclusivo; o que não cai em nenhuma fase vai para 'outros'.
+
+
+def _pico_rss_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _medir(parser_nome: str, caminho: str, repeticoes: int, backend: str = None) -> dict:
+    """
+    Executa o parser `repeticoes` vezes sobre um arquivo. Roda em um processo novo para
+    cada arquivo, de modo que o pico de RSS seja o desse parse.
+
+    O cache de texto das páginas é limpo antes de cada repetição, para que todas
+    incluam a extração. backend=None usa o backend padrão do parser.
+    """
+    # Os PDFs do banco não têm CropBox, o que faz o pdfminer avisar a cada página
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+
+    import fitz  # PyMuPDF
+
+    parser = getattr(extrato_parse, parser_nome)
+    with fitz.open(caminho) as doc:
+        paginas = doc.page_count
+
+    rss_inicial = _pico_rss_mb()
+
+    tempos = []
+    fases = {fase: [] for fase in FASES}
+    linhas = 0
+    # extrair_tabela_pix lê as coordenadas das palavras direto do PyMuPDF e não tem backend
+    argumentos = {"backend": backend} if backend and "backend" in inspect.signature(parser).parameters else {}
+    for _ in range(repeticoes):
+        extracao.limpar_cache_textos()
+        iniciar_execucao(parser_nome)
+        inicio = time.perf_counter()
+        with etapa("outros"):
+            df = parser(caminho, **argumentos)
+        tempo = time.perf_counter() - inicio
+        etapas = finalizar_execucao(registrar=False)["etapas"]
+
+        tempos.append(tempo)
+        for fase in FASES:
+            fases[fase].append(etapas.get(fase, {}).get("segundos", 0.0))
+        linhas = len(df)
+
+    pico = _pico_rss_mb()
+    mediana = statistics.median(tempos)
+    return {
+        "parser": parser_nome,
+        "backend": backend,
+        "arquivo": caminho,
+        "paginas": paginas,
+        "linhas": linhas,
+        "tempo_min_s": round(min(tempos), 6),
+        "tempo_mediana_s": round(mediana, 6),
+        "linhas_por_s": round(linhas / mediana, 1) if mediana else None,
+        "fases_s": {fase: round(statistics.median(valores), 6) for fase, valores in fases.items()},
+        "pico_rss_mb": round(pico, 1) if pico is not None else None,
+        "acrescimo_rss_mb": round(pico - rss_inicial, 1) if pico is not None else None,
+    }
+
+
+def _medir_em_processo(parser_nome: str, caminho: str, repeticoes: int, backend: str = None) -> dict:
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+        return pool.submit(_medir, parser_nome, caminho, repeticoes, backend).result()
+
+
+# === Documentos de entrada ===
+
+def listar_amostras(parser_nome: str) -> list:
+    pasta, extensao = AMOSTRAS_POR_PARSER[parser_nome]
+    if not os.path.isdir(pasta):
+        return []
+    return sorted(os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.lower().endswith(extensao))
+
+
+def gerar_documento_escalado(origem: str, fator: int, diretorio: str) -> str:
+    """
+    Gera um PDF com as páginas de `origem` repetidas `fator` vezes.
+    """
+    nome = os.path.splitext(os.path.basename(origem))[0]
+    destino = os.path.join(diretorio, f"{nome}-{fator}x.pdf")
+    if os.path.exists(destino):
+        return destino
+
+    import fitz  # PyMuPDF
+
+    with fitz.open(origem) as fonte, fitz.open() as doc:
+        for _ in range(fator):
+            doc.insert_pdf(fonte)
+        doc.save(destino)
+    return destino
+
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return saida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(parsers: list = None, escalas: list = (1, 10), repeticoes: int = 3,
+             backends: list = None) -> dict:
+    """
+    Roda o benchmark dos parsers.
+
+    Na escala 1 cada parser é medido em todas as amostras de app/data. Nas escalas maiores
+    é usada a maior amostra de cada parser, com as páginas repetidas `escala` vezes.
+    Com `backends`, cada medição é repetida com cada backend de extração (None = padrão
+    do parser).
+
+    Returns:
+        dict: {'commit', 'data', 'python', 'plataforma', 'repeticoes', 'resultados'}; cada
+        resultado traz tempo, linhas/s, pico de RSS e tempo por fase (extracao, regex,
+        dataframe, outros).
+    """
+    parsers = parsers or list(AMOSTRAS_POR_PARSER)
+    backends = backends or [None]
+    resultados = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        for parser_nome in parsers:
+            amostras = listar_amostras(parser_nome)
+            if not amostras:
+                continue
+            maior = max(amostras, key=os.path.getsize)
+
+            for escala in escalas:
+                arquivos = amostras if escala == 1 else [gerar_documento_escalado(maior, escala, temporario)]
+                for caminho in arquivos:
+                    for backend in backends:
+                        resultado = _medir_em_processo(parser_nome, caminho, repeticoes, backend)
+                        resultado["escala"] = escala
+                        if escala != 1:
+                            resultado["arquivo"] = f"{maior} x{escala}"
+                        resultados.append(resultado)
+                        _imprimir_resultado(resultado)
+
+    return {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def _imprimir_resultado(r: dict):
+    fases = " ".join(f"{fase}={r['fases_s'][fase]:.3f}" for fase in FASES)
+    rss = f"{r['pico_rss_mb']:.0f}MB" if r["pico_rss_mb"] is not None else "-"
+    print(f"{r['parser']:<30} {r['backend'] or '':<10} {r['arquivo']:<40} {r['paginas']:>5}p {r['linhas']:>7} linhas "
+          f"{r['tempo_mediana_s']:>8.3f}s {r['linhas_por_s'] or 0:>10.0f} linhas/s  RSS {rss:>6}  {fases}")
+
+
+def comparar(antes: dict, depois: dict):
+    """
+    Imprime a variação do tempo mediano entre duas execuções salvas em JSON.
+    """
+    chave = lambda r: (r["parser"], r.get("backend"), r["arquivo"])
+    anteriores = {chave(r): r for r in antes["resultados"]}
+    print(f"{antes.get('commit')} -> {depois.get('commit')}")
+    for r in depois["resultados"]:
+        anterior = anteriores.get(chave(r))
+        if anterior is None:
+            continue
+        razao = r["tempo_mediana_s"] / anterior["tempo_mediana_s"] if anterior["tempo_mediana_s"] else float("nan")
+        print(f"{r['parser']:<30} {r['arquivo']:<40} {anterior['tempo_mediana_s']:>8.3f}s -> "
+              f"{r['tempo_mediana_s']:>8.3f}s ({razao:.2f}x)")
+
+
+# === Inicialização do app ===
+# Tempo até o primeiro render do app.py em um processo novo (como o primeiro acesso depois de
+# subir o Streamlit: caches vazios, base Parquet já importada), com o custo de importação de
+# cada módulo medido por `python -X importtime`. Os backends de PDF só devem ser importados
+# quando um arquivo é de fato lido (import dentro das funções de utils.extracao e dos
+# parsers), nunca no primeiro render.
+
+ARQUIVO_APP = "app/app.py"
+
+MODULOS_ADIADOS = ["fitz", "pymupdf", "pdfplumber", "pdfminer", "pypdfium2"]
+
+# Executado no processo filho: roda o app uma vez com o AppTest do Streamlit
+_SCRIPT_INICIALIZACAO = """
+import json, os, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+app.run()
+print(json.dumps({
+    "tempo_s": time.perf_counter() - inicio,
+    "excecoes": [e.message for e in app.exception],
+    "adiados": sorted({m.split(".")[0] for m in sys.modules} & set(sys.argv[2:])),
+}))
+sys.stdout.flush()
+# Não espera o pré-carregamento em segundo plano terminar
+os._exit(0)
+"""
+
+
+def _ler_importtime(saida_erro: str) -> dict:
+    """
+    Tempo cumulativo (s) de cada import de primeiro nível na saída de `-X importtime`.
+    """
+    tempos = {}
+    for linha in saida_erro.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue  # cabeçalho
+        nome = partes[2].rstrip()
+        if not nome.startswith(" ") or nome[1:].startswith(" "):
+            continue  # import aninhado: já está no cumulativo do pai
+        tempos[nome.strip()] = tempos.get(nome.strip(), 0) + int(partes[1]) / 1e6
+    return tempos
+
+
+def medir_inicializacao(repeticoes: int = 3, arquivo: str = ARQUIVO_APP, mais_lentos: int = 10) -> dict:
+    """
+    Roda o primeiro render de `arquivo` em `repeticoes` processos novos.
+
+    Returns:
+        dict: Resultado no formato de `executar` ('parser' = 'inicializacao'), com o tempo
+        até o primeiro render, o tempo total de importação, os módulos mais lentos de
+        importar e os backends de PDF que foram importados (deve ser vazio).
+    """
+    tempos, importacao, adiados, excecoes = [], [], set(), []
+    por_modulo = Counter()
+    for _ in range(repeticoes):
+        processo = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _SCRIPT_INICIALIZACAO, arquivo, *MODULOS_ADIADOS],
+            capture_output=True, text=True, check=True,
+        )
+        medida = json.loads(processo.stdout.strip().splitlines()[-1])
+        modulos = _ler_importtime(processo.stderr)
+        tempos.append(medida["tempo_s"])
+        importacao.append(sum(modulos.values()))
+        adiados.update(medida["adiados"])
+        excecoes.extend(medida["excecoes"])
+        por_modulo.update({nome: t / repeticoes for nome, t in modulos.items()})
+
+    tempo = statistics.median(tempos)
+    resultado = {
+        "parser": "inicializacao",
+        "backend": None,
+        "arquivo": arquivo,
+        "tempo_mediana_s": tempo,
+        "tempos_s": tempos,
+        "importacao_mediana_s": statistics.median(importacao),
+        "modulos_mais_lentos": [{"modulo": m, "tempo_s": round(t, 4)} for m, t in por_modulo.most_common(mais_lentos)],
+        "modulos_adiados_importados": sorted(adiados),
+        "excecoes": excecoes,
+    }
+    return {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": repeticoes,
+        "resultados": [resultado],
+    }
+
+
+def _imprimir_inicializacao(r: dict) -> bool:
+    print(f"Primeiro render de {r['arquivo']}: {r['tempo_mediana_s']:.3f}s "
+          f"(importações: {r['importacao_mediana_s']:.3f}s)")
+    for m in r["modulos_mais_lentos"]:
+        print(f"  {m['modulo']:<40} {m['tempo_s']:>8.3f}s")
+    ok = not r["modulos_adiados_importados"] and not r["excecoes"]
+    if r["modulos_adiados_importados"]:
+        print(f"✖ Backends de PDF importados no primeiro render: {', '.join(r['modulos_adiados_importados'])}")
+    for mensagem in r["excecoes"]:
+        print(f"✖ Exceção no app: {mensagem}")
+    return ok
+
+
+# === Verificação da leitura página a página ===
+# O parser Pix em streaming (`iterar_pix_paginas`) deve encontrar os mesmos registros que a
+# regex aplicada ao texto inteiro, como fazia o `parse_pix_extrato_fitz` original, inclusive
+# quando a quebra de página corta um registro em qualquer ponto.
+
+# Registros Pix sintéticos: CPF e CNPJ, nomes de várias palavras e um CNPJ quebrado, cujo
+# nome engole o registro seguinte (ver `_matches_por_pagina`).
+REGISTROS_PIX_SINTETICOS = [
+    "Pix Recebido Efetivado de MARIA DA SILVA 123.456.789-01 02/01/2025 R$ 1.234,56",
+    "Pix Enviado Efetivado para COMERCIO DE ALIMENTOS LTDA 12.345.678/0001-90 03/01/2025 R$ 10,00",
+    "Pix Recebido Efetivado de EMPRESA QUEBRADA LTDA 55.333.171/0001- 24 04/01/2025 R$ 39,68",
+    "Pix Recebido Efetivado de JOAO 987.654.321-00 05/01/2025 R$ 0,01",
+    "Pix Enviado Efetivado para ABC 123.456.789/0001-00 06/01/2025 R$ 100.000,00",
+]
+
+
+def _centavos_linha(valor: str) -> int:
+    # `_valor_to_float_corrigido` original, com Decimal no lugar de float
+    valor = valor.replace(".", "").replace(",", ".")
+    if valor.endswith("-"):
+        valor = "-" + valor[:-1]
+    return int(Decimal(valor) * 100)
+
+
+def _registros_texto_inteiro(paginas: list) -> list:
+    # `parse_pix_extrato_fitz` original: páginas unidas, espaços normalizados, um findall
+    texto = re.sub(r"\s+", " ", "\n".join(paginas))
+    return [
+        (tipo, pessoa.strip(), documento.strip(), data, _centavos_linha(valor))
+        for tipo, pessoa, documento, data, valor in extrato_parse.PADRAO_PIX_FITZ.findall(texto)
+    ]
+
+
+def _registros_por_pagina(paginas: list, linhas_por_lote: int = extrato_parse.LINHAS_POR_LOTE) -> list:
+    df = pd.concat(extrato_parse.iterar_pix_paginas(paginas, linhas_por_lote))
+    return list(zip(df["Tipo"], df["Pessoa"], df["CPF/CNPJ"], df["Data"], df["Valor"]))
+
+
+def verificar_paginas() -> bool:
+    """
+    Compara `iterar_pix_paginas` com a regex no texto inteiro:
+    - sintético: os registros de `REGISTROS_PIX_SINTETICOS`, com a quebra de página em cada
+      espaço do texto, devem dar a mesma saída, com lotes de 1 linha e com o lote padrão;
+    - amostras de app/data/pix: a saída deve ter o mesmo número de linhas, e só podem
+      diferir as linhas cujo nome contém 'Pix', de um CPF/CNPJ quebrado cujo match passa
+      de uma página (diferença documentada em `_matches_por_pagina`).
+
+    Returns:
+        bool: True quando as duas verificações passam.
+    """
+    ok = True
+
+    texto = " ".join(REGISTROS_PIX_SINTETICOS)
+    esperado = _registros_texto_inteiro([texto])
+    cortes = [i for i, c in enumerate(texto) if c == " "]
+    print("Registros sintéticos cortados entre páginas:")
+    for tamanho in (extrato_parse.LINHAS_POR_LOTE, 1):
+        divergentes = [
+            i for i in cortes
+            if _registros_por_pagina([texto[:i], texto[i + 1:]], tamanho) != esperado
+        ]
+        ok &= not divergentes
+        print(f"  {'✔' if not divergentes else '✖'} lote {tamanho:>5}: {len(cortes)} posições de quebra, "
+              f"{len(esperado)} registros, {len(divergentes)} divergentes")
+
+    print("Igualdade com o texto inteiro (parse_pix_extrato_fitz):")
+    for caminho in listar_amostras("parse_pix_extrato_fitz"):
+        paginas = list(extracao.textos_paginas(caminho, extracao.BACKEND_PADRAO))
+        inteiro = _registros_texto_inteiro(paginas)
+        por_pagina = _registros_por_pagina(paginas)
+        diferentes = [(a, b) for a, b in zip(inteiro, por_pagina) if a != b]
+        esperados = all(re.search(r"\bPix\b", a[1]) and re.search(r"\bPix\b", b[1]) for a, b in diferentes)
+        certo = len(inteiro) == len(por_pagina) and esperados
+        ok &= certo
+        print(f"  {'✔' if certo else '✖'} {caminho:<40} {len(por_pagina):>5} linhas, "
+              f"{len(diferentes)} diferentes (CPF/CNPJ quebrado), {len(paginas)} páginas")
+    return ok
+
+
+def main():
+    # Uso, a partir da raiz do repositório:
+    #   PYTHONPATH=app python -m utils.benchmark executar --escalas 1,10,100
+    #   PYTHONPATH=app python -m utils.benchmark executar --parsers parse_pix_extrato_fitz --backends pymupdf pypdfium2
+    #   PYTHONPATH=app python -m utils.benchmark comparar app/data/benchmark/a.json app/data/benchmark/b.json
+    #   PYTHONPATH=app python -m utils.benchmark verificar-paginas
+    #   PYTHONPATH=app python -m utils.benchmark inicializacao --repeticoes 5
+    parser = argparse.ArgumentParser(description="Benchmark dos parsers de extrato, boletos e Pix.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    executar_cmd = sub.add_parser("executar", help="Mede os parsers e salva o resultado em JSON")
+    executar_cmd.add_argument("--parsers", nargs="+", choices=list(AMOSTRAS_POR_PARSER))
+    executar_cmd.add_argument("--escalas", default="1,10", help="Fatores de repetição das páginas (ex.: 1,10,100)")
+    executar_cmd.add_argument("--repeticoes", type=int, default=3)
+    executar_cmd.add_argument("--backends", nargs="+", choices=list(extracao.BACKENDS),
+                              help="Backends de extração a comparar (padrão: o de cada parser)")
+    executar_cmd.add_argument("--saida", help=f"Arquivo JSON (padrão: {DIRETORIO_RESULTADOS}/<commit>.json)")
+
+    comparar_cmd = sub.add_parser("comparar", help="Compara dois resultados salvos")
+    comparar_cmd.add_argument("antes")
+    comparar_cmd.add_argument("depois")
+
+    sub.add_parser("verificar-paginas", help="Compara o parser Pix página a página com o texto inteiro")
+
+    inicializacao_cmd = sub.add_parser("inicializacao", help="Mede o tempo até o primeiro render do app.py")
+    inicializacao_cmd.add_argument("--repeticoes", type=int, default=3, help="Processos novos medidos")
+    inicializacao_cmd.add_argument("--saida", help=f"Arquivo JSON (padrão: {DIRETORIO_RESULTADOS}/inicializacao-<commit>.json)")
+
+    args = parser.parse_args()
+
+    if args.comando == "verificar-paginas":
+        sys.exit(0 if verificar_paginas() else 1)
+
+    if args.comando == "comparar":
+        with open(args.antes, encoding="utf-8") as a, open(args.depois, encoding="utf-8") as b:
+            comparar(json.load(a), json.load(b))
+        return
+
+    if args.comando == "inicializacao":
+        resultado = medir_inicializacao(args.repeticoes)
+        ok = _imprimir_inicializacao(resultado["resultados"][0])
+        nome = f"inicializacao-{resultado['commit'] or 'resultado'}.json"
+    else:
+        escalas = [int(e) for e in args.escalas.split(",")]
+        resultado = executar(args.parsers, escalas, args.repeticoes, args.backends)
+        ok = True
+        nome = f"{resultado['commit'] or 'resultado'}.json"
+
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, nome)
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"✔ Resultado salvo em {saida}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
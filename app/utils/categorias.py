@@ -0,0 +1,226 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.alteracoes import caminho_log, ler_tabela, registrar
+
+CAMINHO_CATEGORIAS_PIX = 'app/data/configuracoes/categorias_pix.csv'
+CAMINHO_CATEGORIAS_BOLETOS = 'app/data/configuracoes/categorias_boletos.csv'
+
+# Regras de fallback: Fonte (pix, boleto ou *), Tipo (prefixo, regex ou cnpj), Padrao, Categoria.
+# Valem só para quem não está no mapeamento; em caso de conflito vence a primeira regra do arquivo.
+CAMINHO_REGRAS = 'app/data/configuracoes/regras_categorias.csv'
+
+# Separa o nome do documento na chave combinada avaliada pelas regras
+_SEPARADOR = "\x1f"
+
+_cache = {}
+
+
+def limpar_prefixo(nomes: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de `remove_prefix`: remove 'de'/'para' do início do Pagador/Recebedor
+    do Pix e aplica title(). Nomes sem prefixo ficam como estão.
+
+    Numa Series categórica só os nomes distintos são limpos e o resultado continua categórico.
+    """
+    if isinstance(nomes.dtype, pd.CategoricalDtype):
+        limpas = limpar_prefixo(pd.Series(nomes.cat.categories, dtype=object)).to_numpy()
+        codigos = nomes.cat.codes.to_numpy()
+        valores = np.where(codigos >= 0, limpas[codigos], None)
+        return pd.Series(valores, index=nomes.index, dtype="category")
+
+    nomes = nomes.astype(object)
+    limpos = nomes.copy()
+
+    de = nomes.str.startswith('de').fillna(False).astype(bool)
+    para = nomes.str.startswith('para').fillna(False).astype(bool) & ~de
+
+    limpos[de] = nomes[de].str.replace('de', '', regex=False).str.strip().str.title()
+    limpos[para] = nomes[para].str.replace('para', '', regex=False).str.strip().str.title()
+    return limpos
+
+
+def normalizar_chave(nomes: pd.Series) -> pd.Series:
+    """
+    Chave usada para casar nomes com o mapeamento: espaços e quebras de linha colapsados
+    e sem diferença entre maiúsculas e minúsculas.
+    """
+    return (
+        nomes.astype(object).fillna("")
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+        .str.casefold()
+    )
+
+
+def _somente_digitos(documentos: pd.Series) -> pd.Series:
+    return documentos.astype(object).fillna("").str.replace(r"\D", "", regex=True)
+
+
+def _compilar_regras(regras: pd.DataFrame):
+    """
+    Junta todas as regras em uma única regex ancorada, com um grupo nomeado por regra,
+    avaliada sobre a chave combinada 'nome normalizado' + separador + 'dígitos do documento'.
+
+    Como todas as alternativas começam no início da chave, a ordem das regras define a
+    prioridade: a primeira que casar vence.
+    """
+    alternativas = []
+    categorias = []
+    for i, regra in enumerate(regras.itertuples(index=False)):
+        tipo = str(regra.Tipo).strip().lower()
+        padrao = str(regra.Padrao)
+        if tipo == "prefixo":
+            corpo = re.escape(normalizar_chave(pd.Series([padrao])).iloc[0])
+        elif tipo == "regex":
+            # Restringe a regex à parte do nome da chave
+            corpo = f"[^{_SEPARADOR}]*?(?:{padrao})"
+        elif tipo == "cnpj":
+            # CNPJ/CPF completo ou só a raiz (8 primeiros dígitos do CNPJ)
+            corpo = f"[^{_SEPARADOR}]*{_SEPARADOR}{re.sub(r'[^0-9]', '', padrao)}"
+        else:
+            raise ValueError(f"Tipo de regra desconhecido: {regra.Tipo}")
+        alternativas.append(f"(?P<r{i}>{corpo})")
+        categorias.append(regra.Categoria)
+
+    if not alternativas:
+        return None, []
+    return re.compile("^(?:" + "|".join(alternativas) + ")", re.IGNORECASE), categorias
+
+
+def montar_indice(mapeamento: pd.DataFrame, coluna: str, regras: pd.DataFrame = None) -> dict:
+    """
+    Monta o índice de categorias de uma fonte.
+
+    O mapeamento nome -> categoria fica em um índice com hash (pd.Index), consultado de uma
+    vez para a Series inteira em `categorizar`; as regras de fallback viram uma única regex.
+
+    Args:
+        mapeamento (pd.DataFrame): CSV de categorias (coluna do nome + 'Categoria').
+        coluna (str): 'Pagador/Recebedor' ou 'Complemento'.
+        regras (pd.DataFrame): Regras com as colunas ['Tipo', 'Padrao', 'Categoria'], na ordem de prioridade.
+
+    Returns:
+        dict: {'indice', 'categorias', 'matcher', 'categorias_regras'}.
+    """
+    chaves = normalizar_chave(mapeamento[coluna])
+    # Em chaves repetidas vale a última linha do CSV
+    unicos = ~chaves.duplicated(keep='last')
+
+    if regras is None:
+        regras = pd.DataFrame(columns=["Tipo", "Padrao", "Categoria"])
+    matcher, categorias_regras = _compilar_regras(regras)
+
+    return {
+        "indice": pd.Index(chaves[unicos]),
+        "categorias": mapeamento['Categoria'][unicos].to_numpy(dtype=object),
+        "matcher": matcher,
+        "categorias_regras": np.array(categorias_regras + [None], dtype=object),
+    }
+
+
+def categorizar(indice: dict, nomes: pd.Series, documentos: pd.Series = None) -> pd.Series:
+    """
+    Devolve a categoria de cada nome: primeiro pelo mapeamento exato (chave normalizada) e,
+    para quem não está nele, pela primeira regra de fallback que casar.
+
+    Args:
+        indice (dict): Resultado de `montar_indice`.
+        nomes (pd.Series): Pagador/Recebedor ou Complemento.
+        documentos (pd.Series): CPF/CNPJ de cada linha, usado pelas regras do tipo 'cnpj'.
+
+    Returns:
+        pd.Series: Categoria (None quando nada casou), com o mesmo índice de `nomes`.
+    """
+    chaves = normalizar_chave(nomes)
+    posicoes = indice["indice"].get_indexer(chaves)
+    encontrados = posicoes >= 0
+
+    resultado = np.full(len(chaves), None, dtype=object)
+    resultado[encontrados] = indice["categorias"][posicoes[encontrados]]
+
+    if indice["matcher"] is not None and not encontrados.all():
+        faltantes = ~encontrados
+        if documentos is None:
+            documentos = pd.Series("", index=nomes.index)
+        combinadas = chaves[faltantes] + _SEPARADOR + _somente_digitos(documentos)[faltantes]
+        grupos = combinadas.str.extract(indice["matcher"])
+        # Só os grupos r0, r1, ... das regras: uma regra do tipo regex pode ter grupos
+        # próprios, que viram colunas a mais e deslocariam as posições das seguintes.
+        # Cada linha tem no máximo um desses grupos preenchido: o da regra que casou.
+        grupos = grupos[[f"r{i}" for i in range(len(indice["categorias_regras"]) - 1)]]
+        casou = grupos.notna().to_numpy()
+        regra = np.where(casou.any(axis=1), casou.argmax(axis=1), -1)
+        resultado[faltantes] = indice["categorias_regras"][regra]
+
+    return pd.Series(resultado, index=nomes.index, dtype=object)
+
+
+def coluna_nome(fonte: str) -> str:
+    return 'Pagador/Recebedor' if fonte == 'pix' else 'Complemento'
+
+
+def caminho_mapeamento(fonte: str) -> str:
+    return CAMINHO_CATEGORIAS_PIX if fonte == 'pix' else CAMINHO_CATEGORIAS_BOLETOS
+
+
+def salvar_categorias(fonte: str, original: pd.DataFrame, editado: pd.DataFrame, caminho: str = None) -> int:
+    """
+    Registra no log de alterações do mapeamento (ver `utils.alteracoes`) só os nomes cuja
+    categoria o usuário mudou no editor. O CSV do mapeamento não é regravado nem relido.
+
+    A comparação é com a tabela entregue ao editor, e não com o mapeamento: nomes cuja
+    categoria veio de uma regra de fallback e não foi mexida continuam fora do mapeamento.
+
+    Args:
+        fonte (str): 'pix' ou 'boleto'.
+        original (pd.DataFrame): Tabela entregue ao st.data_editor.
+        editado (pd.DataFrame): Tabela devolvida por ele (mesmo índice), com o nome
+            (coluna da fonte) e a 'Categoria'.
+
+    Returns:
+        int: Quantidade de nomes alterados.
+    """
+    coluna = coluna_nome(fonte)
+    caminho = caminho or caminho_mapeamento(fonte)
+
+    novas = editado['Categoria'].astype(object)
+    anteriores = original['Categoria'].astype(object).reindex(editado.index)
+    alterados = editado[novas.notna() & (novas != anteriores)]
+    if alterados.empty:
+        return 0
+
+    linhas = [{coluna: nome, 'Categoria': categoria}
+              for nome, categoria in zip(alterados[coluna].astype(str), alterados['Categoria'])]
+    registrar(caminho, {'tipo': 'categorias', 'chave': coluna, 'linhas': linhas})
+    return len(linhas)
+
+
+def _ler_regras(fonte: str, caminho: str) -> pd.DataFrame:
+    if not os.path.exists(caminho):
+        return None
+    regras = pd.read_csv(caminho, dtype=str)
+    return regras[regras['Fonte'].isin([fonte, '*'])]
+
+
+def _mtime(caminho: str):
+    return os.path.getmtime(caminho) if os.path.exists(caminho) else None
+
+
+def carregar_indice(fonte: str, caminho: str = None, caminho_regras: str = CAMINHO_REGRAS) -> dict:
+    """
+    Devolve o índice de categorias da fonte ('pix' ou 'boleto'). Os CSVs (e o log de
+    alterações do mapeamento) só são lidos de novo quando mudam (o índice fica em memória,
+    identificado pelo mtime dos arquivos).
+    """
+    coluna = coluna_nome(fonte)
+    caminho = caminho or caminho_mapeamento(fonte)
+
+    versao = (caminho, _mtime(caminho), _mtime(caminho_log(caminho)), caminho_regras, _mtime(caminho_regras))
+    if _cache.get(fonte, (None,))[0] != versao:
+        mapeamento = ler_tabela(caminho)
+        _cache[fonte] = (versao, montar_indice(mapeamento, coluna, _ler_regras(fonte, caminho_regras)))
+    return _cache[fonte][1]
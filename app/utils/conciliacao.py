@@ -0,0 +1,281 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.armazenamento import DIRETORIO_BASE, carregar
+
+# === Conciliação do extrato com o detalhe de Pix e boletos ===
+# O extrato só diz 'PIX RECEBIDO' ou 'PG.TITULO'; quem pagou ou recebeu está no extrato Pix
+# e nos recibos de boletos. Cada lançamento do extrato é ligado a uma linha do detalhe pelo
+# valor (em centavos, com sinal) e pela data, com uma janela de dias: o banco lança no
+# extrato no dia útil seguinte, então um Pix de sábado aparece na segunda.
+#
+# Os pares candidatos saem de uma busca binária (np.searchsorted) no detalhe ordenado por
+# (grupo, valor, dia), sem comparar todas as linhas com todas.
+
+# Diferença aceita entre a data do extrato e a do detalhe, em dias: (mínima, máxima)
+JANELA_DIAS = (-1, 4)
+
+# Diferença aceita entre os valores, em centavos
+TOLERANCIA_CENTAVOS = 0
+
+GRUPOS = ["Pix", "Boleto"]
+
+COLUNAS_PARES = [
+    "Grupo", "Data", "Descricao", "Documento", "Valor",
+    "Data Detalhe", "Contraparte", "Identificador", "Valor Detalhe", "Atraso (dias)",
+]
+COLUNAS_SEM_PAR = ["Lado", "Grupo", "Data", "Descricao", "Documento", "Valor"]
+
+# Bits de cada parte da chave de ordenação (grupo, valor, dia) em um único int64
+_BITS_DIA = 17
+_BITS_VALOR = 41
+
+
+def lancamentos_extrato(extrato: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lançamentos do extrato que têm detalhe: 'PIX ...' (inclusive 'DEVOL PIX REC') e 'PG ...'.
+    """
+    descricao = extrato["Descricao"].astype(str)
+    grupo = np.select([descricao.str.contains("PIX"), descricao.str.startswith("PG")], GRUPOS, None)
+    lancamentos = pd.DataFrame({
+        "Grupo": grupo,
+        "Data": extrato["Data"],
+        "Descricao": descricao,
+        "Documento": extrato["Documento"].astype(str),
+        "Valor": extrato["Valor"].astype("int64"),
+    })
+    return lancamentos[lancamentos["Grupo"].notna()].reset_index(drop=True)
+
+
+def detalhe(pix: pd.DataFrame, boletos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pix e boletos efetuados no formato do extrato: valor com sinal (Pix enviado e boleto
+    pago saem da conta), contraparte e identificador (CPF/CNPJ do Pix, NSU do boleto).
+    Boletos rejeitados não passam pela conta e ficam de fora.
+    """
+    enviado = pix["Operação"].astype(str).str.contains("Enviado")
+    boletos = boletos[boletos["Situação"].astype(str) == "EFETUADA"]
+    partes = [
+        pd.DataFrame({
+            "Grupo": "Pix",
+            "Data": pix["Data"],
+            "Contraparte": pix["Pagador/Recebedor"].astype(str),
+            "Identificador": pix["CPF/CNPJ"].astype(str),
+            "Valor": pix["Valor"].astype("int64").where(~enviado, -pix["Valor"].astype("int64")),
+        }),
+        pd.DataFrame({
+            "Grupo": "Boleto",
+            "Data": boletos["Data"],
+            "Contraparte": boletos["Complemento"].astype(str),
+            "Identificador": boletos["NSU"].astype(str),
+            "Valor": -boletos["Valor"].astype("int64"),
+        }),
+    ]
+    return pd.concat(partes, ignore_index=True)
+
+
+def _dias(datas: pd.Series) -> np.ndarray:
+    return pd.to_datetime(datas).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _chave(grupo: np.ndarray, valor: np.ndarray, dia: np.ndarray) -> np.ndarray:
+    # Ordem lexicográfica (grupo, valor, dia); o valor é deslocado para ficar positivo
+    return ((grupo << _BITS_VALOR) + valor + (1 << (_BITS_VALOR - 1))) << _BITS_DIA | dia
+
+
+def _partes_chave(df: pd.DataFrame) -> tuple:
+    grupo = df["Grupo"].map({grupo: i for i, grupo in enumerate(GRUPOS)}).to_numpy(np.int64)
+    return grupo, df["Valor"].to_numpy(np.int64), _dias(df["Data"])
+
+
+def candidatos(esquerda: pd.DataFrame, direita: pd.DataFrame, janela: tuple = JANELA_DIAS,
+               tolerancia: int = TOLERANCIA_CENTAVOS) -> pd.DataFrame:
+    """
+    Todos os pares (extrato, detalhe) do mesmo grupo com valores a até `tolerancia`
+    centavos e atraso (data do extrato - data do detalhe) dentro de `janela`.
+
+    Para cada deslocamento de valor, os candidatos de uma linha do extrato formam um
+    intervalo contíguo do detalhe ordenado, achado com duas buscas binárias.
+
+    Returns:
+        pd.DataFrame: Colunas ['esquerda', 'direita', 'atraso', 'distancia'] com as
+        posições das linhas; a distância ordena os pares do mais para o menos provável.
+    """
+    grupo_d, valor_d, dia_d = _partes_chave(direita)
+    chaves_d = _chave(grupo_d, valor_d, dia_d)
+    ordem = np.argsort(chaves_d, kind="stable")
+    chaves_d = chaves_d[ordem]
+
+    grupo_e, valor_e, dia_e = _partes_chave(esquerda)
+    minimo, maximo = janela
+
+    pares = []
+    for deslocamento in range(-tolerancia, tolerancia + 1):
+        inicio = np.searchsorted(chaves_d, _chave(grupo_e, valor_e + deslocamento, dia_e - maximo), "left")
+        fim = np.searchsorted(chaves_d, _chave(grupo_e, valor_e + deslocamento, dia_e - minimo), "right")
+        quantidade = fim - inicio
+        esq = np.repeat(np.arange(len(esquerda)), quantidade)
+        # Posição de cada candidato dentro do intervalo da sua linha do extrato
+        passo = np.arange(quantidade.sum()) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+        pares.append((esq, ordem[np.repeat(inicio, quantidade) + passo], abs(deslocamento)))
+
+    esq = np.concatenate([p[0] for p in pares])
+    dir_ = np.concatenate([p[1] for p in pares])
+    diferenca = np.concatenate([np.full(len(p[0]), p[2]) for p in pares])
+    atraso = dia_e[esq] - dia_d[dir_]
+    return pd.DataFrame({
+        "esquerda": esq,
+        "direita": dir_,
+        "atraso": atraso,
+        # Primeiro o valor mais próximo, depois o menor atraso
+        "distancia": diferenca * (max(abs(minimo), abs(maximo)) + 1) + np.abs(atraso),
+    })
+
+
+def _resolver(pares: pd.DataFrame, chave_e: np.ndarray, chave_d: np.ndarray) -> tuple:
+    """
+    Escolhe os pares conciliados entre os candidatos, em rodadas.
+
+    Em cada rodada, um par é aceito quando é o mais próximo para as duas linhas e os
+    empates são intercambiáveis: todos os candidatos mais próximos de uma linha têm a
+    mesma data e valor. Linhas iguais dos dois lados (ex.: dois Pix de R$ 20,00 no mesmo
+    dia) são pareadas na ordem em que aparecem. As linhas conciliadas saem dos candidatos
+    e a rodada seguinte recomeça com o que sobrou.
+
+    Returns:
+        tuple: (pares aceitos, candidatos que sobraram sem decisão).
+    """
+    aceitos = []
+    while not pares.empty:
+        min_e = pares.groupby("esquerda")["distancia"].transform("min")
+        min_d = pares.groupby("direita")["distancia"].transform("min")
+        melhores_e = pares[pares["distancia"] == min_e]
+        melhores_d = pares[pares["distancia"] == min_d]
+
+        unico_e = melhores_e.assign(k=chave_d[melhores_e["direita"]]).groupby("esquerda")["k"].nunique() == 1
+        unico_d = melhores_d.assign(k=chave_e[melhores_d["esquerda"]]).groupby("direita")["k"].nunique() == 1
+
+        mutuos = pares[(pares["distancia"] == min_e) & (pares["distancia"] == min_d)]
+        mutuos = mutuos[unico_e.reindex(mutuos["esquerda"]).to_numpy()
+                        & unico_d.reindex(mutuos["direita"]).to_numpy()]
+        if mutuos.empty:
+            break
+
+        # Em cada bloco de linhas iguais, a n-ésima do extrato fica com a n-ésima do detalhe
+        mutuos = mutuos.sort_values(["esquerda", "direita"])
+        bloco = [chave_e[mutuos["esquerda"]], chave_d[mutuos["direita"]]]
+        ordem_e = mutuos.groupby(bloco)["esquerda"].rank(method="dense")
+        ordem_d = mutuos.groupby(bloco)["direita"].rank(method="dense")
+        escolhidos = mutuos[ordem_e == ordem_d]
+        aceitos.append(escolhidos)
+
+        pares = pares[~pares["esquerda"].isin(escolhidos["esquerda"])
+                      & ~pares["direita"].isin(escolhidos["direita"])]
+
+    aceitos = pd.concat(aceitos) if aceitos else pares.iloc[:0]
+    return aceitos, pares
+
+
+def _tabela_pares(pares: pd.DataFrame, esquerda: pd.DataFrame, direita: pd.DataFrame) -> pd.DataFrame:
+    e = esquerda.iloc[pares["esquerda"]].reset_index(drop=True)
+    d = direita.iloc[pares["direita"]].reset_index(drop=True)
+    return pd.DataFrame({
+        "Grupo": e["Grupo"],
+        "Data": e["Data"],
+        "Descricao": e["Descricao"],
+        "Documento": e["Documento"],
+        "Valor": e["Valor"],
+        "Data Detalhe": d["Data"],
+        "Contraparte": d["Contraparte"],
+        "Identificador": d["Identificador"],
+        "Valor Detalhe": d["Valor"],
+        "Atraso (dias)": pares["atraso"].to_numpy(),
+    }, columns=COLUNAS_PARES)
+
+
+def conciliar(extrato: pd.DataFrame, pix: pd.DataFrame, boletos: pd.DataFrame,
+              janela: tuple = JANELA_DIAS, tolerancia: int = TOLERANCIA_CENTAVOS) -> dict:
+    """
+    Liga os lançamentos do extrato aos Pix e boletos correspondentes.
+
+    Args:
+        extrato, pix, boletos (pd.DataFrame): Dados da base (Valor em centavos).
+        janela (tuple): Atraso aceito (data do extrato - data do detalhe), em dias.
+        tolerancia (int): Diferença de valor aceita, em centavos.
+
+    Returns:
+        dict: DataFrames com os valores em centavos:
+            'conciliados': um par (extrato, detalhe) por linha (COLUNAS_PARES);
+            'ambiguos': os candidatos das linhas que não puderam ser decididas, um por linha;
+            'sem_par': linhas dos dois lados sem nenhum candidato (COLUNAS_SEM_PAR).
+    """
+    esquerda = lancamentos_extrato(extrato)
+    direita = detalhe(pix, boletos)
+
+    pares = candidatos(esquerda, direita, janela, tolerancia)
+    aceitos, restantes = _resolver(pares, _chave(*_partes_chave(esquerda)), _chave(*_partes_chave(direita)))
+
+    restantes = restantes.sort_values(["esquerda", "distancia", "direita"])
+    usados_e = np.zeros(len(esquerda), dtype=bool)
+    usados_d = np.zeros(len(direita), dtype=bool)
+    for usados, coluna in [(usados_e, "esquerda"), (usados_d, "direita")]:
+        usados[aceitos[coluna].to_numpy()] = True
+        usados[restantes[coluna].to_numpy()] = True
+
+    sem_par_e = esquerda[~usados_e]
+    sem_par_d = direita[~usados_d]
+    sem_par = pd.concat([
+        pd.DataFrame({"Lado": "Extrato", **{c: sem_par_e[c] for c in COLUNAS_SEM_PAR[1:]}}),
+        pd.DataFrame({
+            "Lado": "Detalhe", "Grupo": sem_par_d["Grupo"], "Data": sem_par_d["Data"],
+            "Descricao": sem_par_d["Contraparte"], "Documento": sem_par_d["Identificador"],
+            "Valor": sem_par_d["Valor"],
+        }),
+    ], ignore_index=True)
+
+    return {
+        "conciliados": _tabela_pares(aceitos.sort_values("esquerda"), esquerda, direita),
+        "ambiguos": _tabela_pares(restantes, esquerda, direita),
+        "sem_par": sem_par.sort_values(["Data", "Lado"], kind="stable").reset_index(drop=True),
+    }
+
+
+def conciliar_base(meses: list = None, diretorio: str = DIRETORIO_BASE, **opcoes) -> dict:
+    """
+    `conciliar` sobre a base Parquet (None = todos os meses).
+    """
+    extrato = carregar("extrato", meses, ["Data", "Descricao", "Documento", "Valor"], diretorio)
+    pix = carregar("pix", meses, ["Operação", "Pagador/Recebedor", "CPF/CNPJ", "Data", "Valor"], diretorio)
+    boletos = carregar("boleto", meses, ["Data", "NSU", "Situação", "Valor", "Complemento"], diretorio)
+    return conciliar(extrato, pix, boletos, **opcoes)
+
+
+def main():
+    # Uso, a partir da raiz do repositório:
+    #   PYTHONPATH=app python -m utils.conciliacao
+    #   PYTHONPATH=app python -m utils.conciliacao --mes 2025-03 --janela -1 4 --tolerancia 0
+    parser = argparse.ArgumentParser(description="Concilia o extrato com os Pix e boletos da base Parquet.")
+    parser.add_argument("--mes", action="append", help="Mês AAAA-MM (pode repetir). Padrão: todos")
+    parser.add_argument("--janela", type=int, nargs=2, default=JANELA_DIAS, metavar=("MIN", "MAX"),
+                        help="Atraso aceito entre o extrato e o detalhe, em dias")
+    parser.add_argument("--tolerancia", type=int, default=TOLERANCIA_CENTAVOS, help="Diferença de valor aceita, em centavos")
+    parser.add_argument("--diretorio", default=DIRETORIO_BASE)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultado = conciliar_base(args.mes, args.diretorio, janela=tuple(args.janela), tolerancia=args.tolerancia)
+    duracao = time.perf_counter() - inicio
+
+    sem_par = resultado["sem_par"]
+    print(f"Conciliados: {len(resultado['conciliados'])}")
+    print(f"Ambíguos:    {resultado['ambiguos']['Data'].count()} candidatos de "
+          f"{resultado['ambiguos'][['Data', 'Descricao', 'Documento']].drop_duplicates().shape[0]} lançamentos")
+    print(f"Sem par:     {(sem_par['Lado'] == 'Extrato').sum()} no extrato, {(sem_par['Lado'] == 'Detalhe').sum()} no detalhe")
+    print(f"Tempo:       {duracao:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.extrato_parse import extrair_tabela_pix
+
+DIRETORIO_PIX = "app/data/pix"
+
+COLUNAS_RELATORIO = ["Arquivo", "Saída", "Linhas", "Erro"]
+
+
+def caminho_saida(caminho_pdf: str, destino: str = None) -> str:
+    """
+    Parquet gerado para um PDF: mesmo nome, no diretório `destino` (padrão: o do PDF).
+    """
+    nome = os.path.splitext(os.path.basename(caminho_pdf))[0]
+    return os.path.join(destino or os.path.dirname(caminho_pdf), f"{nome}.parquet")
+
+
+def converter_pdf(caminho_pdf: str, saida: str) -> int:
+    """
+    Extrai a tabela do extrato Pix e grava em Parquet, já com os tipos da base.
+
+    Returns:
+        int: Quantidade de linhas gravadas.
+    """
+    df = extrair_tabela_pix(caminho_pdf)
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    temporario = os.path.join(os.path.dirname(saida), f".{os.path.basename(saida)}.{os.getpid()}.tmp")
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, saida)
+    return len(df)
+
+
+def converter_pdfs(pdfs: list, destino: str = None, max_workers: int = None) -> pd.DataFrame:
+    """
+    Converte vários extratos Pix em paralelo, um processo por arquivo.
+
+    Args:
+        pdfs (list): Caminhos dos PDFs.
+        destino (str): Diretório dos Parquets. None grava ao lado de cada PDF.
+        max_workers (int): Quantidade de processos. None usa a quantidade de CPUs;
+            1 executa tudo no processo atual, sem pool.
+
+    Returns:
+        pd.DataFrame: Uma linha por PDF, com as colunas ['Arquivo', 'Saída', 'Linhas', 'Erro'].
+    """
+    saidas = [caminho_saida(pdf, destino) for pdf in pdfs]
+    relatorio = []
+
+    if max_workers == 1:
+        for pdf, saida in zip(pdfs, saidas):
+            try:
+                relatorio.append([pdf, saida, converter_pdf(pdf, saida), None])
+            except Exception as e:
+                relatorio.append([pdf, saida, 0, str(e)])
+        return pd.DataFrame(relatorio, columns=COLUNAS_RELATORIO)
+
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(pdfs) or 1)) as pool:
+        futuros = [pool.submit(converter_pdf, pdf, saida) for pdf, saida in zip(pdfs, saidas)]
+        for pdf, saida, futuro in zip(pdfs, saidas, futuros):
+            try:
+                relatorio.append([pdf, saida, futuro.result(), None])
+            except Exception as e:
+                relatorio.append([pdf, saida, 0, str(e)])
+    return pd.DataFrame(relatorio, columns=COLUNAS_RELATORIO)
+
+
+def listar_pdfs(entradas: list) -> list:
+    """
+    Expande diretórios nos PDFs que contêm; arquivos são mantidos como informados.
+    """
+    pdfs = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            pdfs.extend(
+                os.path.join(entrada, nome)
+                for nome in sorted(os.listdir(entrada))
+                if nome.lower().endswith(".pdf")
+            )
+        else:
+            pdfs.append(entrada)
+    return pdfs
+
+
+def main():
+    # Uso, a partir da raiz do repositório:
+    #   PYTHONPATH=app python -m utils.conversor_pix
+    #   PYTHONPATH=app python -m utils.conversor_pix app/data/pix/abril25.pdf --destino /tmp/pix
+    parser = argparse.ArgumentParser(description="Converte extratos Pix em PDF para Parquet.")
+    parser.add_argument("entradas", nargs="*", default=[DIRETORIO_PIX], help="PDFs ou diretórios com PDFs")
+    parser.add_argument("--destino", help="Diretório dos Parquets (padrão: ao lado de cada PDF)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos usados na conversão")
+    args = parser.parse_args()
+
+    relatorio = converter_pdfs(listar_pdfs(args.entradas), args.destino, args.workers)
+    for _, linha in relatorio.iterrows():
+        if linha["Erro"]:
+            print(f"✖ {linha['Arquivo']}: {linha['Erro']}")
+        else:
+            print(f"✔ {linha['Saída']} ({linha['Linhas']} linhas)")
+
+
+if __name__ == "__main__":
+    main()
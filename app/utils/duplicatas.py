@@ -0,0 +1,182 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# === Índice de transações duplicadas ===
+# Cada linha importada ganha uma impressão digital de 64 bits, calculada dos campos que
+# identificam a transação (CAMPOS_IMPRESSAO). Na importação, as linhas cuja impressão já
+# está registrada para outro arquivo são descartadas: uma cópia de um extrato com outro
+# nome, ou dois exportes de Pix com dias em comum, não contam as transações duas vezes.
+#
+# Linhas iguais dentro do mesmo arquivo são transações distintas (ex.: dois Pix de mesmo
+# valor para a mesma pessoa no mesmo dia), então a impressão inclui a ocorrência da chave
+# no arquivo: a segunda linha igual só é duplicada se o outro arquivo também tiver duas.
+#
+# O índice de cada fonte fica em <base>/impressoes/<fonte>.npz: as impressões (uint64), em
+# ordem crescente, o arquivo de origem de cada uma (uint32, posição na lista de caminhos) e
+# os caminhos, ou 12 bytes por transação (10 milhões de transações: ~120 MB). Cada linha
+# nova é procurada por busca binária (np.searchsorted), O(log n), e as novas são
+# intercaladas no índice já ordenado: só as linhas importadas são ordenadas, e o índice
+# existente é apenas copiado (na intercalação e ao gravar), sem hash nem ordenação.
+
+DIRETORIO_INDICE = "impressoes"
+
+# Campos que identificam uma transação de cada fonte. No extrato o Documento se repete em
+# lançamentos de dias diferentes, então a data e o valor entram na chave.
+CAMPOS_IMPRESSAO = {
+    "extrato": ["Documento", "Data", "Valor"],
+    "boleto": ["NSU"],
+    "pix": ["Data", "Valor", "Pagador/Recebedor", "CPF/CNPJ"],
+}
+
+# Comparados só pelos dígitos (o PDF do Pix quebra o CNPJ em duas linhas)
+CAMPOS_DOCUMENTO = {"CPF/CNPJ"}
+
+_SEPARADOR = "\x1f"
+
+
+def _normalizar(valores: pd.Series, documento: bool = False) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        return valores.dt.strftime("%Y-%m-%d").fillna("")
+    if pd.api.types.is_numeric_dtype(valores):
+        return valores.astype("Int64").astype(str)
+    texto = valores.astype(object).fillna("").astype(str)
+    if documento:
+        return texto.str.replace(r"\D", "", regex=True)
+    return texto.str.replace(r"\s+", " ", regex=True).str.strip().str.casefold()
+
+
+def impressoes(df: pd.DataFrame, fonte: str) -> np.ndarray:
+    """
+    Impressão digital (uint64) de cada linha de um arquivo já tipado (ver
+    `armazenamento.TIPAGEM_POR_FONTE`), na ordem das linhas.
+    """
+    chave = pd.Series(fonte, index=df.index, dtype=object)
+    for campo in CAMPOS_IMPRESSAO[fonte]:
+        chave = chave + _SEPARADOR + _normalizar(df[campo], campo in CAMPOS_DOCUMENTO)
+    ocorrencia = chave.groupby(chave, sort=False).cumcount()
+    chave = chave + _SEPARADOR + ocorrencia.astype(str)
+    return pd.util.hash_pandas_object(chave, index=False).to_numpy(dtype=np.uint64)
+
+
+def caminho_indice(fonte: str, diretorio: str) -> str:
+    return os.path.join(diretorio, DIRETORIO_INDICE, f"{fonte}.npz")
+
+
+def carregar_indice(fonte: str, diretorio: str) -> dict:
+    """
+    Índice de impressões da fonte: {'impressoes', 'arquivos', 'caminhos'}. Vazio se ainda
+    não existe.
+    """
+    caminho = caminho_indice(fonte, diretorio)
+    if not os.path.exists(caminho):
+        return {"impressoes": np.empty(0, dtype=np.uint64), "arquivos": np.empty(0, dtype=np.uint32), "caminhos": []}
+    with np.load(caminho, allow_pickle=False) as dados:
+        indice = {
+            "impressoes": dados["impressoes"],
+            "arquivos": dados["arquivos"],
+            "caminhos": dados["caminhos"].tolist(),
+        }
+    impressoes = indice["impressoes"]
+    if len(impressoes) > 1 and not (impressoes[1:] >= impressoes[:-1]).all():
+        # Índice gravado antes de ser mantido em ordem
+        ordem = np.argsort(impressoes, kind="stable")
+        indice["impressoes"] = impressoes[ordem]
+        indice["arquivos"] = indice["arquivos"][ordem]
+    return indice
+
+
+def salvar_indice(indice: dict, fonte: str, diretorio: str):
+    """
+    Grava o índice (tmp + os.replace), sem os caminhos que não têm mais impressões.
+    """
+    contagem = np.bincount(indice["arquivos"], minlength=len(indice["caminhos"]))
+    usados = np.flatnonzero(contagem)
+    novos_ids = np.zeros(len(contagem), dtype=np.uint32)
+    novos_ids[usados] = np.arange(len(usados), dtype=np.uint32)
+    arquivos = novos_ids[indice["arquivos"]]
+    caminhos = [indice["caminhos"][i] for i in usados]
+
+    caminho = caminho_indice(fonte, diretorio)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "wb") as f:
+        np.savez(f, impressoes=indice["impressoes"], arquivos=arquivos,
+                 caminhos=np.array(caminhos, dtype=str))
+    os.replace(temporario, caminho)
+
+
+def esquecer(indice: dict, caminhos: list):
+    """
+    Remove do índice as impressões dos arquivos (ex.: que saíram do diretório).
+    """
+    caminhos = set(caminhos)
+    ids = [i for i, c in enumerate(indice["caminhos"]) if c in caminhos]
+    if not ids:
+        return
+    manter = ~np.isin(indice["arquivos"], ids)
+    indice["impressoes"] = indice["impressoes"][manter]
+    indice["arquivos"] = indice["arquivos"][manter]
+
+
+def registrar(indice: dict, novos: list) -> list:
+    """
+    Registra as impressões de arquivos importados, na ordem da lista. As linhas cuja
+    impressão já está no índice (de outro arquivo ou de um arquivo anterior da lista) não
+    são registradas. Um arquivo que já estava no índice tem as impressões antigas substituídas.
+
+    Args:
+        indice (dict): Resultado de `carregar_indice`; é atualizado.
+        novos (list): Tuplas (caminho, impressões) de cada arquivo.
+
+    Returns:
+        list: Para cada arquivo, (máscara das linhas novas, caminhos dos arquivos que já
+        tinham as outras linhas).
+    """
+    if not novos:
+        return []
+    esquecer(indice, [caminho for caminho, _ in novos])
+
+    posicoes = {c: i for i, c in enumerate(indice["caminhos"])}
+    for caminho, _ in novos:
+        if caminho not in posicoes:
+            posicoes[caminho] = len(indice["caminhos"])
+            indice["caminhos"].append(caminho)
+
+    impressoes = np.concatenate([valores for _, valores in novos]).astype(np.uint64, copy=False)
+    arquivos = np.concatenate([
+        np.full(len(valores), posicoes[caminho], dtype=np.uint32) for caminho, valores in novos
+    ])
+
+    # Primeira ocorrência de cada impressão entre os arquivos novos (a ordem da lista decide)
+    unicas, primeiras, inverso = np.unique(impressoes, return_index=True, return_inverse=True)
+    donos = arquivos[primeiras]
+
+    # Impressões que já estavam no índice ficam com o arquivo de lá
+    existentes = indice["impressoes"]
+    posicao = np.searchsorted(existentes, unicas)
+    no_indice = posicao < len(existentes)
+    no_indice[no_indice] = existentes[posicao[no_indice]] == unicas[no_indice]
+    donos[no_indice] = indice["arquivos"][posicao[no_indice]]
+    dono = donos[inverso]
+
+    primeira = np.zeros(len(impressoes), dtype=bool)
+    primeira[primeiras[~no_indice]] = True
+
+    resultado = []
+    inicio = 0
+    for caminho, valores in novos:
+        trecho = slice(inicio, inicio + len(valores))
+        novas = primeira[trecho]
+        originais = sorted({indice["caminhos"][i] for i in np.unique(dono[trecho][~novas])})
+        resultado.append((novas, originais))
+        inicio += len(valores)
+
+    # `unicas` já está em ordem: intercala as novas no índice
+    entram = ~no_indice
+    insercao = posicao[entram]
+    indice["impressoes"] = np.insert(existentes, insercao, unicas[entram])
+    indice["arquivos"] = np.insert(indice["arquivos"], insercao, arquivos[primeiras[entram]])
+    return resultado
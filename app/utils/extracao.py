@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.instrumentacao import cronometrado
+
+# === Backends de extração de texto ===
+# Cada backend recebe o caminho do PDF e produz o texto de cada página, uma por vez.
+# As bibliotecas são importadas só quando o backend é usado. O tempo de cada página conta
+# na etapa 'extracao' (ver utils.instrumentacao).
+
+
+@cronometrado("extracao")
+def _paginas_pymupdf(caminho_pdf: str):
+    import fitz  # PyMuPDF
+
+    with fitz.open(caminho_pdf) as doc:
+        for page in doc:
+            yield page.get_text()
+
+
+@cronometrado("extracao")
+def _paginas_pypdfium2(caminho_pdf: str):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(caminho_pdf)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            # O pdfium separa as linhas com '\r\n'
+            yield textpage.get_text_bounded().replace("\r\n", "\n")
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+
+
+@cronometrado("extracao")
+def _paginas_pdfplumber(caminho_pdf: str):
+    import pdfplumber
+
+    with pdfplumber.open(caminho_pdf) as pdf:
+        for page in pdf.pages:
+            yield page.extract_text() or ""
+            # Libera os objetos da página já lida
+            page.close()
+
+
+BACKENDS = {
+    "pymupdf": _paginas_pymupdf,
+    "pypdfium2": _paginas_pypdfium2,
+    "pdfplumber": _paginas_pdfplumber,
+}
+
+BACKEND_PADRAO = "pymupdf"
+
+# Caracteres de texto mantidos em memória, somando todos os documentos do cache. Um
+# documento maior que isso não é guardado: a leitura dele continua página a página, sem
+# acumular o texto inteiro (ver `_matches_por_pagina` em utils.extrato_parse).
+LIMITE_CARACTERES_CACHE = 4_000_000
+
+_cache_textos = OrderedDict()
+_caracteres_cache = 0
+
+
+def _chave_documento(caminho_pdf: str, backend: str) -> tuple:
+    info = os.stat(caminho_pdf)
+    return os.path.abspath(caminho_pdf), info.st_mtime_ns, info.st_size, backend
+
+
+def textos_paginas(caminho_pdf: str, backend: str = BACKEND_PADRAO):
+    """
+    Produz o texto de cada página do PDF com o backend escolhido.
+
+    O texto de um documento lido até o fim fica em memória (até LIMITE_CARACTERES_CACHE
+    no total, saindo os usados há mais tempo), de modo que cada página é extraída uma única
+    vez mesmo quando vários parsers leem o mesmo arquivo. O arquivo modificado invalida a
+    entrada. Enquanto lê, guarda as páginas só até o limite; passando dele, o documento não
+    entra no cache e a memória fica na da página atual.
+
+    Args:
+        caminho_pdf (str): Caminho do PDF.
+        backend (str): 'pymupdf', 'pypdfium2' ou 'pdfplumber'.
+
+    Yields:
+        str: Texto de uma página.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de extração desconhecido: {backend}")
+
+    chave = _chave_documento(caminho_pdf, backend)
+    if chave in _cache_textos:
+        _cache_textos.move_to_end(chave)
+        yield from _cache_textos[chave]
+        return
+
+    textos = []
+    caracteres = 0
+    for texto in BACKENDS[backend](caminho_pdf):
+        if textos is not None:
+            caracteres += len(texto)
+            if caracteres <= LIMITE_CARACTERES_CACHE:
+                textos.append(texto)
+            else:
+                # Documento grande demais para o cache: para de acumular
+                textos = None
+        yield texto
+
+    if textos is not None:
+        _guardar_textos(chave, tuple(textos), caracteres)
+
+
+def _guardar_textos(chave: tuple, textos: tuple, caracteres: int):
+    global _caracteres_cache
+    _descartar_textos(chave)
+    _cache_textos[chave] = textos
+    _caracteres_cache += caracteres
+    while _caracteres_cache > LIMITE_CARACTERES_CACHE:
+        _descartar_textos(next(iter(_cache_textos)))
+
+
+def _descartar_textos(chave: tuple):
+    global _caracteres_cache
+    textos = _cache_textos.pop(chave, None)
+    if textos is not None:
+        _caracteres_cache -= sum(len(t) for t in textos)
+
+
+def limpar_cache_textos():
+    global _caracteres_cache
+    _cache_textos.clear()
+    _caracteres_cache = 0
+
+
+# === Escolha automática do backend ===
+# Para cada parser e layout de documento (gerador do PDF e tamanho da página) é medido
+# cada backend; fica valendo o mais rápido cujo resultado é idêntico ao do backend de
+# referência. A escolha é gravada em disco e reaproveitada nos documentos de mesmo layout.
+
+CAMINHO_ESCOLHAS = "app/data/cache/backends.json"
+
+
+def layout_documento(caminho_pdf: str) -> str:
+    """
+    Identifica o layout de um PDF pelo programa que o gerou e pelo tamanho da primeira página.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(caminho_pdf) as doc:
+        return layout_documento_aberto(doc)
+
+
+def layout_documento_aberto(doc) -> str:
+    """
+    Mesmo que `layout_documento`, para um documento do PyMuPDF já aberto.
+    """
+    criador = doc.metadata.get("creator") or ""
+    if doc.page_count == 0:
+        return f"{criador}|vazio"
+    rect = doc[0].rect
+    return f"{criador}|{rect.width:.0f}x{rect.height:.0f}"
+
+
+def _carregar_escolhas(caminho: str) -> dict:
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _salvar_escolhas(escolhas: dict, caminho: str):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(escolhas, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def calibrar_backend(parser, caminho_pdf: str, referencia: str = BACKEND_PADRAO,
+                     candidatos: list = None) -> dict:
+    """
+    Executa `parser(caminho_pdf, backend=...)` com cada backend e mede o tempo.
+
+    O cache de texto é ignorado na medição, para que todos os backends extraiam o
+    documento do zero.
+
+    Returns:
+        dict: {'backend': mais rápido com resultado idêntico ao da referência,
+        'tempos': backend -> segundos, 'identicos': backends com resultado idêntico,
+        'erros': backend -> erro, dos que falharam}. Se a referência falhou, 'backend' é a
+        própria referência e 'identicos' fica vazio.
+    """
+    candidatos = candidatos or list(BACKENDS)
+    if referencia not in candidatos:
+        candidatos = [referencia] + candidatos
+
+    resultados = {}
+    tempos = {}
+    erros = {}
+    for backend in candidatos:
+        for chave in [c for c in _cache_textos if c[0] == os.path.abspath(caminho_pdf) and c[3] == backend]:
+            _descartar_textos(chave)
+        inicio = time.perf_counter()
+        try:
+            resultados[backend] = parser(caminho_pdf, backend=backend)
+        except Exception as e:
+            erros[backend] = f"{type(e).__name__}: {e}"
+            continue
+        tempos[backend] = time.perf_counter() - inicio
+
+    resultado = {"tempos": {b: round(t, 6) for b, t in tempos.items()}, "erros": erros}
+    if referencia not in resultados:
+        # Sem a saída da referência não há com o que comparar: fica a referência, cujo erro
+        # aparece quando o parser rodar de novo
+        return {**resultado, "backend": referencia, "identicos": []}
+
+    esperado = resultados[referencia]
+    identicos = [b for b, df in resultados.items() if df.equals(esperado)]
+    return {**resultado, "backend": min(identicos, key=tempos.get), "identicos": identicos}
+
+
+def escolher_backend(parser, caminho_pdf: str, referencia: str = BACKEND_PADRAO,
+                     caminho_escolhas: str = CAMINHO_ESCOLHAS) -> str:
+    """
+    Devolve o backend a usar com `parser` neste documento: o já escolhido para o layout
+    ou, na primeira vez que o layout aparece, o resultado de `calibrar_backend`.
+    """
+    chave = f"{parser.__name__}|{layout_documento(caminho_pdf)}"
+    escolhas = _carregar_escolhas(caminho_escolhas)
+    if chave not in escolhas:
+        calibragem = calibrar_backend(parser, caminho_pdf, referencia)
+        if referencia in calibragem["erros"]:
+            # Não grava a escolha: o layout é calibrado de novo na próxima vez
+            logging.getLogger(__name__).warning(
+                "Calibração de %s em %s: o backend de referência (%s) falhou: %s",
+                parser.__name__, caminho_pdf, referencia, calibragem["erros"][referencia],
+            )
+            return referencia
+        escolhas[chave] = calibragem["backend"]
+        _salvar_escolhas(escolhas, caminho_escolhas)
+    return escolhas[chave]
@@ -1,153 +1,328 @@
 # utils.py
-import fitz  # PyMuPDF
+import hashlib
+import inspect
+import os
 import re
+import threading
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-def parse_extrato_bancario(arquivo_pdf: str) -> pd.DataFrame:
+from utils.extracao import (
+    BACKEND_PADRAO,
+    escolher_backend,
+    layout_documento_aberto,
+    textos_paginas,
+)
+from utils.instrumentacao import cronometrado, etapa
+from utils.moeda import para_centavos
+
+MESES_EXTRATO = {
+    "JANEIRO": 1, "FEVEREIRO": 2, "MARCO": 3, "ABRIL": 4,
+    "MAIO": 5, "JUNHO": 6, "JULHO": 7, "AGOSTO": 8,
+    "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12
+}
+
+# Regex das linhas da tabela do extrato: dia (opcional), histórico, documento e valor
+PADRAO_EXTRATO = re.compile(
+    r"(?:(\d{2})\s+)?([A-Z].*?)\s{2,}(\d{6})\s+([\d.,\-]+)", re.MULTILINE
+)
+
+# Regex das operações do extrato Pix, aplicada sobre o texto com espaços normalizados
+PADRAO_PIX_FITZ = re.compile(
+    r"Pix\s+(Recebido|Enviado)\s+Efetivado\s+(?:de|para)\s+(.+?)\s+(\d{2,3}\.\d{3}\.\d{3}/\d{4}-\d{2}|\d{3}\.\d{3}\.\d{3}-\d{2})\s+(\d{2}/\d{2}/\d{4})\s+R\$\s*([\d.,]+)"
+)
+
+LINHAS_POR_LOTE = 1000
+
+
+def _resolver_backend(parser, arquivo_pdf: str, backend: str, referencia: str = BACKEND_PADRAO) -> str:
     """
-    Faz o parse de extratos bancários mensais e retorna um DataFrame com a coluna 'Data' no formato datetime.date.
-    Primeiro tenta extrair o período a partir de 'PERIODO: MÊS/ANO'. Se não encontrar, usa 'SALDO ANT EM DD/MM/AAAA'.
+    Troca backend='auto' pelo backend escolhido para o layout do documento
+    (ver `extracao.escolher_backend`).
     """
-    doc = fitz.open(arquivo_pdf)
-    texto_completo = "".join([page.get_text() for page in doc])
+    if backend == "auto":
+        return escolher_backend(parser, arquivo_pdf, referencia)
+    return backend
 
-    # === 1. Tenta extrair 'PERIODO: MÊS/ANO'
-    match_periodo = re.search(r"PERIODO:\s+([A-ZÇ]+)[/\\](\d{4})", texto_completo, re.IGNORECASE)
 
-    meses = {
-        "JANEIRO": 1, "FEVEREIRO": 2, "MARCO": 3, "ABRIL": 4,
-        "MAIO": 5, "JUNHO": 6, "JULHO": 7, "AGOSTO": 8,
-        "SETEMBRO": 9, "OUTUBRO": 10, "NOVEMBRO": 11, "DEZEMBRO": 12
-    }
-
-    mes = None
-    ano = None
+@cronometrado("regex")
+def _matches_por_pagina(paginas, padrao, separador: str = "", normalizar=None):
+    """
+    Aplica `padrao` página a página, sem juntar o documento inteiro em memória.
+
+    O trecho depois do último match de uma página é levado para a próxima, de modo que
+    um registro quebrado entre páginas ainda é encontrado. O resto carregado nunca passa
+    do tamanho de uma página, então a memória fica limitada a duas páginas de texto.
+
+    Diferença intencional em relação ao `findall` no texto inteiro: um match mais longo
+    que uma página começa, aqui, no máximo uma página antes de onde termina. Isso só
+    acontece no `PADRAO_PIX_FITZ` quando o CPF/CNPJ de um registro vem quebrado (ex.:
+    '55.333.171/0001- 24'): o nome não guloso engole os registros seguintes até achar um
+    documento válido, e a linha resultante já é lixo nos dois casos (o nome contém 'Pix').
+    Nas amostras, uma linha de app/data/pix/janeiro25.pdf tem 'Pessoa' diferente; as
+    demais são idênticas (ver `benchmark verificar-paginas`).
+
+    Yields:
+        tuple: (texto da página, lista com os grupos de cada match encontrado).
+    """
+    paginas = iter(paginas)
+    resto = ""
+    texto = next(paginas, None)
+    while texto is not None:
+        proximo = next(paginas, None)
+        if normalizar is not None:
+            texto = normalizar(texto)
+        buffer = resto + separador + texto if resto else texto
+
+        matches = []
+        fim = 0
+        for match in padrao.finditer(buffer):
+            # Um match que vai até o fim do buffer pode continuar na próxima página
+            if proximo is not None and match.end() == len(buffer):
+                break
+            matches.append(match.groups())
+            fim = match.end()
+
+        resto = buffer[max(fim, len(buffer) - len(texto)):]
+        yield texto, matches
+        texto = proximo
+
+
+def _detectar_periodo(texto: str):
+    """
+    Procura o mês/ano do extrato no texto. Primeiro tenta 'PERIODO: MÊS/ANO' e, se não
+    encontrar, usa o dia seguinte a 'SALDO ANT EM DD/MM/AAAA'.
 
+    Returns:
+        tuple | None: (mes, ano) ou None se o texto não tiver o período.
+    """
+    # === 1. Tenta extrair 'PERIODO: MÊS/ANO'
+    match_periodo = re.search(r"PERIODO:\s+([A-ZÇ]+)[/\\](\d{4})", texto, re.IGNORECASE)
     if match_periodo:
         nome_mes, ano_str = match_periodo.groups()
         nome_mes_upper = nome_mes.upper()
-        if nome_mes_upper in meses:
-            mes = meses[nome_mes_upper]
-            ano = int(ano_str)
-    else:
-        # === 2. Tenta fallback via 'SALDO ANT EM DD/MM/AAAA'
-        match_data = re.search(r"SALDO ANT EM\s+(\d{2}/\d{2}/\d{4})", texto_completo)
-        if match_data:
-            data_ant = datetime.strptime(match_data.group(1), "%d/%m/%Y")
-            data_extrato = (data_ant + timedelta(days=1)).replace(day=1)
-            mes = data_extrato.month
-            ano = data_extrato.year
-        else:
-            raise ValueError("Não foi possível determinar o mês/ano do extrato.")
-
-    # === 3. Regex para extrair os dados da tabela
-    padrao = re.compile(
-        r"(?:(\d{2})\s+)?([A-Z].*?)\s{2,}(\d{6})\s+([\d.,\-]+)", re.MULTILINE
-    )
+        if nome_mes_upper in MESES_EXTRATO:
+            return MESES_EXTRATO[nome_mes_upper], int(ano_str)
+        return None
 
-    dia_atual = ""
-    dados = []
+    # === 2. Tenta fallback via 'SALDO ANT EM DD/MM/AAAA'
+    match_data = re.search(r"SALDO ANT EM\s+(\d{2}/\d{2}/\d{4})", texto)
+    if match_data:
+        data_ant = datetime.strptime(match_data.group(1), "%d/%m/%Y")
+        data_extrato = (data_ant + timedelta(days=1)).replace(day=1)
+        return data_extrato.month, data_extrato.year
+    return None
 
-    for dia, descricao, documento, valor in padrao.findall(texto_completo):
-        if dia.strip():
-            dia_atual = dia
-        dados.append([int(dia_atual), descricao.strip(), documento, valor.strip()])
 
-    df = pd.DataFrame(dados, columns=["Dia", "Descricao", "Documento", "Valor"])
-    df["Valor"] = df["Valor"].apply(_valor_to_float_corrigido)
+@cronometrado("dataframe")
+def _montar_extrato(matches: list, mes: int, ano: int, dia_anterior, inicio: int):
+    """
+    Converte um lote de matches de PADRAO_EXTRATO no DataFrame final do extrato.
 
-    # === 4. Cria a coluna 'Data'
-    def construir_data(row):
-        try:
-            return datetime.strptime(f"{row['Dia']:02d}/{mes:02d}/{ano}", "%d/%m/%Y").date()
-        except ValueError:
-            return None
+    Args:
+        matches (list): Tuplas (dia, descricao, documento, valor).
+        mes (int), ano (int): Período do extrato.
+        dia_anterior: Último dia do lote anterior, herdado pelas primeiras linhas sem dia.
+        inicio (int): Posição do primeiro match no documento, usada como índice.
+
+    Returns:
+        tuple: (DataFrame do lote, último dia visto).
+    """
+    df = pd.DataFrame(
+        matches,
+        columns=["Dia", "Descricao", "Documento", "Valor"],
+        index=pd.RangeIndex(inicio, inicio + len(matches)),
+    )
+
+    # Linhas sem dia herdam o dia da última linha que tinha
+    dias = pd.to_numeric(df["Dia"].mask(df["Dia"] == "")).ffill()
+    if dia_anterior is not None:
+        dias = dias.fillna(dia_anterior)
+    ultimo_dia = dias.iloc[-1] if len(dias) else dia_anterior
 
-    df["Data"] = df.apply(construir_data, axis=1)
+    df["Descricao"] = df["Descricao"].str.strip()
+    df["Valor"] = para_centavos(df["Valor"]).astype("int64")
+
+    # Cria a coluna 'Data' (dias inválidos para o mês viram NaT e são descartados)
+    df["Data"] = _construir_datas(dias, mes, ano)
     df = df.dropna(subset=["Data"])
+    df["Data"] = df["Data"].dt.date
 
     # Remove categorias automáticas
     df = df[~df["Descricao"].isin(["APLIC.AUTOM.", "RESGATE AUTOM"])]
 
     # Reorganiza colunas
-    df = df[["Data", "Descricao", "Documento", "Valor"]]
+    return df[["Data", "Descricao", "Documento", "Valor"]], ultimo_dia
 
-    return df
 
+def iterar_extrato_bancario(arquivo_pdf: str, linhas_por_lote: int = LINHAS_POR_LOTE,
+                            backend: str = BACKEND_PADRAO):
+    """
+    Versão em streaming de `parse_extrato_bancario`: lê o PDF uma página por vez e
+    produz lotes de linhas à medida que são encontradas.
+
+    O dia corrente (primeiro grupo da regex) é mantido entre páginas e lotes. Linhas
+    encontradas antes do cabeçalho com o período ficam pendentes até ele aparecer.
+
+    Args:
+        arquivo_pdf (str): Caminho do extrato.
+        linhas_por_lote (int): Quantidade de matches por lote.
+        backend (str): Backend de extração de texto (ver `extracao.BACKENDS`) ou 'auto'.
+
+    Yields:
+        pd.DataFrame: Lotes com as colunas de `parse_extrato_bancario`. Ao menos um
+        lote (possivelmente vazio) é produzido.
+    """
+    backend = _resolver_backend(parse_extrato_bancario, arquivo_pdf, backend)
+    return iterar_extrato_paginas(textos_paginas(arquivo_pdf, backend), linhas_por_lote)
+
+
+def iterar_extrato_paginas(paginas, linhas_por_lote: int = LINHAS_POR_LOTE):
+    """
+    Núcleo de `iterar_extrato_bancario`, sobre o texto já extraído de cada página (ex.:
+    para testar com páginas sintéticas em tests/test_extrato_parse.py).
+    """
+    periodo = None
+    pendentes = []
+    dia_anterior = None
+    inicio = 0
+    produziu = False
+
+    for texto, matches in _matches_por_pagina(paginas, PADRAO_EXTRATO):
+        if periodo is None:
+            periodo = _detectar_periodo(texto)
+        pendentes.extend(matches)
 
+        if periodo is not None and len(pendentes) >= linhas_por_lote:
+            lote, dia_anterior = _montar_extrato(pendentes, *periodo, dia_anterior, inicio)
+            inicio += len(pendentes)
+            pendentes = []
+            produziu = True
+            yield lote
 
+    if periodo is None:
+        raise ValueError("Não foi possível determinar o mês/ano do extrato.")
 
+    if pendentes or not produziu:
+        lote, _ = _montar_extrato(pendentes, *periodo, dia_anterior, inicio)
+        yield lote
 
 
-def parse_recibos_banrisul(arquivo_pdf: str) -> pd.DataFrame:
+def parse_extrato_bancario(arquivo_pdf: str, backend: str = BACKEND_PADRAO) -> pd.DataFrame:
+    """
+    Faz o parse de extratos bancários mensais e retorna um DataFrame com a coluna 'Data' no formato datetime.date.
+    Primeiro tenta extrair o período a partir de 'PERIODO: MÊS/ANO'. Se não encontrar, usa 'SALDO ANT EM DD/MM/AAAA'.
+    """
+    return pd.concat(iterar_extrato_bancario(arquivo_pdf, backend=backend))
+
+
+
+
+
+
+def parse_recibos_banrisul(arquivo_pdf: str, backend: str = BACKEND_PADRAO) -> pd.DataFrame:
     """
     Faz o parse de recibos Banrisul, garantindo captura da última transação mesmo com rodapé.
     """
-    doc = fitz.open(arquivo_pdf)
+    backend = _resolver_backend(parse_recibos_banrisul, arquivo_pdf, backend)
     linhas = []
-    for page in doc:
-        linhas.extend(page.get_text().splitlines())
+    for texto in textos_paginas(arquivo_pdf, backend):
+        linhas.extend(texto.splitlines())
 
     dados = []
     buffer = []
 
-    for linha in linhas:
-        linha = linha.strip()
+    with etapa("regex"):
+        for linha in linhas:
+            linha = linha.strip()
 
-        if re.match(r"\d{2}/\d{2}/\d{4}", linha):
-            if len(buffer) >= 7:
+            if re.match(r"\d{2}/\d{2}/\d{4}", linha):
+                if len(buffer) >= 7:
+                    dados.append(buffer[:7])
+                buffer = [linha]
+            elif linha.startswith("Situação") and len(buffer) >= 7:
                 dados.append(buffer[:7])
-            buffer = [linha]
-        elif linha.startswith("Situação") and len(buffer) >= 7:
-            dados.append(buffer[:7])
-            buffer = []
-        elif linha:
-            buffer.append(linha)
-
-    if len(buffer) >= 7:
-        dados.append(buffer[:7])
+                buffer = []
+            elif linha:
+                buffer.append(linha)
 
-    df = pd.DataFrame(dados, columns=["Data", "NSU", "Situação", "Valor", "Operação", "Conta", "Complemento"])
+        if len(buffer) >= 7:
+            dados.append(buffer[:7])
 
-    df["Valor"] = (
-        df["Valor"]
-        .str.replace("R$", "", regex=False)
-        .str.replace(".", "", regex=False)
-        .str.replace(",", ".", regex=False)
-        .str.strip()
-    )
-    df["Valor"] = pd.to_numeric(df["Valor"], errors="coerce")
-    df = df.dropna(subset=["Valor"])
-    df["Complemento"] = df["Complemento"].str.extract(r"^(.*?)\s*-\s*")
-    return df[:len(df) - 1]
+    with etapa("dataframe") as registro:
+        df = pd.DataFrame(dados, columns=["Data", "NSU", "Situação", "Valor", "Operação", "Conta", "Complemento"])
+
+        # Só são transações os blocos que começam por uma data e têm um valor monetário. O
+        # cabeçalho da consulta e o resumo do rodapé ('Operação', 'Valor', 'Efetuados', N, ...,
+        # em que N é uma contagem) também formam blocos de 7 linhas e ficam de fora.
+        df["Valor"] = para_centavos(df["Valor"])
+        df = df[df["Data"].str.fullmatch(r"\d{2}/\d{2}/\d{4}") & df["Valor"].notna()]
+        df = df.reset_index(drop=True)
+        df["Valor"] = df["Valor"].astype("int64")
+        df["Complemento"] = df["Complemento"].str.extract(r"^(.*?)\s*-\s*")
+        registro["linhas"] = len(df)
+    return df
 
-def parse_pix_extrato_fitz(arquivo_pdf: str) -> pd.DataFrame:
+def iterar_pix_extrato_fitz(arquivo_pdf: str, linhas_por_lote: int = LINHAS_POR_LOTE,
+                            backend: str = BACKEND_PADRAO):
     """
-    Faz o parse de extrato Pix do Banrisul extraído via PyMuPDF.
-    Retorna um DataFrame com colunas: Tipo, Direção, Pessoa, CPF/CNPJ, Data, Valor.
+    Versão em streaming de `parse_pix_extrato_fitz`: normaliza e percorre uma página
+    por vez, carregando para a página seguinte um registro Pix que tenha sido cortado
+    pela quebra de página.
+
+    Yields:
+        pd.DataFrame: Lotes com as colunas de `parse_pix_extrato_fitz`. Ao menos um
+        lote (possivelmente vazio) é produzido.
     """
-    doc = fitz.open(arquivo_pdf)
-    texto = "\n".join([page.get_text() for page in doc])
+    backend = _resolver_backend(parse_pix_extrato_fitz, arquivo_pdf, backend)
+    return iterar_pix_paginas(textos_paginas(arquivo_pdf, backend), linhas_por_lote)
 
-    # Normaliza espaços e quebras de linha
-    texto = re.sub(r'\s+', ' ', texto)
 
-    # Regex robusto para captar as informações
-    padrao = re.compile(
-        r"Pix\s+(Recebido|Enviado)\s+Efetivado\s+(?:de|para)\s+(.+?)\s+(\d{2,3}\.\d{3}\.\d{3}/\d{4}-\d{2}|\d{3}\.\d{3}\.\d{3}-\d{2})\s+(\d{2}/\d{2}/\d{4})\s+R\$\s*([\d.,]+)"
-    )
+def iterar_pix_paginas(paginas, linhas_por_lote: int = LINHAS_POR_LOTE):
+    """
+    Núcleo de `iterar_pix_extrato_fitz`, sobre o texto já extraído de cada página (ex.:
+    para comparar com o texto inteiro em `benchmark verificar-paginas`).
+    """
+    # Normaliza espaços e quebras de linha; páginas são unidas por um único espaço
+    normalizar = lambda texto: re.sub(r'\s+', ' ', texto).strip()
 
     dados = []
-    for tipo, pessoa, cpf_cnpj, data, valor in padrao.findall(texto):
-        valor = float(valor.replace('.', '').replace(',', '.'))
-        direcao = "de" if tipo == "Recebido" else "para"
-        dados.append([tipo, direcao, pessoa.strip(), cpf_cnpj.strip(), data, valor])
-
-    df = pd.DataFrame(dados, columns=["Tipo", "Direcao", "Pessoa", "CPF/CNPJ", "Data", "Valor"])
+    inicio = 0
+    produziu = False
+    for _, matches in _matches_por_pagina(paginas, PADRAO_PIX_FITZ, " ", normalizar):
+        for tipo, pessoa, cpf_cnpj, data, valor in matches:
+            direcao = "de" if tipo == "Recebido" else "para"
+            dados.append([tipo, direcao, pessoa.strip(), cpf_cnpj.strip(), data, valor])
+
+        if len(dados) >= linhas_por_lote:
+            yield _montar_pix_fitz(dados, inicio)
+            inicio += len(dados)
+            dados = []
+            produziu = True
+
+    if dados or not produziu:
+        yield _montar_pix_fitz(dados, inicio)
+
+
+@cronometrado("dataframe")
+def _montar_pix_fitz(dados: list, inicio: int) -> pd.DataFrame:
+    df = pd.DataFrame(
+        dados,
+        columns=["Tipo", "Direcao", "Pessoa", "CPF/CNPJ", "Data", "Valor"],
+        index=pd.RangeIndex(inicio, inicio + len(dados)),
+    )
+    df["Valor"] = para_centavos(df["Valor"]).astype("int64")
     return df
 
-import pdfplumber
+
+def parse_pix_extrato_fitz(arquivo_pdf: str, backend: str = BACKEND_PADRAO) -> pd.DataFrame:
+    """
+    Faz o parse de extrato Pix do Banrisul extraído via PyMuPDF.
+    Retorna um DataFrame com colunas: Tipo, Direção, Pessoa, CPF/CNPJ, Data, Valor (em centavos).
+    """
+    return pd.concat(iterar_pix_extrato_fitz(arquivo_pdf, backend=backend))
 
 def debug_extrair_linhas_pdf(arquivo_pdf: str, salvar_em_arquivo: bool = False):
     """
@@ -159,10 +334,8 @@ def debug_extrair_linhas_pdf(arquivo_pdf: str, salvar_em_arquivo: bool = False):
     """
     linhas = []
 
-    with pdfplumber.open(arquivo_pdf) as doc:
-        for i, page in enumerate(doc.pages):
-            pagina_linhas = page.extract_text().splitlines()
-            linhas.extend(pagina_linhas)
+    for texto in textos_paginas(arquivo_pdf, "pdfplumber"):
+        linhas.extend(texto.splitlines())
 
 
     if salvar_em_arquivo:
@@ -173,53 +346,409 @@ def debug_extrair_linhas_pdf(arquivo_pdf: str, salvar_em_arquivo: bool = False):
 
 
 
-def _valor_to_float_corrigido(v):
-    v = v.replace(".", "").replace(",", ".")
-    if v.endswith("-"):
-        v = "-" + v[:-1]
-    return float(v)
+def _construir_datas(dias: pd.Series, mes: int, ano: int) -> pd.Series:
+    """
+    Monta as datas a partir dos dias e do mês/ano do extrato. Dias inexistentes no mês
+    (ou ausentes) resultam em NaT.
+    """
+    return pd.to_datetime(
+        pd.DataFrame({"year": ano, "month": mes, "day": dias}, index=dias.index),
+        errors="coerce",
+    )
+
+
+# Registro do extrato Pix no texto do pdfplumber: três linhas, com as colunas centralizadas
+# verticalmente intercaladas entre elas. A primeira começa em 'Pix', a segunda em 'Efetivado'
+# e a terceira em 'Recebido'/'Enviado' (registros 'Devolvido' ficam de fora, como no PyMuPDF).
+# Nomes longos quebram em mais linhas: uma antes do 'Pix' (com o 'de'/'para') e uma depois.
+PADRAO_REGISTRO_PIX = re.compile(
+    r"^(?:(?P<antes>(?:de|para)\b[^\n]*)\n)?"
+    r"Pix(?P<linha1>[^\n]*)\nEfetivado(?P<linha2>[^\n]*)\n(?P<direcao>Recebido|Enviado)\b(?P<linha3>[^\n]*)"
+    r"(?(antes)\n(?!Pix\b)(?P<depois>[^\n]*))",
+    re.MULTILINE,
+)
+
+# Campos dentro de um registro, na ordem das linhas. O CNPJ pode vir quebrado: a primeira
+# parte ('55.333.171/0001-') numa linha e os dígitos verificadores em outra.
+PADRAO_CAMPOS_PIX = re.compile(
+    r"(?P<data>\d{2}/\d{2}/\d{4})"
+    r"|(?P<documento>\d{2,3}\.\d{3}\.\d{3}/\d{4}-(?:\d{2})?|\d{3}\.\d{3}\.\d{3}-\d{2})(?!\S)"
+    r"|(?P<valor>\d{1,3}(?:\.\d{3})*,\d{2})(?!\S)"
+    r"|(?P<moeda>R\$)"
+    r"|(?P<palavra>\S+)"
+)
+
+
+def _campos_registro_pix(registro) -> list:
+    """
+    Separa nome, documento, data e valor de um registro casado por PADRAO_REGISTRO_PIX.
+
+    Returns:
+        list: [direcao, nome, documento, data, valor].
+    """
+    partes = ("antes", "linha1", "linha2", "linha3", "depois")
+    corpo = " ".join(registro[parte] or "" for parte in partes)
+    nome = []
+    documento = data = valor = ""
+    for campo in PADRAO_CAMPOS_PIX.finditer(corpo):
+        tipo = campo.lastgroup
+        if tipo == "palavra":
+            nome.append(campo.group())
+        elif tipo == "documento":
+            documento = campo.group()
+        elif tipo == "data":
+            data = campo.group()
+        elif tipo == "valor":
+            valor = campo.group()
+
+    # Dígitos verificadores do CNPJ quebrado: o último par de dígitos solto depois dele
+    if documento.endswith("-"):
+        for i in range(len(nome) - 1, -1, -1):
+            if len(nome[i]) == 2 and nome[i].isdigit():
+                documento += nome.pop(i)
+                break
+
+    if nome and nome[0] in ("de", "para"):
+        nome = nome[1:]
+
+    return [registro["direcao"], " ".join(nome), documento, data, valor]
+
+
+@cronometrado("regex")
+def ler_registros_pix(texto: str) -> list:
+    """
+    Percorre o texto do extrato (páginas do pdfplumber unidas por '\\n') uma única vez e
+    devolve as linhas ['Pix', direcao, nome, documento, data, valor] de cada registro
+    (o valor ainda como texto, '' quando o registro não tem).
+    """
+    return [["Pix"] + _campos_registro_pix(registro) for registro in PADRAO_REGISTRO_PIX.finditer(texto)]
 
-def moeda_para_float(valor):
-    return float(valor.replace("R$", "").replace(".", "").replace(",", ".").strip())
 
-def parse_pix_extrato_pdfplumber(caminho_pdf: str) -> pd.DataFrame:
+def parse_pix_extrato_pdfplumber(caminho_pdf: str, backend: str = "pdfplumber") -> pd.DataFrame:
     """
     Faz o parse de um extrato Pix do Banrisul em formato PDF usando pdfplumber.
 
+    O texto é percorrido uma única vez (PADRAO_REGISTRO_PIX.finditer); a direção vem da
+    terceira linha do próprio registro.
+
     Args:
         caminho_pdf (str): Caminho para o arquivo PDF.
+        backend (str): Backend de extração de texto. O padrão é o pdfplumber, que é a
+            referência deste parser no modo 'auto'.
 
     Returns:
-        pd.DataFrame: DataFrame com colunas: ['Tipo', 'Direcao', 'Nome', 'Documento', 'Data', 'Valor']
+        pd.DataFrame: DataFrame com colunas: ['Tipo', 'Direcao', 'Nome', 'Documento', 'Data', 'Valor'],
+        com o Valor em centavos ('Int64', <NA> nos registros sem valor).
     """
-    linhas = []
+    backend = _resolver_backend(parse_pix_extrato_pdfplumber, caminho_pdf, backend, referencia="pdfplumber")
+    # Cada página é extraída uma única vez (antes extract_text() era chamado duas vezes)
+    texto = "\n".join(texto for texto in textos_paginas(caminho_pdf, backend) if texto)
 
-    with pdfplumber.open(caminho_pdf) as pdf:
-        texto = "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
+    df = pd.DataFrame(ler_registros_pix(texto), columns=["Tipo", "Direcao", "Nome", "Documento", "Data", "Valor"])
+    df["Valor"] = para_centavos(df["Valor"])
+    return df
 
-    # Junta linhas quebradas no meio
-    texto = texto.replace("\n", " ")
 
-    # Padrao para capturar as operações Pix
-    padrao = re.compile(
-        r"(Pix)\s+(?:de|para)?\s*(.*?)\s+(\d{2,3}[.\d]{3,}/\d{4}-\d{2}|\d{3}[.\d]{3}-\d{2})?\s*R?\$?\s*Efetivado\s+(\d{2}/\d{2}/\d{4})\s*(?:Recebido|Enviado)?\s*(.*?)?\s*([R\$ ]*[\d.,]+)",
-        flags=re.IGNORECASE
-    )
+# === Tabela do extrato Pix por coordenadas ===
+# A tabela é montada a partir das palavras do PyMuPDF (get_text("words")), sem a detecção
+# de tabela do pdfplumber. Os limites entre as colunas são calculados no primeiro
+# cabeçalho encontrado e reaproveitados nos documentos de mesmo layout.
 
-    for match in padrao.findall(texto):
-        tipo, nome, documento, data, complemento, valor = match
-        direcao = "Recebido" if "Recebido" in texto[texto.find(match[0]):texto.find(match[0])+100] else "Enviado"
+COLUNAS_TABELA_PIX = ["Operação", "Situação", "Pagador/Recebedor", "CPF/CNPJ", "Data", "Valor"]
 
-        nome_completo = (nome + " " + complemento).strip()
-        valor = valor.replace("R$", "").replace(" ", "").replace(".", "").replace(",", ".")
-        try:
-            valor_float = float(valor)
-        except ValueError:
-            valor_float = None
+PADRAO_DATA_PIX = re.compile(r"\d{2}/\d{2}/\d{4}")
+
+# Layout do documento -> limites (x) entre as colunas da tabela
+_limites_por_layout = {}
+
+
+def _cabecalho_tabela_pix(palavras: list):
+    """
+    Procura a linha do cabeçalho da tabela (as seis colunas na mesma altura).
+
+    Returns:
+        list | None: Palavras do cabeçalho, na ordem de COLUNAS_TABELA_PIX.
+    """
+    linhas = {}
+    for palavra in palavras:
+        if palavra[4] in COLUNAS_TABELA_PIX:
+            linhas.setdefault(round(palavra[1]), {}).setdefault(palavra[4], palavra)
+    for linha in linhas.values():
+        if len(linha) == len(COLUNAS_TABELA_PIX):
+            return [linha[coluna] for coluna in COLUNAS_TABELA_PIX]
+    return None
+
+
+def _limites_colunas_pix(page, cabecalho: list):
+    """
+    Calcula os limites (x) entre as colunas a partir das bordas das células do cabeçalho,
+    desenhadas no PDF. Os nomes longos são centralizados na célula e passam da largura do
+    título da coluna, por isso as bordas são mais confiáveis que o texto do cabeçalho.
+    Sem as bordas, usa o meio do espaço entre os títulos das colunas.
+    """
+    centro_y = sum(p[1] + p[3] for p in cabecalho) / (2 * len(cabecalho))
+
+    retangulos = [desenho["rect"] for desenho in page.get_drawings()]
+    celulas = []
+    for palavra in cabecalho:
+        x = (palavra[0] + palavra[2]) / 2
+        contem = [r for r in retangulos if r.x0 <= x <= r.x1 and r.y0 <= centro_y <= r.y1]
+        if not contem:
+            break
+        celulas.append(min(contem, key=lambda r: r.width * r.height))
+
+    if len(celulas) == len(cabecalho):
+        return np.array([(a.x1 + b.x0) / 2 for a, b in zip(celulas, celulas[1:])])
+    return np.array([(a[2] + b[0]) / 2 for a, b in zip(cabecalho, cabecalho[1:])])
+
+
+@cronometrado("regex")
+def _linhas_tabela_pix(palavras: list, limites) -> list:
+    """
+    Agrupa as palavras de uma página em células (registro x coluna).
+
+    Cada registro ocupa duas ou mais linhas de texto, com a data centralizada na vertical;
+    as datas da coluna 'Data' servem de âncora e cada palavra vai para a âncora mais próxima.
+
+    Returns:
+        list: Uma lista com o texto das seis colunas para cada registro.
+    """
+    caixas = np.array([p[:4] for p in palavras], dtype=float)
+    textos = [p[4] for p in palavras]
+    coluna = np.searchsorted(limites, (caixas[:, 0] + caixas[:, 2]) / 2)
+    centro_y = (caixas[:, 1] + caixas[:, 3]) / 2
+
+    ancoras = np.sort(centro_y[[
+        i for i in np.flatnonzero(coluna == 4) if PADRAO_DATA_PIX.fullmatch(textos[i])
+    ]])
+    if len(ancoras) == 0:
+        return []
+
+    # Palavras a mais de meio registro da âncora (rodapé, títulos) ficam de fora
+    alcance = np.median(np.diff(ancoras)) / 2 if len(ancoras) > 1 else 16.0
+
+    abaixo = np.minimum(np.searchsorted(ancoras, centro_y), len(ancoras) - 1)
+    acima = np.maximum(abaixo - 1, 0)
+    linha = np.where(np.abs(centro_y - ancoras[acima]) <= np.abs(centro_y - ancoras[abaixo]), acima, abaixo)
+    dentro = np.abs(centro_y - ancoras[linha]) <= alcance
+
+    registros = [[[] for _ in COLUNAS_TABELA_PIX] for _ in ancoras]
+    for i in np.lexsort((caixas[:, 0], caixas[:, 1], coluna, linha)):
+        if dentro[i]:
+            registros[linha[i]][coluna[i]].append(textos[i])
+
+    # Fragmentos do CPF/CNPJ quebrado ('55.333.171/0001-' + '24') são unidos sem espaço
+    return [
+        [" ".join(partes) if c != 3 else "".join(partes) for c, partes in enumerate(registro)]
+        for registro in registros
+    ]
+
+
+def extrair_tabela_pix(arquivo_pdf: str) -> pd.DataFrame:
+    """
+    Extrai a tabela do extrato Pix do Banrisul (Operação, Situação, Pagador/Recebedor,
+    CPF/CNPJ, Data, Valor) pelas coordenadas das palavras, já com os tipos da base:
+    Data em datetime64, Valor em centavos (int64) e textos sem quebras de linha.
+    """
+    import fitz  # PyMuPDF
+
+    registros = []
+    with fitz.open(arquivo_pdf) as doc:
+        layout = layout_documento_aberto(doc)
+        for page in doc:
+            with etapa("extracao"):
+                palavras = page.get_text("words")
+            cabecalho = _cabecalho_tabela_pix(palavras)
+            if cabecalho is not None:
+                if layout not in _limites_por_layout:
+                    with etapa("extracao"):
+                        _limites_por_layout[layout] = _limites_colunas_pix(page, cabecalho)
+                fim_cabecalho = max(p[3] for p in cabecalho)
+                palavras = [p for p in palavras if p[1] > fim_cabecalho]
+            elif layout not in _limites_por_layout:
+                continue
+
+            if palavras:
+                registros.extend(_linhas_tabela_pix(palavras, _limites_por_layout[layout]))
+
+    with etapa("dataframe") as registro:
+        tabela = pd.DataFrame(registros, columns=COLUNAS_TABELA_PIX)
+        registro["linhas"] = len(tabela)
+        return pd.DataFrame({
+            "Operação": tabela["Operação"].astype("category"),
+            "Situação": tabela["Situação"].astype("category"),
+            "Pagador/Recebedor": tabela["Pagador/Recebedor"].astype(object),
+            "CPF/CNPJ": tabela["CPF/CNPJ"].astype(object),
+            "Data": pd.to_datetime(tabela["Data"], format="%d/%m/%Y"),
+            "Valor": para_centavos(tabela["Valor"]).astype("int64"),
+        })
+
+# === Cache de parse em disco ===
+# Os DataFrames resultantes dos parsers são salvos em Parquet, com chave formada pelo
+# hash do conteúdo do arquivo e pela assinatura do parser. Enquanto o arquivo de origem
+# não muda, o resultado é lido do disco sem abrir o PDF com fitz/pdfplumber.
+
+CACHE_DIR = "app/data/cache"
+CACHE_LIMITE_BYTES = 256 * 1024 * 1024
+
+# Incrementar a versão força a invalidação do cache de um parser mesmo quando só
+# funções auxiliares mudaram (mudanças no corpo do parser já alteram a assinatura).
+VERSOES_PARSER = {
+    "parse_extrato_bancario": 2,
+    "parse_recibos_banrisul": 3,
+    "parse_pix_extrato_fitz": 2,
+    "parse_pix_extrato_pdfplumber": 3,
+    "extrair_tabela_pix": 2,
+    "read_csv": 1,
+    "ler_pix": 1,
+}
+
+
+def hash_arquivo(caminho: str, tamanho_bloco: int = 1024 * 1024) -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos.
+    """
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
 
-        linhas.append([tipo, direcao, nome_completo, documento, data, valor_float])
 
-    df = pd.DataFrame(linhas, columns=["Tipo", "Direcao", "Nome", "Documento", "Data", "Valor"])
+@lru_cache(maxsize=None)
+def assinatura_parser(parser) -> str:
+    """
+    Retorna a assinatura de um parser: nome, versão declarada em VERSOES_PARSER e hash
+    do código-fonte do parser e das funções e regex do mesmo módulo que ele usa. Alterar
+    uma regex muda a assinatura e, com isso, as entradas antigas do cache deixam de ser usadas.
+    """
+    nome = parser.__name__
+    fontes = "\n".join(_fontes_dependencias(parser, set()))
+    conteudo = f"{nome}:{VERSOES_PARSER.get(nome, 0)}:{fontes}"
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+def _fontes_dependencias(funcao, vistos: set) -> list:
+    """
+    Coleta o código-fonte de `funcao` e, recursivamente, das funções e regex compiladas
+    do mesmo módulo referenciadas por ela.
+    """
+    # Funções com @cronometrado: vale o código (e o módulo) da função original
+    funcao = inspect.unwrap(funcao)
+    if funcao in vistos:
+        return []
+    vistos.add(funcao)
+    try:
+        partes = [inspect.getsource(funcao)]
+    except (OSError, TypeError):
+        return []
+
+    codigos = [funcao.__code__]
+    nomes = set()
+    while codigos:
+        codigo = codigos.pop()
+        nomes.update(codigo.co_names)
+        codigos.extend(c for c in codigo.co_consts if inspect.iscode(c))
+
+    for nome in sorted(nomes):
+        valor = funcao.__globals__.get(nome)
+        if isinstance(valor, re.Pattern):
+            partes.append(valor.pattern)
+        elif inspect.isfunction(valor) and valor.__module__ == funcao.__module__:
+            partes.extend(_fontes_dependencias(valor, vistos))
+    return partes
+
+
+def _caminho_cache(parser, hash_conteudo: str, diretorio: str) -> str:
+    return os.path.join(diretorio, f"{parser.__name__}-{assinatura_parser(parser)}-{hash_conteudo}.parquet")
+
+
+def parse_com_cache(parser, caminho: str, diretorio: str = CACHE_DIR,
+                    limite_bytes: int = CACHE_LIMITE_BYTES) -> pd.DataFrame:
+    """
+    Executa `parser(caminho)` usando o cache em disco.
+
+    Args:
+        parser: Função de parse (ex.: parse_extrato_bancario, pd.read_csv).
+        caminho (str): Arquivo de origem.
+        diretorio (str): Diretório onde os Parquets do cache são gravados.
+        limite_bytes (int): Tamanho máximo do cache; as entradas menos usadas são removidas.
+
+    Returns:
+        pd.DataFrame: Resultado do parser, lido do cache quando disponível.
+    """
+    arquivo_cache = _caminho_cache(parser, hash_arquivo(caminho), diretorio)
+
+    if os.path.exists(arquivo_cache):
+        try:
+            df = pd.read_parquet(arquivo_cache)
+            # Atualiza o mtime para que a entrada conte como usada recentemente (LRU)
+            os.utime(arquivo_cache)
+            return df
+        except Exception:
+            # Entrada corrompida: descarta e refaz o parse
+            os.remove(arquivo_cache)
+
+    df = parser(caminho)
+
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = f"{arquivo_cache}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(temporario)
+    os.replace(temporario, arquivo_cache)
+
+    _aplicar_limite_cache(diretorio, limite_bytes)
     return df
+
+
+def _aplicar_limite_cache(diretorio: str, limite_bytes: int):
+    """
+    Remove as entradas usadas há mais tempo até o cache caber em `limite_bytes`.
+    """
+    entradas = []
+    for nome in os.listdir(diretorio):
+        if not nome.endswith(".parquet"):
+            continue
+        caminho = os.path.join(diretorio, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        entradas.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+
+
+def invalidar_cache(parser=None, diretorio: str = CACHE_DIR) -> int:
+    """
+    Remove entradas do cache.
+
+    Args:
+        parser: Se informado, remove apenas as entradas desse parser (de qualquer versão).
+            Se None, limpa o cache inteiro.
+        diretorio (str): Diretório do cache.
+
+    Returns:
+        int: Quantidade de arquivos removidos.
+    """
+    if not os.path.isdir(diretorio):
+        return 0
+
+    prefixo = f"{parser.__name__}-" if parser is not None else ""
+    removidos = 0
+    for nome in os.listdir(diretorio):
+        if nome.endswith(".parquet") and nome.startswith(prefixo):
+            os.remove(os.path.join(diretorio, nome))
+            removidos += 1
+    return removidos
+
+
 if __name__ == "__main__":
     debug_extrair_linhas_pdf('../data/pix/abril25.pdf', True)
\ No newline at end of file
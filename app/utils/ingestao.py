@@ -0,0 +1,81 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.extrato_parse import (
+    parse_com_cache,
+    parse_extrato_bancario,
+    parse_recibos_banrisul,
+)
+
+# Ordem dos arquivos em cada entrada do dicionário de meses: [extrato, boleto, pix]
+FONTES = ["extrato", "boleto", "pix"]
+
+
+
+def ler_pix(caminho: str) -> pd.DataFrame:
+    """
+    Lê a tabela de Pix de um mês: o Parquet tipado gerado por `conversor_pix` ou o CSV
+    antigo do `teste2.get_csv`.
+    """
+    if caminho.lower().endswith(".parquet"):
+        return pd.read_parquet(caminho)
+    return pd.read_csv(caminho)
+
+
+PARSERS_POR_FONTE = {
+    "extrato": parse_extrato_bancario,
+    "boleto": parse_recibos_banrisul,
+    "pix": ler_pix,
+}
+
+
+def _parse_arquivo(fonte: str, caminho: str, usar_cache: bool) -> pd.DataFrame:
+    """
+    Executa o parser da fonte informada. Fica no nível do módulo para poder ser
+    enviada aos processos do pool.
+    """
+    parser = PARSERS_POR_FONTE[fonte]
+    if usar_cache:
+        return parse_com_cache(parser, caminho)
+    return parser(caminho)
+
+
+def parse_arquivos(tarefas: list, max_workers: int = None, usar_cache: bool = True) -> list:
+    """
+    Faz o parse de uma lista de arquivos em paralelo.
+
+    Args:
+        tarefas (list): Tuplas (mes, fonte, caminho).
+        max_workers (int): Quantidade de processos. None usa a quantidade de CPUs;
+            1 executa tudo no processo atual, sem pool.
+        usar_cache (bool): Se True, passa pelo cache em disco de `parse_com_cache`.
+
+    Returns:
+        list: Tuplas (mes, fonte, caminho, df, erro), na ordem das tarefas. Quando o
+        parse falha, df é None e erro traz a mensagem.
+    """
+    resultados = []
+
+    if max_workers == 1:
+        for mes, fonte, caminho in tarefas:
+            try:
+                resultados.append((mes, fonte, caminho, _parse_arquivo(fonte, caminho, usar_cache), None))
+            except Exception as e:
+                resultados.append((mes, fonte, caminho, None, str(e)))
+        return resultados
+
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(tarefas) or 1)) as pool:
+        futuros = [
+            (mes, fonte, caminho, pool.submit(_parse_arquivo, fonte, caminho, usar_cache))
+            for mes, fonte, caminho in tarefas
+        ]
+        # Percorre na ordem de submissão para manter a ordem dos meses
+        for mes, fonte, caminho, futuro in futuros:
+            try:
+                resultados.append((mes, fonte, caminho, futuro.result(), None))
+            except Exception as e:
+                resultados.append((mes, fonte, caminho, None, str(e)))
+    return resultados
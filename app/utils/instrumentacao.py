@@ -0,0 +1,226 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# === Medição de etapas ===
+# Uma execução (um rerun do Streamlit, uma repetição do benchmark) agrupa o tempo gasto em
+# cada etapa. O tempo de uma etapa é exclusivo: enquanto a regex puxa a próxima página do
+# PDF, o tempo conta só para a extração. Fora de uma execução as etapas não medem nada.
+#
+# Etapas dos parsers (utils.extrato_parse / utils.extracao): 'extracao', 'regex' e 'dataframe'.
+
+# Execuções mantidas em memória para a página de desempenho
+LIMITE_EXECUCOES = 50
+
+# Log estruturado: uma linha JSON por execução
+CAMINHO_LOG = "app/data/logs/desempenho.jsonl"
+LIMITE_LOG_BYTES = 5 * 1024 * 1024
+
+_local = threading.local()
+_execucoes = deque(maxlen=LIMITE_EXECUCOES)
+_trava = threading.Lock()
+_logger = None
+
+
+def iniciar_execucao(nome: str):
+    """
+    Começa a medir uma execução na thread atual. Uma execução anterior que não foi
+    finalizada (ex.: interrompida por st.rerun) é descartada.
+    """
+    _local.execucao = {
+        "nome": nome,
+        "inicio": datetime.now().isoformat(timespec="seconds"),
+        "etapas": {},
+    }
+    _local.pilha = []
+    _local.marca = time.perf_counter()
+    _local.comeco = _local.marca
+
+
+def finalizar_execucao(registrar: bool = True) -> dict:
+    """
+    Encerra a execução da thread atual.
+
+    Args:
+        registrar (bool): Guarda a execução na lista das recentes e no log em CAMINHO_LOG.
+
+    Returns:
+        dict: {'nome', 'inicio', 'total_s', 'etapas'}; cada etapa traz segundos, chamadas,
+        linhas, acertos e falhas de cache. None se não havia execução em andamento.
+    """
+    execucao = getattr(_local, "execucao", None)
+    if execucao is None:
+        return None
+    _local.execucao = None
+
+    execucao["total_s"] = round(time.perf_counter() - _local.comeco, 6)
+    for dados in execucao["etapas"].values():
+        dados["segundos"] = round(dados["segundos"], 6)
+
+    if registrar:
+        with _trava:
+            _execucoes.append(execucao)
+        _log().info(json.dumps(execucao, ensure_ascii=False))
+    return execucao
+
+
+def execucoes_recentes(n: int = LIMITE_EXECUCOES, nome: str = None) -> list:
+    """
+    Últimas `n` execuções registradas neste processo (da mais antiga para a mais recente),
+    opcionalmente só as de um nome.
+    """
+    with _trava:
+        execucoes = [e for e in _execucoes if nome is None or e["nome"] == nome]
+    return execucoes[-n:]
+
+
+def ler_log(n: int = LIMITE_EXECUCOES, caminho: str = CAMINHO_LOG) -> list:
+    """
+    Últimas `n` execuções gravadas no log (útil depois de reiniciar o app).
+    """
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8") as f:
+        linhas = deque(f, maxlen=n)
+    return [json.loads(linha) for linha in linhas if linha.strip()]
+
+
+def _log() -> logging.Logger:
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("desempenho")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        os.makedirs(os.path.dirname(CAMINHO_LOG), exist_ok=True)
+        handler = RotatingFileHandler(CAMINHO_LOG, maxBytes=LIMITE_LOG_BYTES, backupCount=1, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def _entrar(nome: str):
+    agora = time.perf_counter()
+    etapas = _local.execucao["etapas"]
+    if _local.pilha:
+        etapas[_local.pilha[-1]["nome"]]["segundos"] += agora - _local.marca
+    dados = etapas.setdefault(nome, {"segundos": 0.0, "chamadas": 0, "linhas": 0, "acertos": 0, "falhas": 0})
+    dados["chamadas"] += 1
+    registro = {"nome": nome, "linhas": None, "cache": None}
+    _local.pilha.append(registro)
+    _local.marca = agora
+    return registro
+
+
+def _sair():
+    agora = time.perf_counter()
+    registro = _local.pilha.pop()
+    dados = _local.execucao["etapas"][registro["nome"]]
+    dados["segundos"] += agora - _local.marca
+    if registro["linhas"] is not None:
+        dados["linhas"] += registro["linhas"]
+    if registro["cache"] == "acerto":
+        dados["acertos"] += 1
+    elif registro["cache"] == "falha":
+        dados["falhas"] += 1
+    _local.marca = agora
+
+
+def _ativa() -> bool:
+    return getattr(_local, "execucao", None) is not None
+
+
+@contextmanager
+def etapa(nome: str, cache: bool = False):
+    """
+    Mede o bloco como a etapa `nome` da execução atual.
+
+    O dicionário devolvido aceita 'linhas' (quantidade de linhas produzidas pela etapa).
+    Com cache=True a etapa conta um acerto de cache, a menos que `registrar_falha_cache`
+    seja chamada dentro dela (ex.: no corpo de uma função com st.cache_data, que só roda
+    quando o valor não está em cache).
+
+        with etapa("carregar_pix", cache=True) as registro:
+            df = carregar_pix(...)
+            registro["linhas"] = len(df)
+    """
+    if not _ativa():
+        yield {}
+        return
+    registro = _entrar(nome)
+    if cache:
+        registro["cache"] = "acerto"
+    try:
+        yield registro
+    finally:
+        _sair()
+
+
+def registrar_falha_cache():
+    """
+    Marca como falha de cache a etapa com cache=True mais interna em andamento.
+    """
+    if not _ativa():
+        return
+    for registro in reversed(_local.pilha):
+        if registro["cache"] is not None:
+            registro["cache"] = "falha"
+            return
+
+
+def _contar_linhas(resultado):
+    # DataFrames (e tuplas que começam com um) contam as linhas; o resto não conta
+    if isinstance(resultado, tuple) and resultado:
+        resultado = resultado[0]
+    forma = getattr(resultado, "shape", None)
+    return forma[0] if forma else None
+
+
+def cronometrado(nome: str):
+    """
+    Decorador: mede cada chamada da função como a etapa `nome`. Em funções geradoras
+    mede o tempo de cada item produzido, sem contar o tempo de quem consome o gerador.
+    """
+    def decorador(funcao):
+        if inspect.isgeneratorfunction(funcao):
+            @functools.wraps(funcao)
+            def gerador(*args, **kwargs):
+                if not _ativa():
+                    yield from funcao(*args, **kwargs)
+                    return
+                itens = funcao(*args, **kwargs)
+                while True:
+                    if not _ativa():
+                        yield from itens
+                        return
+                    _entrar(nome)
+                    try:
+                        item = next(itens)
+                    except StopIteration:
+                        return
+                    finally:
+                        _sair()
+                    yield item
+            return gerador
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativa():
+                return funcao(*args, **kwargs)
+            registro = _entrar(nome)
+            try:
+                resultado = funcao(*args, **kwargs)
+                registro["linhas"] = _contar_linhas(resultado)
+                return resultado
+            finally:
+                _sair()
+        return medida
+    return decorador
@@ -0,0 +1,188 @@
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from utils.agregados import carregar_agregados, garantir_agregados, resumir
+from utils.instrumentacao import etapa, finalizar_execucao, iniciar_execucao
+from utils.manifesto import DIRETORIOS_FONTES, escolher_arquivos, falhas, imprimir_relatorio, sincronizar
+
+# === Processamento em lote, sem Streamlit ===
+# Importa uma árvore de diretórios de extratos, boletos e Pix para uma base Parquet própria
+# e grava as tabelas de resumo do dashboard (utils.agregados.resumir) em Parquet, CSV ou
+# JSON. A base fica entre execuções: rodando de novo (ex.: agendado), só os arquivos novos
+# ou modificados passam pelo parse, em paralelo, como na sincronização do app.
+#
+# Os arquivos de cada fonte ficam em pastas com o nome usado em app/data (extratos/,
+# boletos/, pix/), em qualquer nível da árvore (ex.: 2024/extratos/abril24.pdf). O mês
+# vem do nome do arquivo ou, nos extratos, do cabeçalho (ver utils.manifesto).
+
+# Nome da pasta -> fonte
+PASTAS_FONTES = {os.path.basename(pasta): fonte for fonte, (pasta, _) in DIRETORIOS_FONTES.items()}
+
+FORMATOS = ["parquet", "csv", "json"]
+
+
+def listar_arvore(raiz: str, ignorar: list = ()) -> list:
+    """
+    Lista (fonte, caminho) dos arquivos de origem em toda a árvore de `raiz`. Pastas
+    ocultas e as de `ignorar` (ex.: a própria base e a saída) não são percorridas.
+    """
+    ignorar = {os.path.abspath(p) for p in ignorar}
+    arquivos = []
+    for pasta, subpastas, nomes in os.walk(raiz):
+        subpastas[:] = sorted(
+            d for d in subpastas
+            if not d.startswith(".") and os.path.abspath(os.path.join(pasta, d)) not in ignorar
+        )
+        fonte = PASTAS_FONTES.get(os.path.basename(pasta).lower())
+        if fonte is None:
+            continue
+        extensoes = DIRETORIOS_FONTES[fonte][1]
+        arquivos.extend((fonte, os.path.join(pasta, nome)) for nome in escolher_arquivos(nomes, extensoes))
+    return arquivos
+
+
+def gravar_tabela(df: pd.DataFrame, caminho: str, formato: str):
+    # Escreve em um temporário e troca de uma vez, para não deixar um resumo pela metade
+    temporario = os.path.join(os.path.dirname(caminho), f".{os.path.basename(caminho)}.{os.getpid()}.tmp")
+    if formato == "parquet":
+        df.to_parquet(temporario, index=False)
+    elif formato == "csv":
+        df.to_csv(temporario, index=False)
+    elif formato == "json":
+        df.to_json(temporario, orient="records", force_ascii=False, indent=2)
+    else:
+        raise ValueError(f"Formato desconhecido: {formato}")
+    os.replace(temporario, caminho)
+
+
+def processar(raiz: str, saida: str, base: str = None, formatos: list = ("parquet",), meses: list = None,
+              por_mes: bool = False, max_workers: int = None) -> dict:
+    """
+    Importa a árvore `raiz` para a base e grava as tabelas de resumo em `saida`.
+
+    Args:
+        raiz (str): Diretório com as pastas extratos/, boletos/ e pix/ (em qualquer nível).
+        saida (str): Diretório dos resumos (um arquivo por tabela e formato).
+        base (str): Base Parquet da árvore. Padrão: <saida>/base.
+        formatos (list): Entre FORMATOS.
+        meses (list): Meses ('AAAA-MM') considerados nos resumos. None = todos da base.
+        por_mes (bool): Resumos por contraparte separados por mês.
+        max_workers (int): Processos usados no parse; 1 executa tudo no processo atual.
+
+    Returns:
+        dict: {'relatorio' (o de `sincronizar`), 'tabelas' (nome -> DataFrame),
+        'arquivos' (caminhos gravados), 'bytes_importados', 'falhas' (caminho -> erro dos
+        arquivos que estão fora da base por falharem, nesta ou em outra execução)}.
+    """
+    base = base or os.path.join(saida, "base")
+
+    with etapa("listar") as registro:
+        arquivos = listar_arvore(raiz, ignorar=[base, saida])
+        registro["linhas"] = len(arquivos)
+
+    with etapa("importar") as registro:
+        relatorio = sincronizar(diretorio=base, max_workers=max_workers, arquivos=arquivos)
+        importados = relatorio.loc[relatorio["Situação"] == "importado", "Arquivo"]
+        registro["linhas"] = len(importados)
+
+    with etapa("agregados"):
+        garantir_agregados(base)
+
+    with etapa("carregar_cubo") as registro:
+        cubo = carregar_agregados(meses, base)
+        registro["linhas"] = len(cubo)
+
+    with etapa("resumir") as registro:
+        tabelas = resumir(cubo, por_mes)
+        registro["linhas"] = sum(len(df) for df in tabelas.values())
+
+    gravados = []
+    with etapa("gravar") as registro:
+        os.makedirs(saida, exist_ok=True)
+        for nome, df in tabelas.items():
+            for formato in formatos:
+                caminho = os.path.join(saida, f"{nome}.{formato}")
+                gravar_tabela(df, caminho, formato)
+                gravados.append(caminho)
+        registro["linhas"] = len(gravados)
+
+    return {
+        "relatorio": relatorio,
+        "tabelas": tabelas,
+        "arquivos": gravados,
+        "bytes_importados": sum(os.path.getsize(c) for c in importados),
+        "falhas": falhas(base),
+    }
+
+
+# Unidade da quantidade registrada em cada etapa (as etapas dos parsers, que só aparecem
+# com --workers 1, contam linhas)
+UNIDADES = {
+    "listar": "arquivos",
+    "importar": "arquivos",
+    "agregados": "",
+    "carregar_cubo": "linhas",
+    "resumir": "linhas",
+    "gravar": "arquivos",
+}
+
+
+def imprimir_perfil(execucao: dict, bytes_importados: int):
+    """
+    Tempo e vazão de cada etapa do processamento.
+    """
+    total = execucao["total_s"]
+    print(f"\nPerfil ({total:.3f}s no total):")
+    for nome, dados in sorted(execucao["etapas"].items(), key=lambda item: -item[1]["segundos"]):
+        segundos = dados["segundos"]
+        unidade = UNIDADES.get(nome, "linhas")
+        vazao = f"{dados['linhas'] / segundos:>12,.0f} {unidade}/s" if unidade and segundos and dados["linhas"] else ""
+        print(f"  {nome:<15} {segundos:>8.3f}s {100 * segundos / total if total else 0:>5.1f}%  "
+              f"{dados['linhas']:>9,} {unidade:<9} {vazao}")
+    importar = execucao["etapas"].get("importar", {}).get("segundos")
+    if bytes_importados and importar:
+        print(f"  importação: {bytes_importados / 1e6 / importar:.2f} MB/s de arquivos de origem")
+
+
+def main():
+    # Uso, a partir da raiz do repositório:
+    #   PYTHONPATH=app python -m utils.lote /dados/extratos-banrisul --saida /dados/resumos
+    #   PYTHONPATH=app python -m utils.lote app/data --saida /tmp/resumos --formatos parquet csv json --por-mes
+    #   PYTHONPATH=app python -m utils.lote app/data --saida /tmp/resumos --workers 1 --profile
+    parser = argparse.ArgumentParser(description="Importa uma árvore de extratos, boletos e Pix e grava os resumos.")
+    parser.add_argument("raiz", help="Diretório com pastas extratos/, boletos/ e pix/ em qualquer nível")
+    parser.add_argument("--saida", required=True, help="Diretório dos resumos")
+    parser.add_argument("--base", help="Base Parquet da árvore, mantida entre execuções (padrão: <saida>/base)")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=["parquet"])
+    parser.add_argument("--meses", nargs="+", help="Meses (AAAA-MM) dos resumos (padrão: todos)")
+    parser.add_argument("--por-mes", action="store_true", help="Resumos por contraparte separados por mês")
+    parser.add_argument("--workers", type=int, default=None, help="Processos usados no parse")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mostra tempo e vazão por etapa (com --workers 1 inclui as etapas dos parsers)")
+    args = parser.parse_args()
+
+    iniciar_execucao("lote")
+    resultado = processar(args.raiz, args.saida, args.base, args.formatos, args.meses, args.por_mes, args.workers)
+    execucao = finalizar_execucao(registrar=False)
+
+    imprimir_relatorio(resultado["relatorio"])
+    for nome, df in resultado["tabelas"].items():
+        print(f"✔ {nome}: {len(df)} linhas")
+    print(f"✔ {len(resultado['arquivos'])} arquivos gravados em {args.saida}")
+    if args.profile:
+        imprimir_perfil(execucao, resultado["bytes_importados"])
+
+    # Falhas de execuções anteriores: o arquivo só é tentado de novo quando muda
+    relatados = set(resultado["relatorio"]["Arquivo"])
+    for caminho, erro in resultado["falhas"].items():
+        if caminho not in relatados:
+            print(f"✖ erro {caminho}: {erro}")
+    if resultado["falhas"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
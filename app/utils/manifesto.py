@@ -0,0 +1,489 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from utils import duplicatas
+from utils.agregados import atualizar_agregados
+from utils.armazenamento import (
+    DIRETORIO_BASE,
+    VERSAO_ESQUEMA,
+    importar_arquivos,
+    nome_fragmento,
+    remover_fragmento,
+)
+from utils.extracao import textos_paginas
+from utils.extrato_parse import _detectar_periodo, hash_arquivo
+
+# Diretórios varridos e extensões aceitas de cada fonte, em ordem de preferência: quando há
+# dois arquivos com o mesmo nome (ex.: abril25.parquet do conversor_pix e o abril25.csv
+# antigo), só o da primeira extensão é importado.
+DIRETORIOS_FONTES = {
+    "extrato": ("app/data/extratos", (".pdf",)),
+    "boleto": ("app/data/boletos", (".pdf",)),
+    "pix": ("app/data/pix", (".parquet", ".csv")),
+}
+
+MESES_NOMES = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "março": 3, "abril": 4,
+    "maio": 5, "junho": 6, "julho": 7, "agosto": 8,
+    "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12
+}
+
+COLUNAS_RELATORIO = ["Arquivo", "Fonte", "Mês", "Situação", "Erro", "Duplicadas"]
+
+# Uma sincronização por vez no processo: o Dashboard sincroniza a cada rerun, e as sessões
+# do Streamlit são threads do mesmo processo, que leriam e regravariam o mesmo manifesto e
+# o mesmo índice de duplicatas ao mesmo tempo
+_trava_sincronizacao = threading.Lock()
+
+
+def caminho_manifesto(diretorio: str = DIRETORIO_BASE) -> str:
+    return os.path.join(diretorio, "manifesto.json")
+
+
+def carregar_manifesto(diretorio: str = DIRETORIO_BASE) -> dict:
+    """
+    Lê o manifesto da base: caminho do arquivo de origem -> {fonte, mes, fragmento, mtime,
+    tamanho, hash, esquema}, com 'duplicado_de' nas cópias idênticas de outro arquivo e
+    'erro' (sem mes e fragmento) nos arquivos que falharam.
+    """
+    caminho = caminho_manifesto(diretorio)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salvar_manifesto(manifesto: dict, diretorio: str = DIRETORIO_BASE):
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = caminho_manifesto(diretorio)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
+
+def falhas(diretorio: str = DIRETORIO_BASE) -> dict:
+    """
+    Arquivos de origem que falharam na última tentativa de importação: caminho -> erro.
+    Ficam de fora da base até serem modificados (ver `sincronizar`).
+    """
+    return {c: e["erro"] for c, e in sorted(carregar_manifesto(diretorio).items()) if e.get("erro")}
+
+
+def versao_dados(fontes: list, meses: list = None, diretorio: str = DIRETORIO_BASE) -> str:
+    """
+    Identifica o conteúdo importado das fontes nos meses pedidos (None = todos): hash dos
+    hashes dos arquivos de origem registrados no manifesto. Muda quando um arquivo desses
+    meses é importado, modificado ou removido; serve de chave para caches de leitura.
+    """
+    h = hashlib.sha256()
+    for caminho, entrada in sorted(carregar_manifesto(diretorio).items()):
+        if entrada["fonte"] not in fontes or entrada.get("duplicado_de") or entrada.get("erro"):
+            continue
+        if meses is not None and entrada.get("mes") not in meses:
+            continue
+        h.update(f"{caminho}:{entrada['hash']}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def mes_do_nome(caminho: str):
+    """
+    Tenta extrair o mês do nome do arquivo ('abril25.pdf', 'marco2025.csv', '2025-04.pdf').
+
+    Returns:
+        str | None: Mês no formato 'AAAA-MM'.
+    """
+    nome = os.path.basename(caminho).lower()
+
+    match = re.match(r"(\d{4})-(\d{2})", nome)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+
+    match = re.match(r"([a-zç]+)[\s_-]?(\d{4}|\d{2})(?!\d)", nome)
+    if match and match.group(1) in MESES_NOMES:
+        ano = match.group(2)
+        if len(ano) == 2:
+            ano = f"20{ano}"
+        return f"{ano}-{MESES_NOMES[match.group(1)]:02d}"
+    return None
+
+
+def mes_do_cabecalho(arquivo_pdf: str):
+    """
+    Lê o mês do cabeçalho do extrato ('PERIODO:' ou 'SALDO ANT EM'), procurando página a página.
+
+    Returns:
+        str | None: Mês no formato 'AAAA-MM'.
+    """
+    for texto in textos_paginas(arquivo_pdf):
+        periodo = _detectar_periodo(texto)
+        if periodo is not None:
+            mes, ano = periodo
+            return f"{ano}-{mes:02d}"
+    return None
+
+
+def descobrir_mes(fonte: str, caminho: str):
+    mes = mes_do_nome(caminho)
+    if mes is None and fonte == "extrato":
+        mes = mes_do_cabecalho(caminho)
+    return mes
+
+
+def listar_arquivos(diretorios: dict = None) -> list:
+    """
+    Lista (fonte, caminho) de todos os arquivos de origem nos diretórios das fontes.
+    """
+    diretorios = diretorios or DIRETORIOS_FONTES
+    arquivos = []
+    for fonte, (pasta, extensoes) in diretorios.items():
+        if not os.path.isdir(pasta):
+            continue
+
+        arquivos.extend((fonte, os.path.join(pasta, nome)) for nome in escolher_arquivos(os.listdir(pasta), extensoes))
+    return arquivos
+
+
+def escolher_arquivos(nomes: list, extensoes: tuple) -> list:
+    """
+    Nomes de uma pasta com uma das `extensoes`, um por nome sem extensão (o da extensão
+    que vem primeiro), ordenados pelo nome sem extensão.
+    """
+    escolhidos = {}
+    for nome in nomes:
+        base, extensao = os.path.splitext(nome)
+        extensao = extensao.lower()
+        if extensao not in extensoes:
+            continue
+        atual = escolhidos.get(base)
+        if atual is None or extensoes.index(extensao) < extensoes.index(os.path.splitext(atual)[1].lower()):
+            escolhidos[base] = nome
+
+    # Ordena pelo nome sem extensão para que 'abril25' venha antes de 'abril25 copy'
+    return [escolhidos[base] for base in sorted(escolhidos)]
+
+
+def destino_na_origem(fonte: str, caminho: str, mes: str, diretorios: dict = None) -> str:
+    """
+    Caminho, na pasta de origem da fonte, de um arquivo avulso que deve ser importado com o
+    mês `mes`. A base espelha as pastas de origem: fora delas, o arquivo sairia da base na
+    sincronização seguinte. Se o nome não indica o mês, a cópia leva o mês na frente
+    ('2025-05 extrato.pdf', ver `mes_do_nome`).
+
+    Raises:
+        ValueError: Extensão não aceita pela fonte, arquivo já na pasta com o nome de outro
+            mês ou outro arquivo com o mesmo nome na pasta.
+    """
+    pasta, extensoes = (diretorios or DIRETORIOS_FONTES)[fonte]
+    nome = os.path.basename(caminho)
+    if os.path.splitext(nome)[1].lower() not in extensoes:
+        raise ValueError(f"{caminho}: a fonte '{fonte}' aceita {', '.join(extensoes)}")
+
+    if os.path.abspath(os.path.dirname(caminho)) == os.path.abspath(pasta):
+        if mes_do_nome(caminho) != mes:
+            raise ValueError(f"{caminho} já está em {pasta}, mas o nome indica o mês {mes_do_nome(caminho)}")
+        return caminho
+
+    destino = os.path.join(pasta, nome if mes_do_nome(nome) == mes else f"{mes} {nome}")
+    if os.path.exists(destino) and hash_arquivo(destino) != hash_arquivo(caminho):
+        raise ValueError(f"Já existe outro arquivo em {destino}")
+    return destino
+
+
+def _fragmento(caminho: str, entrada: dict) -> str:
+    # Entradas de antes da VERSAO_ESQUEMA 4 não registram o fragmento: era o nome do arquivo
+    return entrada.get("fragmento") or os.path.splitext(os.path.basename(caminho))[0]
+
+
+def _dependentes(manifesto: dict, caminhos: set) -> list:
+    """
+    Arquivos do manifesto com linhas descartadas como duplicadas de algum de `caminhos`,
+    direta ou indiretamente. Precisam ser importados de novo quando esses arquivos saem ou
+    mudam, para recuperar as linhas que só existiam neles.
+    """
+    encontrados = []
+    pendentes = set(caminhos)
+    while pendentes:
+        novos = [c for c, e in manifesto.items()
+                 if c not in caminhos and c not in encontrados and pendentes & set(e.get("duplicadas_de", []))]
+        encontrados.extend(sorted(novos))
+        pendentes = set(novos)
+    return encontrados
+
+
+def _liberar_copias(manifesto: dict, caminho: str) -> list:
+    """
+    Tira do manifesto os arquivos ignorados por serem cópias idênticas de `caminho`, que
+    saiu ou mudou, e devolve (fonte, caminho) de cada um para que passem pela sincronização
+    de novo: a primeira cópia é importada no lugar do original e as demais ficam como
+    cópias dela.
+    """
+    copias = [(e["fonte"], c) for c, e in sorted(manifesto.items()) if e.get("duplicado_de") == caminho]
+    for _, copia in copias:
+        del manifesto[copia]
+    return copias
+
+
+def _retirar_da_base(caminho: str, entrada: dict, diretorio: str, meses: set, saidos: dict):
+    """
+    Apaga o fragmento de um arquivo cujas linhas saem da base (o arquivo sumiu, virou cópia
+    de outro ou passou a falhar no parse) e o marca em `saidos` para sair do índice de
+    duplicatas. O mês entra em `meses`, que têm os agregados refeitos.
+    """
+    if entrada and entrada.get("mes") and not entrada.get("duplicado_de"):
+        remover_fragmento(entrada["fonte"], entrada["mes"], _fragmento(caminho, entrada), diretorio)
+        meses.add(entrada["mes"])
+        saidos[entrada["fonte"]].append(caminho)
+
+
+def _esquecer_impressoes(saidos: dict, diretorio: str):
+    # Tira do índice de duplicatas as linhas dos arquivos que não estão mais na base
+    for fonte, caminhos in saidos.items():
+        if caminhos:
+            indice = duplicatas.carregar_indice(fonte, diretorio)
+            duplicatas.esquecer(indice, caminhos)
+            duplicatas.salvar_indice(indice, fonte, diretorio)
+
+
+def sincronizar(diretorio: str = DIRETORIO_BASE, diretorios: dict = None,
+                max_workers: int = None, arquivos: list = None) -> pd.DataFrame:
+    """
+    Importa para a base apenas os arquivos novos ou modificados desde a última execução.
+
+    Cada arquivo é comparado com o manifesto primeiro por mtime e tamanho (só um stat) e,
+    se mudou, pelo hash do conteúdo. Arquivos importados com outra VERSAO_ESQUEMA são
+    importados de novo mesmo sem mudanças. Arquivos iguais a outro já importado (mesmo hash) são
+    ignorados como duplicados até o original sair ou mudar; arquivos que sumiram têm o
+    fragmento removido da base. Um arquivo que falha fica registrado com o erro e só é
+    tentado de novo quando muda (ver `falhas`).
+
+    Linhas que já vieram de outro arquivo (ex.: exportes de Pix com dias em comum) são
+    descartadas na importação (ver `utils.duplicatas`). Quando o arquivo que tinha essas
+    linhas sai ou muda, os que dependiam dele são importados de novo.
+
+    Args:
+        diretorio (str): Raiz da base Parquet (o manifesto fica em manifesto.json).
+        diretorios (dict): Fonte -> (pasta, extensões). Padrão: DIRETORIOS_FONTES.
+        max_workers (int): Processos usados no parse dos arquivos novos.
+        arquivos (list): (fonte, caminho) já listados, no lugar de varrer `diretorios`
+            (ex.: a árvore de diretórios do utils.lote).
+
+    Returns:
+        pd.DataFrame: Uma linha por arquivo que mudou, com as colunas de COLUNAS_RELATORIO.
+        Situação é 'importado', 'removido', 'duplicado' ou 'erro'; 'Duplicadas' é a
+        quantidade de linhas descartadas por já estarem na base.
+    """
+    with _trava_sincronizacao:
+        return _sincronizar(diretorio, diretorios, max_workers, arquivos)
+
+
+def _sincronizar(diretorio: str, diretorios: dict, max_workers: int, arquivos: list) -> pd.DataFrame:
+    manifesto = carregar_manifesto(diretorio)
+    relatorio = []
+    tarefas = []
+    meses_anteriores = set()
+    # Fonte -> arquivos cujas linhas saem do índice de duplicatas
+    saidos = {fonte: [] for fonte in DIRETORIOS_FONTES}
+    # Arquivos importados de novo que já tinham um fragmento na base
+    importados_antes = set()
+
+    arquivos = listar_arquivos(diretorios) if arquivos is None else arquivos
+    existentes = {caminho for _, caminho in arquivos}
+    # Arquivos a verificar; recebe de volta as cópias de um original que saiu ou mudou
+    fila = deque(arquivos)
+
+    por_hash = {e["hash"]: c for c, e in manifesto.items() if not e.get("duplicado_de")}
+
+    # Arquivos que saíram do diretório
+    removidos = sorted(set(manifesto) - existentes)
+    for caminho in removidos:
+        entrada = manifesto.pop(caminho)
+        if por_hash.get(entrada["hash"]) == caminho:
+            del por_hash[entrada["hash"]]
+        _retirar_da_base(caminho, entrada, diretorio, meses_anteriores, saidos)
+        relatorio.append([caminho, entrada["fonte"], entrada.get("mes"), "removido", None, 0])
+    for caminho in removidos:
+        fila.extend(_liberar_copias(manifesto, caminho))
+
+    # (fonte, mês, fragmento) -> arquivo que grava nele
+    donos = {}
+    for c, e in manifesto.items():
+        if e.get("mes") and not e.get("duplicado_de"):
+            donos.setdefault((e["fonte"], e["mes"], _fragmento(c, e)), c)
+
+    while fila:
+        fonte, caminho = fila.popleft()
+        info = os.stat(caminho)
+        entrada = manifesto.get(caminho)
+        # Fragmento gravado em outro formato: passa pelo parse de novo mesmo sem mudanças
+        atual = entrada is not None and entrada.get("esquema") == VERSAO_ESQUEMA
+        if atual and entrada["mtime"] == info.st_mtime and entrada["tamanho"] == info.st_size:
+            continue
+
+        hash_conteudo = hash_arquivo(caminho)
+        if atual and entrada["hash"] == hash_conteudo:
+            # Só o mtime mudou (ex.: arquivo copiado de novo)
+            entrada["mtime"] = info.st_mtime
+            continue
+
+        if entrada is not None and entrada["hash"] != hash_conteudo and por_hash.get(entrada["hash"]) == caminho:
+            # O conteúdo antigo não está mais na base: uma cópia dele passa a ser importada
+            del por_hash[entrada["hash"]]
+            fila.extend(_liberar_copias(manifesto, caminho))
+
+        nova = {"fonte": fonte, "mtime": info.st_mtime, "tamanho": info.st_size, "hash": hash_conteudo,
+                "esquema": VERSAO_ESQUEMA}
+
+        original = por_hash.get(hash_conteudo)
+        if original is not None and original != caminho:
+            _retirar_da_base(caminho, entrada, diretorio, meses_anteriores, saidos)
+            nova["duplicado_de"] = original
+            manifesto[caminho] = nova
+            relatorio.append([caminho, fonte, manifesto[original].get("mes"), "duplicado", f"Igual a {original}", 0])
+            continue
+
+        try:
+            mes = descobrir_mes(fonte, caminho)
+            erro = None if mes is not None else "Não foi possível determinar o mês do arquivo."
+        except Exception as e:
+            mes, erro = None, str(e)
+
+        if erro is None:
+            fragmento = nome_fragmento(caminho)
+            dono = donos.setdefault((fonte, mes, fragmento), caminho)
+            if dono != caminho:
+                # Não deve acontecer (o nome inclui o hash do caminho), mas gravar por cima
+                # perderia as linhas do outro arquivo sem aviso
+                erro = f"O fragmento {fragmento} de {mes} já é de {dono}"
+
+        if erro is not None:
+            # A falha fica no manifesto, com o mtime, o tamanho e o hash: o arquivo só é
+            # tentado de novo quando mudar, e não a cada rerun do Dashboard
+            _retirar_da_base(caminho, entrada, diretorio, meses_anteriores, saidos)
+            manifesto[caminho] = {**nova, "erro": erro}
+            relatorio.append([caminho, fonte, mes, "erro", erro, 0])
+            continue
+
+        # Se o arquivo mudou de mês (ou o fragmento de nome), o fragmento antigo sai da base
+        if entrada and entrada.get("mes") and not entrada.get("duplicado_de") \
+                and (entrada["mes"], _fragmento(caminho, entrada)) != (mes, fragmento):
+            remover_fragmento(fonte, entrada["mes"], _fragmento(caminho, entrada), diretorio)
+            meses_anteriores.add(entrada["mes"])
+
+        nova["mes"] = mes
+        nova["fragmento"] = fragmento
+        # Registra já para que uma cópia idêntica mais adiante seja detectada como duplicada
+        manifesto[caminho] = nova
+        por_hash[hash_conteudo] = caminho
+        tarefas.append((mes, fonte, caminho))
+        if entrada and entrada.get("mes") and not entrada.get("duplicado_de"):
+            importados_antes.add(caminho)
+
+    # Arquivos sem mudanças que tinham linhas descartadas como duplicadas de um arquivo que
+    # saiu ou mudou: entram depois dele na lista, para que ele fique com as linhas em comum
+    alterados = {c for cs in saidos.values() for c in cs} | {c for _, _, c in tarefas}
+    for caminho in _dependentes(manifesto, alterados):
+        entrada = manifesto[caminho]
+        if entrada.get("mes") and not entrada.get("duplicado_de"):
+            tarefas.append((entrada["mes"], entrada["fonte"], caminho))
+            importados_antes.add(caminho)
+
+    _esquecer_impressoes(saidos, diretorio)
+    importacao = importar_arquivos(tarefas, diretorio, max_workers) if tarefas else None
+
+    # Fonte -> arquivos que falharam na importação e tinham linhas de uma versão anterior
+    falhos = {fonte: [] for fonte in DIRETORIOS_FONTES}
+    for _, linha in (importacao.iterrows() if importacao is not None else []):
+        caminho, fonte, mes = linha["Arquivo"], linha["Fonte"], linha["Mês"]
+        if linha["Erro"]:
+            # Como as falhas acima: fica no manifesto até o arquivo mudar. O fragmento da
+            # versão anterior, se havia, sai da base.
+            entrada = manifesto[caminho]
+            if caminho in importados_antes:
+                _retirar_da_base(caminho, entrada, diretorio, meses_anteriores, falhos)
+            manifesto[caminho] = {
+                **{k: v for k, v in entrada.items() if k not in ("mes", "fragmento", "duplicadas_de")},
+                "erro": linha["Erro"],
+            }
+            relatorio.append([caminho, fonte, mes, "erro", linha["Erro"], 0])
+            continue
+
+        entrada = manifesto[caminho]
+        entrada.pop("duplicadas_de", None)
+        if linha["Duplicadas de"]:
+            entrada["duplicadas_de"] = linha["Duplicadas de"]
+        if linha["Linhas"] == 0 and linha["Duplicadas"]:
+            # Todas as linhas já estavam na base: o arquivo não tem fragmento
+            relatorio.append([caminho, fonte, mes, "duplicado",
+                              f"Linhas já importadas de {', '.join(linha['Duplicadas de'])}", linha["Duplicadas"]])
+            meses_anteriores.add(mes)
+        else:
+            relatorio.append([caminho, fonte, mes, "importado", None, linha["Duplicadas"]])
+
+    _esquecer_impressoes(falhos, diretorio)
+    salvar_manifesto(manifesto, diretorio)
+    relatorio = pd.DataFrame(relatorio, columns=COLUNAS_RELATORIO)
+
+    # Atualiza o cubo de agregados só nos meses que ganharam ou perderam linhas
+    afetados = relatorio.loc[relatorio["Situação"].isin(["importado", "removido"]), "Mês"].dropna()
+    afetados = set(afetados) | meses_anteriores
+    if afetados:
+        atualizar_agregados(sorted(afetados), diretorio)
+    return relatorio
+
+
+def observar(intervalo: float = 5.0, diretorio: str = DIRETORIO_BASE, max_workers: int = None):
+    """
+    Verifica os diretórios de origem a cada `intervalo` segundos e importa o que mudou.
+    Roda até ser interrompido (Ctrl+C).
+    """
+    print(f"Observando {', '.join(p for p, _ in DIRETORIOS_FONTES.values())} a cada {intervalo:g}s...")
+    try:
+        while True:
+            relatorio = sincronizar(diretorio=diretorio, max_workers=max_workers)
+            if not relatorio.empty:
+                imprimir_relatorio(relatorio)
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        pass
+
+
+def imprimir_relatorio(relatorio: pd.DataFrame):
+    if relatorio.empty:
+        print("✔ Nenhum arquivo novo ou modificado")
+        return
+    simbolos = {"importado": "✔", "removido": "−", "duplicado": "=", "erro": "✖"}
+    for _, linha in relatorio.iterrows():
+        detalhe = f": {linha['Erro']}" if linha["Erro"] else ""
+        if linha["Situação"] == "importado" and linha["Duplicadas"]:
+            detalhe = f": {linha['Duplicadas']} linha(s) já importada(s) de outro arquivo"
+        print(f"{simbolos[linha['Situação']]} {linha['Situação']} {linha['Arquivo']} ({linha['Mês']}){detalhe}")
+
+
+def main():
+    # Uso, a partir da raiz do repositório:
+    #   PYTHONPATH=app python -m utils.manifesto sincronizar
+    #   PYTHONPATH=app python -m utils.manifesto observar --intervalo 10
+    parser = argparse.ArgumentParser(description="Importação incremental de app/data para a base Parquet.")
+    parser.add_argument("comando", choices=["sincronizar", "observar"])
+    parser.add_argument("--intervalo", type=float, default=5.0, help="Segundos entre verificações (observar)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos usados no parse")
+    parser.add_argument("--diretorio", default=DIRETORIO_BASE)
+    args = parser.parse_args()
+
+    if args.comando == "observar":
+        observar(args.intervalo, args.diretorio, args.workers)
+    else:
+        imprimir_relatorio(sincronizar(diretorio=args.diretorio, max_workers=args.workers))
+
+
+if __name__ == "__main__":
+    main()
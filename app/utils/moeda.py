@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# === Valores monetários em centavos ===
+# A base guarda os valores como inteiros em centavos (int64): somas e comparações são
+# exatas, sem o erro de arredondamento do float. A conversão para reais fica para a
+# exibição (ver `centavos_para_reais`).
+
+# Depois de remover 'R$', os pontos de milhar e os espaços das pontas: sinal (no início ou
+# no final, como no extrato '1.234,56-'), reais e até duas casas decimais depois da vírgula
+PADRAO_MOEDA = r"^(?P<sinal>-?)(?P<reais>\d+)(?:,(?P<centavos>\d{1,2}))?(?P<sinal_final>-?)$"
+
+
+def para_centavos(valores: pd.Series) -> pd.Series:
+    """
+    Converte valores no formato brasileiro ('R$ 1.234,56', '1.234,56-', '-10,5') em
+    centavos, de uma vez para a Series inteira (kernels de texto do Arrow, sem laço em
+    Python e sem passar por float).
+
+    Returns:
+        pd.Series: Centavos no tipo 'Int64', com o índice de `valores`. Textos que não são
+        um valor monetário (ou vazios) viram <NA>.
+    """
+    texto = pc.cast(pa.array(valores, from_pandas=True), pa.string())
+    # Substituições literais e trim: bem mais baratos que espaços opcionais na regex
+    texto = pc.replace_substring(pc.replace_substring(texto, "R$", ""), ".", "")
+    texto = pc.ascii_trim_whitespace(texto)
+    partes = pc.extract_regex(texto, PADRAO_MOEDA)
+
+    reais = pc.cast(pc.struct_field(partes, "reais"), pa.int64())
+    centavos = pc.cast(pc.utf8_rpad(pc.struct_field(partes, "centavos"), 2, "0"), pa.int64())
+    total = pc.add_checked(pc.multiply_checked(reais, 100), centavos)
+
+    negativo = pc.or_(pc.not_equal(pc.struct_field(partes, "sinal"), ""),
+                      pc.not_equal(pc.struct_field(partes, "sinal_final"), ""))
+    total = pc.if_else(negativo, pc.negate_checked(total), total)
+    return pd.Series(pd.array(total, dtype="Int64"), index=valores.index)
+
+
+def reais_para_centavos(valores: pd.Series) -> pd.Series:
+    """
+    Converte valores em reais (float) para centavos, arredondando para o centavo mais
+    próximo. Usado com dados que já vêm numéricos (ex.: Parquet antigo do conversor_pix).
+    """
+    return pd.Series(np.round(valores.to_numpy(dtype="float64") * 100).astype("int64"), index=valores.index)
+
+
+def centavos_para_reais(centavos: pd.Series) -> pd.Series:
+    """
+    Valores em reais (float64) para exibição. Aplicar só depois das somas.
+    """
+    return centavos.astype("float64") / 100
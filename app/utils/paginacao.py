@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# === Índice para tabelas paginadas ===
+# As tabelas do histórico inteiro ('Todos') não vão inteiras para o navegador: o Dashboard
+# envia só a janela visível. Busca, filtros e ordenação são resolvidos aqui, no servidor,
+# sobre um índice montado uma vez por versão dos dados:
+#   - a ordem de cada coluna (crescente e decrescente) é calculada na primeira vez em que
+#     é pedida e guardada no índice;
+#   - a busca compara o texto de todas as colunas da linha, já em minúsculas;
+#   - uma consulta devolve só as posições das linhas, na ordem pedida. O custo por rerun é
+#     o de combinar máscaras e permutações de inteiros, e o DataFrame só é fatiado na janela.
+# O índice fica em st.cache_resource e é compartilhado pelas sessões (threads do mesmo
+# processo): as ordens e buscas guardadas só são alteradas com a trava do índice.
+
+# Buscas guardadas por índice (ex.: enquanto o usuário digita e pagina)
+LIMITE_BUSCAS = 16
+
+# Separa as colunas no texto de busca, para que um termo não case entre duas colunas
+_SEPARADOR = "\x1f"
+
+
+def montar_indice_tabela(df: pd.DataFrame) -> dict:
+    """
+    Monta o índice de uma tabela para `consultar`.
+
+    Returns:
+        dict: {'df', 'texto', 'ordens', 'buscas', 'trava'}; 'ordens' e 'buscas' são
+        preenchidos sob demanda, com 'trava' (threading.Lock).
+    """
+    df = df.reset_index(drop=True)
+    texto = pd.Series("", index=df.index, dtype=object)
+    for i, coluna in enumerate(df.columns):
+        valores = df[coluna]
+        if pd.api.types.is_datetime64_any_dtype(valores):
+            # A busca usa a data como é exibida (DD/MM/AAAA)
+            valores = valores.dt.strftime("%d/%m/%Y")
+        valores = valores.astype(object).where(valores.notna(), "").astype(str)
+        texto = texto + (_SEPARADOR if i else "") + valores
+    return {
+        "df": df,
+        "texto": texto.str.casefold(),
+        "ordens": {},
+        "buscas": OrderedDict(),
+        "trava": threading.Lock(),
+    }
+
+
+def _ordem(indice: dict, coluna: str, decrescente: bool) -> np.ndarray:
+    # Ordem estável, com os vazios no final nos dois sentidos
+    chave = (coluna, decrescente)
+    with indice["trava"]:
+        ordem = indice["ordens"].get(chave)
+    if ordem is None:
+        valores = indice["df"][coluna]
+        ordenados = valores.sort_values(ascending=not decrescente, kind="stable", na_position="last")
+        ordem = ordenados.index.to_numpy()
+        with indice["trava"]:
+            ordem = indice["ordens"].setdefault(chave, ordem)
+    return ordem
+
+
+def _busca(indice: dict, termo: str) -> np.ndarray:
+    termo = termo.strip().casefold()
+    buscas = indice["buscas"]
+    with indice["trava"]:
+        mascara = buscas.get(termo)
+        if mascara is not None:
+            buscas.move_to_end(termo)
+            return mascara
+
+    # A busca em si roda fora da trava, para não segurar as outras sessões
+    mascara = indice["texto"].str.contains(termo, regex=False).to_numpy()
+    with indice["trava"]:
+        buscas[termo] = mascara
+        buscas.move_to_end(termo)
+        while len(buscas) > LIMITE_BUSCAS:
+            buscas.popitem(last=False)
+    return mascara
+
+
+def consultar(indice: dict, busca: str = "", filtros: dict = None, ordenar_por: str = None,
+              decrescente: bool = False) -> np.ndarray:
+    """
+    Linhas da tabela que atendem à busca e aos filtros, na ordem pedida.
+
+    Args:
+        indice (dict): Resultado de `montar_indice_tabela`.
+        busca (str): Trecho procurado em qualquer coluna, sem diferença de maiúsculas.
+        filtros (dict): {coluna: valor}; só as linhas com a coluna igual ao valor.
+        ordenar_por (str): Coluna da ordenação. None mantém a ordem original.
+
+    Returns:
+        np.ndarray: Posições das linhas em indice['df'], para `janela`.
+    """
+    df = indice["df"]
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valor in (filtros or {}).items():
+        mascara &= (df[coluna] == valor).fillna(False).to_numpy(dtype=bool)
+    if busca and busca.strip():
+        mascara &= _busca(indice, busca)
+
+    posicoes = _ordem(indice, ordenar_por, decrescente) if ordenar_por else np.arange(len(df))
+    return posicoes[mascara[posicoes]]
+
+
+def janela(indice: dict, posicoes: np.ndarray, inicio: int, tamanho: int) -> pd.DataFrame:
+    """
+    Linhas `inicio` até `inicio + tamanho` do resultado de `consultar`.
+    """
+    return indice["df"].iloc[posicoes[inicio:inicio + tamanho]]
@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# === Pré-carregamento em segundo plano ===
+# O Dashboard agenda aqui os seus loaders (funções com st.cache_data) para os meses vizinhos
+# ao selecionado e para 'Todos'. O cache do st.cache_data é do processo, então executar o
+# loader numa thread do pool já deixa o valor pronto: ao trocar de mês, o rerun só lê do cache.
+#
+# O pool é iniciado uma vez por processo pelo app.py. Sem ele (ex.: página executada
+# isoladamente), `agendar` não faz nada e as páginas carregam tudo na hora, como antes.
+
+MAX_THREADS = 2
+
+# Tarefas lembradas para a situação exibida; as mais antigas já concluídas são esquecidas
+LIMITE_TAREFAS = 128
+
+PENDENTE = "pendente"
+PRONTO = "pronto"
+ERRO = "erro"
+
+_executor = None
+_tarefas = {}
+_trava = threading.Lock()
+
+
+def iniciar(max_threads: int = MAX_THREADS):
+    """
+    Cria o pool de threads do pré-carregamento, se ainda não existir.
+    """
+    global _executor
+    with _trava:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="pre_carregamento")
+
+
+def encerrar():
+    """
+    Descarta as tarefas que ainda não começaram e desliga o pool.
+    """
+    global _executor
+    with _trava:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        _tarefas.clear()
+
+
+def agendar(funcao, *args) -> bool:
+    """
+    Executa funcao(*args) em segundo plano, a menos que a mesma chamada já esteja agendada
+    ou pronta (chamadas que falharam são tentadas de novo).
+
+    Returns:
+        bool: True se a tarefa foi enviada ao pool.
+    """
+    chave = (funcao.__name__, args)
+    with _trava:
+        if _executor is None:
+            return False
+        tarefa = _tarefas.get(chave)
+        if tarefa is not None and not _falhou(tarefa):
+            return False
+        _tarefas[chave] = _executor.submit(funcao, *args)
+        _esquecer_antigas()
+    return True
+
+
+def _falhou(tarefa) -> bool:
+    return tarefa.done() and (tarefa.cancelled() or tarefa.exception() is not None)
+
+
+def _esquecer_antigas():
+    excesso = len(_tarefas) - LIMITE_TAREFAS
+    for chave in [c for c, t in _tarefas.items() if t.done()][:max(excesso, 0)]:
+        del _tarefas[chave]
+
+
+def situacao(funcao, *args) -> str:
+    """
+    Situação de uma chamada agendada: PENDENTE, PRONTO, ERRO ou None se nunca foi agendada.
+    """
+    with _trava:
+        tarefa = _tarefas.get((funcao.__name__, args))
+    if tarefa is None:
+        return None
+    if not tarefa.done():
+        return PENDENTE
+    return ERRO if _falhou(tarefa) else PRONTO
@@ -3,6 +3,8 @@ import pandas as pd
 import os
 
 def get_csv(pdf_path):
+    # Substituído por utils/conversor_pix.py, que extrai a tabela pelas coordenadas das
+    # palavras e grava Parquet já tipado; mantido para gerar os CSVs no formato antigo.
     dados = []
     with pdfplumber.open(pdf_path) as pdf:
         for page in pdf.pages:
@@ -31,9 +33,10 @@ def get_csv(pdf_path):
     print(f"✔ CSV salvo: {output_csv}")
 
 # === Loop pelos arquivos PDF em um diretório ===
-diretorio = "./"  # ou substitua por outro caminho
+if __name__ == "__main__":
+    diretorio = "./"  # ou substitua por outro caminho
 
-for arquivo in os.listdir(diretorio):
-    if arquivo.endswith(".pdf"):
-        caminho_pdf = os.path.join(diretorio, arquivo)
-        get_csv(caminho_pdf)
+    for arquivo in os.listdir(diretorio):
+        if arquivo.endswith(".pdf"):
+            caminho_pdf = os.path.join(diretorio, arquivo)
+            get_csv(caminho_pdf)
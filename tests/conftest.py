@@ -0,0 +1,17 @@
+# Uso, a partir da raiz do repositório:
+#   python -m pytest tests
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# O app importa os módulos como `utils.*`, a partir de app/ (ver PYTHONPATH=app nos comandos)
+sys.path.insert(0, os.path.join(RAIZ, "app"))
+
+
+@pytest.fixture(autouse=True)
+def raiz_do_repositorio(monkeypatch):
+    # Os caminhos padrão (app/data/...) são relativos à raiz do repositório
+    monkeypatch.chdir(RAIZ)
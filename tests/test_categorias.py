@@ -0,0 +1,35 @@
+import pandas as pd
+
+from utils.categorias import categorizar, montar_indice
+
+
+def _indice(regras: list) -> dict:
+    mapeamento = pd.DataFrame({"Pagador/Recebedor": ["de Maria da Silva"], "Categoria": ["Família"]})
+    regras = pd.DataFrame(regras, columns=["Tipo", "Padrao", "Categoria"])
+    return montar_indice(mapeamento, "Pagador/Recebedor", regras)
+
+
+def test_mapeamento_vence_as_regras():
+    indice = _indice([["prefixo", "de maria", "Outros"]])
+    nomes = pd.Series(["de  MARIA da silva", "de Maria Souza"])
+    assert categorizar(indice, nomes).tolist() == ["Família", "Outros"]
+
+
+def test_regra_regex_com_grupo_proprio_nao_desloca_as_seguintes():
+    indice = _indice([
+        ["regex", "(LOJA|MERCADO) X", "Mercado"],
+        ["prefixo", "uber", "Transporte"],
+        ["cnpj", "12.345.678", "Fornecedor"],
+    ])
+    nomes = pd.Series(["Mercado X Centro", "Uber Trip", "Empresa", "Ninguém"])
+    documentos = pd.Series(["", "", "12.345.678/0001-90", ""])
+    assert categorizar(indice, nomes, documentos).tolist() == ["Mercado", "Transporte", "Fornecedor", None]
+
+
+def test_primeira_regra_que_casa_vence():
+    indice = _indice([
+        ["regex", "(?:posto|auto) (shell)", "Combustível"],
+        ["prefixo", "posto", "Outros"],
+    ])
+    nomes = pd.Series(["Posto Shell 24h", "Posto Ipiranga"])
+    assert categorizar(indice, nomes).tolist() == ["Combustível", "Outros"]
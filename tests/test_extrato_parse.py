@@ -0,0 +1,140 @@
+import glob
+import logging
+import os
+import time
+from collections import Counter
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from utils.extracao import textos_paginas
+from utils.extrato_parse import (
+    LINHAS_POR_LOTE,
+    iterar_extrato_bancario,
+    iterar_extrato_paginas,
+    ler_registros_pix,
+    parse_pix_extrato_fitz,
+    parse_pix_extrato_pdfplumber,
+)
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados")
+
+# === parse_extrato_bancario ===
+# tests/dados/extratos/<amostra>.csv é a saída da implementação original (texto inteiro,
+# laço por linha, float e datetime.strptime por linha) para cada PDF de app/data/extratos,
+# com o Valor convertido para centavos e o índice original das linhas.
+
+EXTRATOS = sorted(glob.glob(os.path.join(RAIZ, "app/data/extratos/*.pdf")))
+
+
+def _extrato_esperado(caminho: str) -> pd.DataFrame:
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    df = pd.read_csv(os.path.join(DADOS, "extratos", f"{nome}.csv"), index_col=0,
+                     dtype={"Descricao": object, "Documento": object})
+    df.index.name = None
+    df["Data"] = pd.to_datetime(df["Data"]).dt.date.astype(object)
+    return df
+
+
+@pytest.mark.parametrize("linhas_por_lote", [LINHAS_POR_LOTE, 7])
+@pytest.mark.parametrize("caminho", EXTRATOS, ids=os.path.basename)
+def test_extrato_igual_ao_original(caminho, linhas_por_lote):
+    # Lotes pequenos exercitam o dia herdado entre lotes
+    obtido = pd.concat(iterar_extrato_bancario(caminho, linhas_por_lote))
+    pd.testing.assert_frame_equal(obtido, _extrato_esperado(caminho))
+
+
+# Extrato em duas páginas: valores com o sinal de menos no final, linhas sem dia (herdam o
+# da anterior, inclusive através da quebra de página), dias inexistentes no mês (30/02) e
+# lançamentos automáticos, que são descartados.
+PAGINAS_SINTETICAS = [
+    "PERIODO: FEVEREIRO/2025\n"
+    "03  PIX RECEBIDO      100001  1.234,56\n"
+    "TARIFA BANCARIA      100002  12,34-\n"
+    "APLIC.AUTOM.      100003  500,00-\n",
+    "PAGAMENTO BOLETO      100004  1.000.000,01-\n"
+    "30  DEPOSITO      100005  10,00\n"
+    "ESTORNO      100006  0,50-\n"
+    "28  RESGATE AUTOM      100007  500,00\n"
+    "28  PIX ENVIADO      100008  7,00-\n",
+]
+
+
+@pytest.mark.parametrize("linhas_por_lote", [LINHAS_POR_LOTE, 1])
+def test_extrato_sintetico(linhas_por_lote):
+    esperado = pd.DataFrame({
+        "Data": [date(2025, 2, 3), date(2025, 2, 3), date(2025, 2, 3), date(2025, 2, 28)],
+        "Descricao": ["PIX RECEBIDO", "TARIFA BANCARIA", "PAGAMENTO BOLETO", "PIX ENVIADO"],
+        "Documento": ["100001", "100002", "100004", "100008"],
+        "Valor": pd.array([123456, -1234, -100000001, -700], dtype="int64"),
+    }, index=[0, 1, 3, 7])
+    obtido = pd.concat(iterar_extrato_paginas(PAGINAS_SINTETICAS, linhas_por_lote))
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_extrato_sem_periodo():
+    with pytest.raises(ValueError):
+        list(iterar_extrato_paginas(["03  PIX RECEBIDO      100001  1,00\n"]))
+
+
+# === parse_pix_extrato_pdfplumber ===
+# tests/dados/pix/<amostra>.csv foi conferido, linha a linha, com as tabelas exportadas em
+# app/data/pix/<amostra>.csv. Ficam de fora as devoluções ("Pix Devolvido"), que o parser
+# não lê, e as 10 linhas de 28/02/2025 que o CSV de fevereiro25 tem e o PDF não.
+
+PIX = sorted(glob.glob(os.path.join(RAIZ, "app/data/pix/*.pdf")))
+
+
+@pytest.fixture(autouse=True)
+def _silenciar_pdfminer():
+    logging.getLogger("pdfminer").setLevel(logging.ERROR)
+
+
+def _pix_esperado(caminho: str) -> pd.DataFrame:
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return pd.read_csv(os.path.join(DADOS, "pix", f"{nome}.csv"), dtype=object).astype({"Valor": "Int64"})
+
+
+@pytest.mark.parametrize("caminho", PIX, ids=os.path.basename)
+def test_pix_pdfplumber_igual_ao_esperado(caminho):
+    pd.testing.assert_frame_equal(parse_pix_extrato_pdfplumber(caminho), _pix_esperado(caminho))
+
+
+def _linhas_pix_fitz_confiaveis(df):
+    # A regex do PyMuPDF exige o CPF/CNPJ inteiro numa linha; quando o CNPJ vem quebrado, o
+    # nome capturado engole os registros seguintes (e contém 'Pix'). Essas linhas ficam de fora.
+    df = df[~df["Pessoa"].str.contains(r"\bPix\b")]
+    nomes = df["Pessoa"].str.replace(r"\s+", " ", regex=True)
+    return Counter(zip(df["Tipo"], nomes, df["CPF/CNPJ"], df["Data"], df["Valor"]))
+
+
+@pytest.mark.parametrize("caminho", PIX, ids=os.path.basename)
+def test_pix_pdfplumber_concorda_com_fitz(caminho):
+    pdfplumber = parse_pix_extrato_pdfplumber(caminho)
+    linhas = Counter(zip(*(pdfplumber[c] for c in ["Direcao", "Nome", "Documento", "Data", "Valor"])))
+    confiaveis = _linhas_pix_fitz_confiaveis(parse_pix_extrato_fitz(caminho))
+    assert confiaveis
+    assert not confiaveis - linhas
+
+
+def test_pix_escala_linear():
+    # Texto da maior amostra repetido até ~10 mil registros: o tempo por registro no maior
+    # tamanho não pode passar de 3x o do menor (o melhor de 3 medições de cada).
+    maior = max(PIX, key=os.path.getsize)
+    texto = "\n".join(t for t in textos_paginas(maior, "pdfplumber") if t)
+    por_copia = len(ler_registros_pix(texto))
+
+    def tempo_por_registro(copias):
+        sintetico = "\n".join([texto] * copias)
+        tempos = []
+        for _ in range(3):
+            inicio = time.perf_counter()
+            registros = len(ler_registros_pix(sintetico))
+            tempos.append(time.perf_counter() - inicio)
+        assert registros == por_copia * copias
+        return min(tempos) / registros
+
+    copias = -(-10000 // por_copia)
+    assert tempo_por_registro(copias) <= 3 * tempo_por_registro(max(1, copias // 8))
@@ -0,0 +1,123 @@
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+from utils import armazenamento
+from utils.armazenamento import carregar, meses_disponiveis
+from utils.manifesto import carregar_manifesto, destino_na_origem, falhas, sincronizar
+
+PIX_ABRIL = "app/data/pix/abril25.csv"
+
+
+def _sincronizar(base, pasta):
+    relatorio = sincronizar(str(base), {"pix": (str(pasta), (".csv",))}, max_workers=1)
+    return dict(zip(relatorio["Arquivo"].map(os.path.basename), relatorio["Situação"]))
+
+
+def test_copia_e_importada_quando_o_original_sai(tmp_path):
+    pasta, base = tmp_path / "pix", tmp_path / "base"
+    pasta.mkdir()
+    shutil.copy(PIX_ABRIL, pasta / "abril25.csv")
+    shutil.copy(PIX_ABRIL, pasta / "abril25 copy.csv")
+
+    assert _sincronizar(base, pasta) == {"abril25.csv": "importado", "abril25 copy.csv": "duplicado"}
+    linhas = len(carregar("pix", ["2025-04"], diretorio=str(base)))
+    assert linhas > 0
+
+    os.remove(pasta / "abril25.csv")
+    assert _sincronizar(base, pasta) == {"abril25.csv": "removido", "abril25 copy.csv": "importado"}
+    assert len(carregar("pix", ["2025-04"], diretorio=str(base))) == linhas
+    entrada = carregar_manifesto(str(base))[str(pasta / "abril25 copy.csv")]
+    assert "duplicado_de" not in entrada
+
+    # Nada mudou desde a última sincronização
+    assert _sincronizar(base, pasta) == {}
+
+
+def test_copia_e_importada_quando_o_original_muda(tmp_path):
+    pasta, base = tmp_path / "pix", tmp_path / "base"
+    pasta.mkdir()
+    shutil.copy(PIX_ABRIL, pasta / "abril25.csv")
+    shutil.copy(PIX_ABRIL, pasta / "abril25 copy.csv")
+    _sincronizar(base, pasta)
+    linhas = len(carregar("pix", ["2025-04"], diretorio=str(base)))
+
+    # O original perde a última transação; a cópia ainda a tem
+    pd.read_csv(PIX_ABRIL).iloc[:-1].to_csv(pasta / "abril25.csv", index=False)
+
+    assert _sincronizar(base, pasta) == {"abril25.csv": "importado", "abril25 copy.csv": "importado"}
+    assert len(carregar("pix", ["2025-04"], diretorio=str(base))) == linhas
+
+
+def test_falha_so_e_tentada_de_novo_quando_o_arquivo_muda(tmp_path, monkeypatch):
+    pasta, base = tmp_path / "pix", tmp_path / "base"
+    pasta.mkdir()
+    (pasta / "maio25.csv").write_text("não é um export de Pix\n", encoding="utf-8")
+
+    assert _sincronizar(base, pasta) == {"maio25.csv": "erro"}
+    assert list(falhas(str(base))) == [str(pasta / "maio25.csv")]
+
+    # Sem mudança no arquivo, a sincronização não faz o parse de novo
+    def importar_arquivos(*args, **kwargs):
+        raise AssertionError("arquivo sem mudanças importado de novo")
+
+    with monkeypatch.context() as m:
+        m.setattr("utils.manifesto.importar_arquivos", importar_arquivos)
+        assert _sincronizar(base, pasta) == {}
+    assert list(falhas(str(base))) == [str(pasta / "maio25.csv")]
+
+    shutil.copy(PIX_ABRIL, pasta / "maio25.csv")
+    assert _sincronizar(base, pasta) == {"maio25.csv": "importado"}
+    assert falhas(str(base)) == {}
+
+
+def test_arquivo_que_passa_a_falhar_sai_da_base(tmp_path):
+    pasta, base = tmp_path / "pix", tmp_path / "base"
+    pasta.mkdir()
+    shutil.copy(PIX_ABRIL, pasta / "abril25.csv")
+    _sincronizar(base, pasta)
+    assert meses_disponiveis("pix", str(base)) == ["2025-04"]
+
+    (pasta / "abril25.csv").write_text("não é um export de Pix\n", encoding="utf-8")
+    assert _sincronizar(base, pasta) == {"abril25.csv": "erro"}
+    assert meses_disponiveis("pix", str(base)) == []
+    assert list(falhas(str(base))) == [str(pasta / "abril25.csv")]
+
+
+def test_importar_mes_copia_para_a_origem_e_sincroniza(tmp_path, monkeypatch):
+    pasta, base = tmp_path / "pix", tmp_path / "base"
+    monkeypatch.setattr("utils.manifesto.DIRETORIOS_FONTES", {"pix": (str(pasta), (".csv",))})
+    avulso = tmp_path / "exportado.csv"
+    shutil.copy(PIX_ABRIL, avulso)
+
+    monkeypatch.setattr(sys, "argv", ["armazenamento", "importar", "--mes", "2025-04", "--pix", str(avulso),
+                                      "--diretorio", str(base), "--workers", "1"])
+    armazenamento.main()
+
+    copia = pasta / "2025-04 exportado.csv"
+    assert carregar_manifesto(str(base))[str(copia)]["mes"] == "2025-04"
+    assert meses_disponiveis("agregados", str(base)) == ["2025-04"]
+    # A sincronização seguinte não importa o arquivo de novo
+    assert _sincronizar(base, pasta) == {}
+
+
+def test_destino_na_origem(tmp_path):
+    pasta = tmp_path / "pix"
+    pasta.mkdir()
+    diretorios = {"pix": (str(pasta), (".csv",))}
+    shutil.copy(PIX_ABRIL, pasta / "abril25.csv")
+
+    assert destino_na_origem("pix", "/x/pix.csv", "2025-05", diretorios) == str(pasta / "2025-05 pix.csv")
+    assert destino_na_origem("pix", str(pasta / "abril25.csv"), "2025-04", diretorios) == str(pasta / "abril25.csv")
+    for caminho, mes in [("/x/pix.pdf", "2025-05"), (str(pasta / "abril25.csv"), "2025-05")]:
+        with pytest.raises(ValueError):
+            destino_na_origem("pix", caminho, mes, diretorios)
+
+    # Outro arquivo com o mesmo nome já está na pasta
+    outro = tmp_path / "abril25.csv"
+    outro.write_text("outro conteúdo\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        destino_na_origem("pix", str(outro), "2025-04", diretorios)